@@ -49,6 +49,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'core.middleware.ForceCorsCredentialsMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -82,6 +83,28 @@ WSGI_APPLICATION = 'clouds_of_aurora_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Connection management: with psycopg 3 and psycopg_pool installed, every process keeps a
+# pool of connections that are health-checked on checkout; otherwise fall back to
+# persistent connections with Django's own health checks.
+DB_POOL_MIN_SIZE = 2
+DB_POOL_MAX_SIZE = 10
+DB_POOL_TIMEOUT = 10  # seconds to wait for a free connection
+
+DB_OPTIONS = {}
+try:
+    import psycopg  # noqa: F401
+    import psycopg_pool  # noqa: F401
+    # Django passes the pool its own checkout health check when CONN_HEALTH_CHECKS is on.
+    DB_OPTIONS = {
+        'pool': {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        },
+    }
+except ImportError:
+    pass
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -90,9 +113,28 @@ DATABASES = {
         'PASSWORD': 'antek',
         'HOST': 'localhost',
         'PORT': '5432',
+        'OPTIONS': DB_OPTIONS,
+        # Pooling requires CONN_MAX_AGE = 0; without a pool keep connections for a minute.
+        'CONN_MAX_AGE': 0 if 'pool' in DB_OPTIONS else 60,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Read replicas: add aliases to DATABASES and list them here to send read-only views to
+# them (see core.db_router). For a local setup, two SQLite files work, e.g.
+#   DATABASES['replica'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'replica.sqlite3',
+#                           'TEST': {'MIRROR': 'default'}}
+# and copy db.sqlite3 to replica.sqlite3 to simulate replication.
+# Read-your-writes pins live in the REPLICA_PIN_CACHE alias of CACHES, which must be shared
+# by every web worker (Redis, Memcached or the database cache); `manage.py check` fails
+# otherwise. Locally, the database cache works: add
+#   CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'coa_cache'}}
+# and run `manage.py createcachetable`.
+DATABASE_REPLICAS = []
+REPLICA_STICKY_SECONDS = 10
+REPLICA_PIN_CACHE = 'default'
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -171,6 +213,76 @@ SIMPLE_JWT = {
     # You can add other settings as desired.
 }
 
+# Validated-token cache used by core.decorators.jwt_required
+JWT_CACHE_SIZE = 4096
+JWT_CACHE_MAX_TTL = 300  # seconds; entries never outlive the token's own exp
+JWT_STATELESS_USER = False  # build request.user from claims instead of the DB
+
+# Shared game clock published by runapscheduler (see core.game_clock).
+# Use 'core.game_clock.CacheClockStore' with a shared CACHES backend for multi-host setups.
+GAME_CLOCK_BACKEND = 'core.game_clock.FileClockStore'
+GAME_CLOCK_MAX_STALENESS = 15  # seconds before readers fall back to GameState in the DB
+
+# /api/metrics/ needs a staff user's token unless METRICS_PUBLIC is set (e.g. when only an
+# internal monitoring network can reach it).
+METRICS_PUBLIC = False
+
+# Queue player actions and apply them at the next tick boundary (see core.actions).
+# Required by the memory and distributed engines.
+COMMAND_QUEUE_MODE = False
+
+# `runapscheduler --engine memory` writes the in-memory world back every N ticks.
+WORLD_CHECKPOINT_TICKS = 12
+
+# db and sql engines: each tick phase commits this many settlements per transaction and a
+# restarted scheduler resumes an interrupted tick from its last committed chunk.
+TICK_CHUNK_SIZE = 100
+
+# `runapscheduler --engine distributed`: settlements per TickBatch, and how long a worker may
+# hold a batch before it is handed to another worker.
+TICK_BATCH_SIZE = 50
+TICK_BATCH_LEASE_SECONDS = 30
+
+# Serve the polling endpoints (game state, settlement detail/map/events, settlers) from
+# core/async_views.py. Only worthwhile under an ASGI server such as uvicorn.
+ASYNC_POLLING_VIEWS = False
+
+# Occupancy grids used to validate placements are cached this long (seconds) in the default
+# cache. Configure a shared CACHES backend so workers see each other's placements; with the
+# per-process default a stale grid is caught by the unique building-tile constraint.
+GRID_CACHE_TIMEOUT = 3600
+
+# Coalesce identical concurrent settlement detail/map requests. SINGLE_FLIGHT_SHARED also
+# coordinates across worker processes and needs a shared cache backend.
+SINGLE_FLIGHT_ENABLED = True
+SINGLE_FLIGHT_SHARED = False
+
+# /api/settlement/<id>/forecast/: limits and the process pool used for multi-scenario runs.
+FORECAST_MAX_TICKS = 5000
+FORECAST_MAX_POINTS = 200  # trajectory points per scenario
+FORECAST_PROCESSES = 2
+
+# Settlements whose owner has been away this long stop ticking and are caught up on their
+# next visit; the scheduler also catches up the stalest ones every DORMANT_SWEEP_TICKS.
+SETTLEMENT_DORMANT_AFTER = timedelta(days=2)
+DORMANT_SWEEP_TICKS = 720
+
+# Append production/consumption/gathering/spending as ResourceDelta rows instead of rewriting
+# Settlement resource columns (see core.ledger); the db and sql engines fold them into the
+# settlement rows every RESOURCE_LEDGER_FOLD_TICKS ticks.
+RESOURCE_LEDGER_MODE = False
+RESOURCE_LEDGER_FOLD_TICKS = 12
+
+# runapscheduler samples its RSS every SCHEDULER_MEMORY_SAMPLE_SECONDS (served under
+# "scheduler_memory" in /api/metrics/). SCHEDULER_TRACEMALLOC_TOP > 0 also traces allocations
+# and reports the largest sites; past SCHEDULER_MEMORY_CEILING_MB (MiB) it restarts itself.
+SCHEDULER_MEMORY_SAMPLE_SECONDS = 300
+SCHEDULER_TRACEMALLOC_TOP = 0
+SCHEDULER_MEMORY_CEILING_MB = None
+
+# Pre-generated, unowned settlements kept ready by `manage.py runsettlementpool`.
+SETTLEMENT_POOL_SIZE = 20
+
 # (Keep your CORS, CSRF, cookie settings as before)
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = [
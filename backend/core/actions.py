@@ -0,0 +1,633 @@
+# core/actions.py
+import logging
+import random
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from core.config import BUILDING_COSTS
+from core.models import Building, Settler, ResourceNode, PendingAction, Settlement, EventLog, active_settlement_q
+from core.event_logger import log_event
+from core.ledger import charge, spendable
+from core.scheduling import schedule_building
+from core.occupancy import SettlementGrid, get_grid, store_grid, invalidate_grid
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+# When enabled, mutating endpoints only validate and enqueue; the tick applies the queue.
+COMMAND_QUEUE_MODE = getattr(settings, 'COMMAND_QUEUE_MODE', False)
+# Applied/failed actions are kept this many ticks so clients can poll their result.
+ACTION_RESULT_RETENTION_TICKS = getattr(settings, 'ACTION_RESULT_RETENTION_TICKS', 60)
+BATCH_ACTION_LIMIT = getattr(settings, 'BATCH_ACTION_LIMIT', 50)
+
+PRODUCTION_BUILDING_TYPES = ["lumber_mill", "quarry", "farmhouse"]
+
+
+class ActionError(Exception):
+    """
+    Raised by an action handler when the action cannot be applied.
+    Carries the HTTP status the synchronous endpoint would have returned.
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class BlueprintError(ActionError):
+    """
+    Raised when one or more blueprint entries cannot be placed; lists every failing entry.
+    """
+
+    def __init__(self, errors):
+        super().__init__("Blueprint cannot be placed.")
+        self.errors = errors
+
+
+# --- Parameter Validation (no DB access, runs before the ownership check) ---
+
+def validate_place_building(data):
+    if not data.get("settlement_id") or not data.get("building_type") or data.get("tile_x") is None or data.get("tile_y") is None:
+        raise ActionError("Settlement ID, building type, and tile coordinates are required.")
+    if data["building_type"] not in BUILDING_COSTS:
+        raise ActionError("Invalid building type.")
+
+def validate_assign_villager(data):
+    if not data.get("settlement_id") or not data.get("building_id"):
+        raise ActionError("Settlement ID and building ID are required.")
+
+def validate_gather_resource(data):
+    if not data.get("settlement_id") or not data.get("resource_node_id"):
+        raise ActionError("Settlement ID and resource node ID are required.")
+
+def validate_toggle_assignment(data):
+    if not data.get("settlement_id") or not data.get("object_type") or not data.get("object_id"):
+        raise ActionError("Missing required parameters.")
+
+def validate_place_blueprint(data):
+    if not data.get("settlement_id") or data.get("anchor_x") is None or data.get("anchor_y") is None:
+        raise ActionError("Settlement ID and anchor coordinates are required.")
+    if not isinstance(data.get("anchor_x"), int) or not isinstance(data.get("anchor_y"), int):
+        raise ActionError("Anchor coordinates must be integers.")
+    layout = data.get("layout")
+    if not isinstance(layout, list) or not layout:
+        raise ActionError("A non-empty layout is required.")
+    if len(layout) > BATCH_ACTION_LIMIT:
+        raise ActionError(f"At most {BATCH_ACTION_LIMIT} buildings can be placed in one blueprint.")
+
+def validate_batch(data):
+    if not data.get("settlement_id"):
+        raise ActionError("Settlement ID is required.")
+    if not isinstance(data.get("actions"), list) or not data["actions"]:
+        raise ActionError("A non-empty list of actions is required.")
+
+
+# --- Handlers ---
+# Each handler validates against current state and, when `commit` is True, applies the
+# action. Returns (payload, status) on success and raises ActionError otherwise.
+
+def place_building(settlement, data, clock, commit=True):
+    building_type = data["building_type"]
+    tile_x = data["tile_x"]
+    tile_y = data["tile_y"]
+    grid = get_grid(settlement)
+    error = grid.placement_error(building_type, tile_x, tile_y)
+    if error:
+        raise ActionError(*error)
+    cost = BUILDING_COSTS[building_type]
+    spendable(settlement)
+    if settlement.wood < cost["wood"] or settlement.stone < cost["stone"]:
+        raise ActionError("Insufficient resources.")
+    if not commit:
+        return None, 202
+    building = Building(
+        settlement=settlement,
+        building_type=building_type,
+        construction_progress=0,
+        villagers_generated=0,
+        coordinate_x=tile_x,
+        coordinate_y=tile_y,
+    )
+    schedule_building(building, clock.tick_count, clock.current_season)
+    _insert_buildings(settlement, [building])
+    charge(settlement, {"wood": cost["wood"], "stone": cost["stone"]}, "building")
+    grid.occupy(tile_x, tile_y)
+    store_grid(settlement.id, grid)
+    log_event(settlement, "building_placed", f"{building.building_type} construction started at ({tile_x}, {tile_y}).")
+    return {"message": "Building placed successfully.", "building_id": building.id}, 201
+
+def _insert_buildings(settlement, buildings):
+    """
+    Inserts buildings in one statement. The unique (settlement, x, y) constraint is the
+    final guard when a cached grid was stale, e.g. a placement from another worker.
+    """
+    try:
+        with transaction.atomic():
+            Building.objects.bulk_create(buildings)
+    except IntegrityError:
+        invalidate_grid(settlement.id)
+        raise ActionError("Tile is already occupied.")
+
+def place_blueprint(settlement, data, clock, commit=True):
+    """
+    Stamps a multi-building layout at an anchor tile. Every entry is validated against the
+    occupancy grid in one pass (including overlaps within the layout) and the total cost
+    is checked once; the blueprint is placed all-or-nothing with a single bulk_create.
+    """
+    anchor_x = data["anchor_x"]
+    anchor_y = data["anchor_y"]
+    layout = data["layout"]
+    grid = get_grid(settlement)
+    stamped = SettlementGrid(grid.terrain, grid.occupied)
+    errors = []
+    placements = []
+    wood = stone = 0
+    for index, entry in enumerate(layout):
+        building_type = entry.get("building_type") if isinstance(entry, dict) else None
+        if building_type not in BUILDING_COSTS:
+            errors.append({"index": index, "error": "Invalid building type."})
+            continue
+        dx, dy = entry.get("dx", 0), entry.get("dy", 0)
+        if not isinstance(dx, int) or not isinstance(dy, int):
+            errors.append({"index": index, "error": "Offsets must be integers."})
+            continue
+        x, y = anchor_x + dx, anchor_y + dy
+        error = stamped.placement_error(building_type, x, y)
+        if error:
+            errors.append({"index": index, "error": error[0], "tile_x": x, "tile_y": y})
+            continue
+        stamped.occupy(x, y)
+        wood += BUILDING_COSTS[building_type]["wood"]
+        stone += BUILDING_COSTS[building_type]["stone"]
+        placements.append((building_type, x, y))
+    if errors:
+        raise BlueprintError(errors)
+    spendable(settlement)
+    if settlement.wood < wood or settlement.stone < stone:
+        raise ActionError("Insufficient resources.")
+    if not commit:
+        return None, 202
+    buildings = []
+    for building_type, x, y in placements:
+        building = Building(
+            settlement=settlement,
+            building_type=building_type,
+            construction_progress=0,
+            villagers_generated=0,
+            coordinate_x=x,
+            coordinate_y=y,
+        )
+        schedule_building(building, clock.tick_count, clock.current_season)
+        buildings.append(building)
+    _insert_buildings(settlement, buildings)
+    charge(settlement, {"wood": wood, "stone": stone}, "blueprint")
+    store_grid(settlement.id, stamped)
+    log_event(settlement, "building_placed",
+              f"Blueprint of {len(buildings)} buildings started at ({anchor_x}, {anchor_y}).")
+    return {
+        "message": "Blueprint placed successfully.",
+        "building_ids": [b.id for b in buildings],
+        "cost": {"wood": wood, "stone": stone},
+    }, 201
+
+def assign_villager(settlement, data, clock, commit=True):
+    try:
+        building = settlement.buildings.get(id=data["building_id"])
+    except Building.DoesNotExist:
+        raise ActionError("Building not found in the settlement.", status=404)
+    if building.building_type not in PRODUCTION_BUILDING_TYPES:
+        raise ActionError("Villagers can only be assigned to production buildings.")
+    settler_id = data.get("settler_id")
+    if settler_id:
+        try:
+            settler = settlement.settlers.get(id=settler_id)
+        except Settler.DoesNotExist:
+            raise ActionError("Villager not found in the settlement.", status=404)
+    else:
+        settler = settlement.settlers.filter(status="idle").first()
+        if settler is None:
+            raise ActionError("No idle villagers available.")
+    if not commit:
+        return None, 202
+    if settler.gathering_resource_node_id is not None:
+        # A gatherer taken off its node releases it.
+        ResourceNode.objects.filter(id=settler.gathering_resource_node_id, gatherer=settler).update(gatherer=None)
+        settler.gathering_resource_node = None
+    settler.assigned_building = building
+    settler.status = "working"
+    settler.save()
+    log_event(settlement, "villager_assigned", f"Villager {settler.name} assigned to {building.building_type}.")
+    return {"message": "Villager assigned successfully.", "settler_id": settler.id}, 200
+
+def _start_gathering(settlement, node, villager):
+    node.gatherer = villager
+    node.save()
+    villager.gathering_resource_node = node
+    villager.status = "gathering"
+    villager.save()
+    log_event(settlement, "villager_assigned", f"{villager.name} started gathering from {node.name}.")
+
+def gather_resource(settlement, data, clock, commit=True):
+    try:
+        node = ResourceNode.objects.get(id=data["resource_node_id"], map_tile__settlement=settlement)
+    except ResourceNode.DoesNotExist:
+        raise ActionError("Resource node not found in settlement.", status=404)
+    if node.gatherer:
+        raise ActionError("Resource node is already being gathered.")
+    idle_settlers = settlement.settlers.filter(status="idle")
+    if not idle_settlers.exists():
+        raise ActionError("No idle villagers available.")
+    if not commit:
+        return None, 202
+    villager = idle_settlers.order_by('?').first()
+    _start_gathering(settlement, node, villager)
+    return {
+        "message": f"{villager.name} started gathering from {node.name}.",
+        "villager_id": villager.id,
+        "resource_node_id": node.id,
+    }, 200
+
+def toggle_assignment(settlement, data, clock, commit=True):
+    object_type = data["object_type"]
+    object_id = data["object_id"]
+    idle_villagers = settlement.settlers.filter(status="idle", gathering_resource_node__isnull=True)
+    if object_type == "building":
+        try:
+            building = settlement.buildings.get(id=object_id)
+        except Building.DoesNotExist:
+            raise ActionError("Building not found in settlement.", status=404)
+        if building.building_type not in PRODUCTION_BUILDING_TYPES:
+            raise ActionError("Villagers can only be assigned to production buildings.")
+        assigned = building.assigned_settlers.all()
+        if assigned.exists():
+            if not commit:
+                return None, 202
+            for villager in assigned:
+                villager.assigned_building = None
+                villager.status = "idle"
+                villager.save()
+            log_event(settlement, "villager_assigned", f"Cleared assignments from {building.get_building_type_display()} for all villagers.")
+            return {"message": "Assignment cleared."}, 200
+        if not idle_villagers.exists():
+            raise ActionError("No idle villagers available.")
+        if not commit:
+            return None, 202
+        villager = idle_villagers.order_by('?').first()
+        villager.assigned_building = building
+        villager.status = "working"
+        villager.save()
+        log_event(settlement, "villager_assigned", f"{villager.name} assigned to {building.get_building_type_display()}.")
+        return {"message": f"{villager.name} assigned to {building.get_building_type_display()}."}, 200
+    elif object_type == "resource_node":
+        try:
+            node = ResourceNode.objects.get(id=object_id, map_tile__settlement=settlement)
+        except ResourceNode.DoesNotExist:
+            raise ActionError("Resource node not found in settlement.", status=404)
+        if node.gatherer:
+            if not commit:
+                return None, 202
+            villager = node.gatherer
+            node.gatherer = None
+            node.save()
+            if villager:
+                villager.gathering_resource_node = None
+                villager.status = "idle"
+                villager.save()
+            log_event(settlement, "villager_assigned", f"Cleared gathering assignment from {node.name}.")
+            return {"message": "Gathering assignment cleared."}, 200
+        if not idle_villagers.exists():
+            raise ActionError("No idle villagers available.")
+        if not commit:
+            return None, 202
+        villager = idle_villagers.order_by('?').first()
+        _start_gathering(settlement, node, villager)
+        return {"message": f"{villager.name} started gathering from {node.name}."}, 200
+    raise ActionError("Invalid object type.")
+
+
+# --- Batch Actions ---
+
+class SettlementSnapshot:
+    """
+    In-memory view of one settlement used to validate and apply a batch of actions
+    together: the idle pool, occupied tiles, terrain, nodes and the resource budget are
+    loaded once and updated as each action is accepted, then written back in bulk.
+    """
+
+    def __init__(self, settlement, clock):
+        self.settlement = settlement
+        self.clock = clock
+        spendable(settlement)
+        self.wood = settlement.wood
+        self.stone = settlement.stone
+        self.settlers = {s.id: s for s in settlement.settlers.exclude(status="dead")}
+        self.buildings = {b.id: b for b in settlement.buildings.all()}
+        self.grid = get_grid(settlement)
+        self.nodes = {n.id: n for n in ResourceNode.objects.filter(map_tile__settlement=settlement)}
+        self.idle = [
+            s for s in self.settlers.values()
+            if s.status == "idle" and s.gathering_resource_node_id is None
+        ]
+        # One shuffle replaces a random sort per assignment.
+        random.shuffle(self.idle)
+        self.dirty_settlers = {}
+        self.dirty_nodes = {}
+        self.new_buildings = []
+        self.events = []
+
+    def log(self, event_type, description):
+        self.events.append(EventLog(settlement=self.settlement, event_type=event_type, description=description))
+
+    def take_idle(self):
+        if not self.idle:
+            raise ActionError("No idle villagers available.")
+        return self.idle.pop()
+
+    def set_settler(self, settler, status, building=None, node=None):
+        if settler.status == "idle" and settler in self.idle:
+            self.idle.remove(settler)
+        # A gatherer moved off its node releases it.
+        previous = self.nodes.get(settler.gathering_resource_node_id)
+        if previous is not None and previous is not node and previous.gatherer_id == settler.id:
+            self.set_gatherer(previous, None)
+        settler.status = status
+        settler.assigned_building = building
+        settler.gathering_resource_node = node
+        if status == "idle" and node is None:
+            self.idle.append(settler)
+        self.dirty_settlers[settler.id] = settler
+
+    def set_gatherer(self, node, settler):
+        node.gatherer = settler
+        self.dirty_nodes[node.id] = node
+
+    def production_building(self, building_id, not_found):
+        building = self.buildings.get(_as_int(building_id))
+        if building is None:
+            raise ActionError(not_found, status=404)
+        if building.building_type not in PRODUCTION_BUILDING_TYPES:
+            raise ActionError("Villagers can only be assigned to production buildings.")
+        return building
+
+    def settlement_node(self, node_id):
+        node = self.nodes.get(_as_int(node_id))
+        if node is None:
+            raise ActionError("Resource node not found in settlement.", status=404)
+        return node
+
+    def place_building(self, action):
+        building_type = action.get("building_type")
+        tile_x = action.get("tile_x")
+        tile_y = action.get("tile_y")
+        if not building_type or tile_x is None or tile_y is None:
+            raise ActionError("Building type and tile coordinates are required.")
+        if building_type not in BUILDING_COSTS:
+            raise ActionError("Invalid building type.")
+        error = self.grid.placement_error(building_type, tile_x, tile_y)
+        if error:
+            raise ActionError(*error)
+        cost = BUILDING_COSTS[building_type]
+        if self.wood < cost["wood"] or self.stone < cost["stone"]:
+            raise ActionError("Insufficient resources.")
+        self.wood -= cost["wood"]
+        self.stone -= cost["stone"]
+        self.grid.occupy(tile_x, tile_y)
+        building = Building(
+            settlement=self.settlement,
+            building_type=building_type,
+            construction_progress=0,
+            villagers_generated=0,
+            coordinate_x=tile_x,
+            coordinate_y=tile_y,
+        )
+        schedule_building(building, self.clock.tick_count, self.clock.current_season)
+        self.new_buildings.append(building)
+        self.log("building_placed", f"{building_type} construction started at ({tile_x}, {tile_y}).")
+        return {"message": "Building placed successfully.", "building": building}
+
+    def assign_villager(self, action):
+        building = self.production_building(action.get("building_id"), "Building not found in the settlement.")
+        settler_id = action.get("settler_id")
+        if settler_id:
+            settler = self.settlers.get(_as_int(settler_id))
+            if settler is None:
+                raise ActionError("Villager not found in the settlement.", status=404)
+        else:
+            settler = self.take_idle()
+        self.set_settler(settler, "working", building=building)
+        self.log("villager_assigned", f"Villager {settler.name} assigned to {building.building_type}.")
+        return {"message": "Villager assigned successfully.", "settler_id": settler.id}
+
+    def gather_resource(self, action):
+        node = self.settlement_node(action.get("resource_node_id"))
+        if node.gatherer_id:
+            raise ActionError("Resource node is already being gathered.")
+        villager = self.take_idle()
+        self.set_settler(villager, "gathering", node=node)
+        self.set_gatherer(node, villager)
+        self.log("villager_assigned", f"{villager.name} started gathering from {node.name}.")
+        return {
+            "message": f"{villager.name} started gathering from {node.name}.",
+            "villager_id": villager.id,
+            "resource_node_id": node.id,
+        }
+
+    def toggle_assignment(self, action):
+        object_type = action.get("object_type")
+        object_id = action.get("object_id")
+        if not object_type or not object_id:
+            raise ActionError("Missing required parameters.")
+        if object_type == "building":
+            building = self.production_building(object_id, "Building not found in settlement.")
+            assigned = [s for s in self.settlers.values() if s.assigned_building_id == building.id]
+            if assigned:
+                for villager in assigned:
+                    self.set_settler(villager, "idle", node=villager.gathering_resource_node)
+                self.log("villager_assigned", f"Cleared assignments from {building.get_building_type_display()} for all villagers.")
+                return {"message": "Assignment cleared."}
+            villager = self.take_idle()
+            self.set_settler(villager, "working", building=building)
+            self.log("villager_assigned", f"{villager.name} assigned to {building.get_building_type_display()}.")
+            return {"message": f"{villager.name} assigned to {building.get_building_type_display()}."}
+        elif object_type == "resource_node":
+            node = self.settlement_node(object_id)
+            if node.gatherer_id:
+                villager = self.settlers.get(node.gatherer_id)
+                self.set_gatherer(node, None)
+                if villager:
+                    self.set_settler(villager, "idle", building=villager.assigned_building)
+                self.log("villager_assigned", f"Cleared gathering assignment from {node.name}.")
+                return {"message": "Gathering assignment cleared."}
+            villager = self.take_idle()
+            self.set_settler(villager, "gathering", node=node)
+            self.set_gatherer(node, villager)
+            self.log("villager_assigned", f"{villager.name} started gathering from {node.name}.")
+            return {"message": f"{villager.name} started gathering from {node.name}."}
+        raise ActionError("Invalid object type.")
+
+    def flush(self):
+        """
+        Writes every accepted change with one statement per table.
+        """
+        charge(self.settlement, {
+            "wood": self.settlement.wood - self.wood,
+            "stone": self.settlement.stone - self.stone,
+        }, "batch")
+        if self.new_buildings:
+            _insert_buildings(self.settlement, self.new_buildings)
+            store_grid(self.settlement.id, self.grid)
+        if self.dirty_nodes:
+            # Release gatherers before assigning new ones so the one-to-one constraint
+            # never sees the same settler on two nodes.
+            released = [n for n in self.dirty_nodes.values() if n.gatherer_id is None]
+            assigned = [n for n in self.dirty_nodes.values() if n.gatherer_id is not None]
+            if released:
+                ResourceNode.objects.bulk_update(released, ["gatherer"])
+            if assigned:
+                ResourceNode.objects.bulk_update(assigned, ["gatherer"])
+        if self.dirty_settlers:
+            Settler.objects.bulk_update(
+                list(self.dirty_settlers.values()), ["status", "assigned_building", "gathering_resource_node"]
+            )
+        if self.events:
+            EventLog.objects.bulk_create(self.events)
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+BATCH_ACTION_TYPES = ("place_building", "assign_villager", "gather_resource", "toggle_assignment")
+
+
+def apply_batch(settlement, actions, clock, commit=True):
+    """
+    Validates a list of heterogeneous actions for one settlement against a single snapshot,
+    in order, so later actions see the idle pool, tiles and budget left by earlier ones.
+    Accepted actions are committed together; each action gets its own result entry.
+    Returns (payload, status).
+    """
+    if not isinstance(actions, list) or not actions:
+        raise ActionError("A non-empty list of actions is required.")
+    if len(actions) > BATCH_ACTION_LIMIT:
+        raise ActionError(f"At most {BATCH_ACTION_LIMIT} actions can be sent in one batch.")
+    with transaction.atomic():
+        if commit:
+            try:
+                settlement = Settlement.objects.active().select_for_update().get(id=settlement.id)
+            except Settlement.DoesNotExist:
+                raise ActionError("Settlement not found.", status=404)
+        snapshot = SettlementSnapshot(settlement, clock)
+        results = []
+        for index, action in enumerate(actions):
+            action_type = action.get("type") if isinstance(action, dict) else None
+            result = {"index": index, "type": action_type}
+            try:
+                if action_type not in BATCH_ACTION_TYPES:
+                    raise ActionError("Invalid action type.")
+                outcome = getattr(snapshot, action_type)(action)
+                result.update(outcome, status="ok")
+            except ActionError as e:
+                result.update(status="error", error=e.message, status_code=e.status)
+            results.append(result)
+        if commit:
+            snapshot.flush()
+    for result in results:
+        building = result.pop("building", None)
+        if building is not None:
+            result["building_id"] = building.id
+    applied = sum(1 for r in results if r["status"] == "ok")
+    return {
+        "settlement_id": settlement.id,
+        "applied": applied,
+        "failed": len(results) - applied,
+        "results": results,
+    }, 200
+
+
+def batch(settlement, data, clock, commit=True):
+    return apply_batch(settlement, data.get("actions"), clock, commit=commit)
+
+
+ACTION_VALIDATORS = {
+    "place_building": validate_place_building,
+    "assign_villager": validate_assign_villager,
+    "gather_resource": validate_gather_resource,
+    "toggle_assignment": validate_toggle_assignment,
+    "place_blueprint": validate_place_blueprint,
+    "batch": validate_batch,
+}
+
+ACTION_HANDLERS = {
+    "place_building": place_building,
+    "assign_villager": assign_villager,
+    "gather_resource": gather_resource,
+    "toggle_assignment": toggle_assignment,
+    "place_blueprint": place_blueprint,
+    "batch": batch,
+}
+
+
+def submit_action(settlement, action_type, data, clock):
+    """
+    Entry point for mutating endpoints. Applies the action right away, or in
+    COMMAND_QUEUE_MODE validates it against current state and queues it for the next tick.
+    Returns (payload, status); raises ActionError if validation fails.
+    """
+    handler = ACTION_HANDLERS[action_type]
+    if not COMMAND_QUEUE_MODE:
+        with transaction.atomic():
+            return handler(settlement, data, clock)
+    handler(settlement, data, clock, commit=False)
+    action = PendingAction.objects.create(settlement=settlement, action_type=action_type, payload=data)
+    return {
+        "message": "Action queued.",
+        "action_id": action.id,
+        "status": action.status,
+        "queued_at_tick": clock.tick_count,
+    }, 202
+
+
+def drain_action_queue(clock, realm_id=None):
+    """
+    Applies every pending action (for settlements in `realm_id`, if given) in submission
+    order. Each action runs in its own savepoint, so a failing action is recorded as
+    failed without rolling back the rest. Returns the number of actions processed.
+    """
+    pending = PendingAction.objects.select_related("settlement").filter(active_settlement_q(), status="pending")
+    if realm_id is not None:
+        pending = pending.filter(settlement__realm_id=realm_id)
+    actions = list(pending.order_by("id"))
+    for action in actions:
+        handler = ACTION_HANDLERS.get(action.action_type)
+        try:
+            if handler is None:
+                raise ActionError("Unknown action type.")
+            with transaction.atomic():
+                payload, status = handler(action.settlement, action.payload, clock)
+            action.status = "applied"
+            action.result = dict(payload, status_code=status)
+        except ActionError as e:
+            action.status = "failed"
+            action.result = {"error": e.message, "status_code": e.status}
+            if isinstance(e, BlueprintError):
+                action.result["details"] = e.errors
+        except Exception as e:
+            logger.exception("Error applying queued action %s: %s", action.id, str(e))
+            action.status = "failed"
+            action.result = {"error": str(e), "status_code": 500}
+        action.applied_tick = clock.tick_count
+    if actions:
+        PendingAction.objects.bulk_update(actions, ["status", "result", "applied_tick"])
+    finished = PendingAction.objects.exclude(status="pending").filter(
+        applied_tick__lt=clock.tick_count - ACTION_RESULT_RETENTION_TICKS
+    )
+    if realm_id is not None:
+        finished = finished.filter(settlement__realm_id=realm_id)
+    finished.delete()
+    return len(actions)
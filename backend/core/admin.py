@@ -1,6 +1,6 @@
 # core/admin.py
 from django.contrib import admin
-from .models import Settlement, Building, Settler, LoreEntry
+from .models import Settlement, Building, Settler, Grave, LoreEntry
 
 @admin.register(Settlement)
 class SettlementAdmin(admin.ModelAdmin):
@@ -14,6 +14,10 @@ class BuildingAdmin(admin.ModelAdmin):
 class SettlerAdmin(admin.ModelAdmin):
     list_display = ('name', 'settlement', 'status', 'mood', 'hunger', 'assigned_building')
 
+@admin.register(Grave)
+class GraveAdmin(admin.ModelAdmin):
+    list_display = ('name', 'settlement', 'cause', 'birth_tick', 'died_tick')
+
 @admin.register(LoreEntry)
 class LoreEntryAdmin(admin.ModelAdmin):
     list_display = ('title', 'event_date')
@@ -4,7 +4,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
-from core.models import Settlement, Building, Settler, LoreEntry
+from core.models import GameState, Settlement, Building, Settler, LoreEntry, active_settlement_q
+from core.game_clock import get_clock, realm_from_request
+from core.db_router import replica_read
 from core.api.serializers import (
     SettlementSerializer,
     BuildingSerializer,
@@ -12,6 +14,7 @@ from core.api.serializers import (
     LoreEntrySerializer
 )
 
+@replica_read
 class SettlementViewSet(viewsets.ReadOnlyModelViewSet):
     """
     Provides a read-only list and detail view of settlements for the authenticated user.
@@ -21,9 +24,10 @@ class SettlementViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        qs = Settlement.objects.filter(owner_id=user.id)
+        qs = Settlement.objects.active().filter(owner_id=user.id)
         return qs
 
+@replica_read
 class BuildingViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Building.objects.all()
     serializer_class = BuildingSerializer
@@ -33,21 +37,31 @@ class BuildingViewSet(viewsets.ReadOnlyModelViewSet):
         return response
 
 
+@replica_read
 class SettlerViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = SettlerSerializer
 
     def get_queryset(self):
         # Use select_related to include assigned_building and gathering_resource_node.
-        return Settler.objects.select_related('assigned_building', 'gathering_resource_node').all()
+        return Settler.objects.select_related('assigned_building', 'gathering_resource_node').filter(active_settlement_q())
 
+@replica_read
 class LoreEntryViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = LoreEntry.objects.all()
     serializer_class = LoreEntrySerializer
 
+@replica_read
 class GameStateView(APIView):
     def get(self, request):
-        from core.management.commands.runapscheduler import tick_count, current_season
+        realm_id = realm_from_request(request)
+        if realm_id is None:
+            return Response({'error': 'realm must be an integer.'}, status=400)
+        try:
+            clock = get_clock(realm_id)
+        except GameState.DoesNotExist:
+            return Response({'error': 'Realm not found.'}, status=404)
         return Response({
-            'tick_count': tick_count,
-            'current_season': current_season
+            'realm': realm_id,
+            'tick_count': clock.tick_count,
+            'current_season': clock.current_season
         })
@@ -1,17 +1,31 @@
 # core/api/serializers.py
 from rest_framework import serializers
-from core.models import Settlement, Building, Settler, LoreEntry, MapTile, GameState, ResourceNode
+from core.models import Settlement, Building, Settler, LoreEntry, MapTile, ResourceNode
 from core.config import (
     BUILDING_DESCRIPTIONS,
     TILE_DESCRIPTIONS,
     TILE_COLORS,
     TILE_SPRITES,
-    SEASON_MODIFIERS,
 )
+from core.game_clock import get_clock
 from core.population import calculate_popularity_index
+from core.ledger import resolve
+
+
+def _clock(serializer, realm_of):
+    # Settlement-scoped views pass their realm's clock in the serializer context; otherwise
+    # `realm_of()` looks the realm up from the object.
+    return serializer.context.get("clock") or get_clock(realm_of())
 
 class BuildingSerializer(serializers.ModelSerializer):
     description = serializers.SerializerMethodField()
+    construction_progress = serializers.SerializerMethodField()
+
+    def get_construction_progress(self, obj):
+        if obj.is_constructed or obj.construction_started_tick is None:
+            return obj.construction_progress
+        clock = _clock(self, lambda: obj.settlement.realm_id)
+        return obj.current_progress(clock.tick_count, clock.current_season)
 
     def get_description(self, obj):
         if obj.building_type == "house":
@@ -59,7 +73,7 @@ class SettlerSerializer(serializers.ModelSerializer):
                 'id': obj.gathering_resource_node.id,
                 'name': obj.gathering_resource_node.name,
                 'resource_type': obj.gathering_resource_node.resource_type,
-                'quantity': obj.gathering_resource_node.quantity,
+                'quantity': obj.gathering_resource_node.quantity_at(_clock(self, lambda: obj.settlement.realm_id).tick_count),
                 'max_quantity': obj.gathering_resource_node.max_quantity,
             }
         return None
@@ -83,6 +97,7 @@ class SettlementSerializer(serializers.ModelSerializer):
             'wood',
             'stone',
             'magic',
+            'realm_id',
             'created_at',
             'last_updated',
             'buildings',
@@ -95,15 +110,16 @@ class SettlementSerializer(serializers.ModelSerializer):
             'popularity_index',
         ]
 
-    def _get_modifiers(self):
-        gs = GameState.objects.get(pk=1)
-        current_season = gs.current_season
-        prod_modifier = SEASON_MODIFIERS.get(current_season, {}).get("production", 1.0)
-        cons_modifier = SEASON_MODIFIERS.get(current_season, {}).get("consumption", 1.0)
-        return prod_modifier, cons_modifier, current_season
+    def to_representation(self, instance):
+        # Resource balances include unfolded ledger deltas.
+        return super().to_representation(resolve([instance])[0])
+
+    def _get_modifiers(self, obj):
+        clock = _clock(self, lambda: obj.realm_id)
+        return clock.modifiers["production"], clock.modifiers["consumption"], clock.current_season
 
     def get_net_rate(self, obj, resource):
-        prod_modifier, cons_modifier, _ = self._get_modifiers()
+        prod_modifier, cons_modifier, _ = self._get_modifiers(obj)
         net_rates = obj.calculate_net_resource_rates(prod_modifier, cons_modifier)
         return round(net_rates.get(resource, 0), 1)
 
@@ -121,7 +137,7 @@ class SettlementSerializer(serializers.ModelSerializer):
         return 0
 
     def get_current_season(self, obj):
-        _, _, current_season = self._get_modifiers()
+        _, _, current_season = self._get_modifiers(obj)
         return current_season
 
     def get_popularity_index(self, obj):
@@ -130,7 +146,12 @@ class SettlementSerializer(serializers.ModelSerializer):
 class ResourceNodeSerializer(serializers.ModelSerializer):
     gatherer_id = serializers.SerializerMethodField()
     sprite_key = serializers.SerializerMethodField()
-    
+    quantity = serializers.SerializerMethodField()
+
+    def get_quantity(self, obj):
+        # Regeneration is lazy; the stored quantity may lag behind the current tick.
+        return obj.quantity_at(_clock(self, lambda: obj.map_tile.settlement.realm_id).tick_count)
+
     def get_gatherer_id(self, obj):
         return obj.gatherer.id if obj.gatherer else None
 
@@ -1,7 +1,7 @@
 # core/api/urls.py
+from django.conf import settings
 from django.urls import path
 from core.views import (
-    game_state_view,
     settlements_view,
     buildings_view,
     settlers_view,
@@ -9,20 +9,31 @@ from core.views import (
     register,
     current_user_view,
     create_settlement,
-    settlement_map_view,
-    settlement_detail_view,
     place_building,
     assign_villager,
     gather_resource,
     toggle_assignment,
     delete_settlement,  
+    action_status_view,
+    batch_actions_view,
+    place_blueprint,
+    metrics_view,
+    settlement_forecast_view,
+    realms_view,
+    settlement_graveyard_view,
 )
 
+# Under an ASGI server, serve the polling endpoints from their async versions.
+if getattr(settings, 'ASYNC_POLLING_VIEWS', False):
+    from core import async_views as views_mod
+else:
+    from core import views as views_mod
+
 urlpatterns = [
-    path('game-state/', game_state_view, name='game_state'),
+    path('game-state/', views_mod.game_state_view, name='game_state'),
     path('settlements/', settlements_view, name='settlements'),
-    path('settlements/<int:id>/', settlement_detail_view, name='settlement_detail'),
-    path('settlement/<int:id>/map/', settlement_map_view, name='settlement_map'),
+    path('settlements/<int:id>/', views_mod.settlement_detail_view, name='settlement_detail'),
+    path('settlement/<int:id>/map/', views_mod.settlement_map_view, name='settlement_map'),
     path('building/place/', place_building, name='place_building'),
     path('villager/assign/', assign_villager, name='assign_villager'),
     path('gather_resource/', gather_resource, name='gather_resource'),
@@ -31,5 +42,12 @@ urlpatterns = [
     path('register/', register, name='register'),
     path('current_user/', current_user_view, name='current_user'),
     path('settlement/<int:id>/delete/', delete_settlement, name='delete_settlement'),
+    path('action/<int:id>/', action_status_view, name='action_status'),
+    path('actions/batch/', batch_actions_view, name='batch_actions'),
+    path('blueprint/place/', place_blueprint, name='place_blueprint'),
+    path('metrics/', metrics_view, name='metrics'),
+    path('settlement/<int:id>/forecast/', settlement_forecast_view, name='settlement_forecast'),
+    path('realms/', realms_view, name='realms'),
+    path('settlement/<int:id>/graveyard/', settlement_graveyard_view, name='settlement_graveyard'),
 
 ]
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Import modules that register sources for /api/metrics/.
+        from core import db, memory_watch, settlement_pool, single_flight, tick_queue  # noqa: F401
+        from core import checks  # noqa: F401
@@ -0,0 +1,258 @@
+# core/async_views.py
+# Async versions of the polling endpoints, used instead of the ones in core/views.py when
+# ASYNC_POLLING_VIEWS is on and the project is served by an ASGI server, e.g.
+#   uvicorn clouds_of_aurora_backend.asgi:application --workers 4
+# A waiting client then costs a coroutine rather than a worker thread. Responses match the
+# sync views field for field; the DRF serializers run lazy per-row queries, so payloads are
+# built here from a few async queries instead.
+import logging
+
+from asgiref.sync import sync_to_async
+from django.db.models import F
+from django.http import JsonResponse
+
+from core.config import TILE_DESCRIPTIONS, TILE_COLORS, TILE_SPRITES, BUILDING_DESCRIPTIONS
+from core.models import GameState, Settlement, Building, Settler, MapTile, ResourceNode, active_settlement_q
+from core.decorators import async_jwt_required
+from core.db_router import replica_read, use_primary
+from core.single_flight import single_flight
+from core.game_clock import aget_clock, realm_from_request
+from core.tiering import atouch_settlement, catch_up_settlement
+from core.simulation import net_rates, popularity_index
+from core.world import aload_settlement
+from core.api.serializers import ResourceNodeSerializer
+
+logger = logging.getLogger(__name__)
+
+_node_serializer = ResourceNodeSerializer()
+
+
+# --- Helper Functions ---
+
+async def aget_settlement_or_error(request, settlement_id):
+    """
+    Async get_settlement_or_error: returns (settlement, error_response).
+    """
+    try:
+        settlement = await Settlement.objects.active().aget(id=settlement_id)
+        if settlement.owner_id != request.user.id:
+            return None, JsonResponse({"error": "Not authorized."}, status=403)
+        await atouch_settlement(settlement)
+        if settlement.simulated_tick is not None:
+            clock = await aget_clock(settlement.realm_id)
+            if settlement.simulated_tick < clock.tick_count:
+                # As in ensure_caught_up: the catch-up and everything after it read the primary.
+                use_primary()
+                await sync_to_async(catch_up_settlement)(
+                    settlement.id, clock.tick_count, clock.tick_count, clock.current_season
+                )
+                await settlement.arefresh_from_db()
+        return settlement, None
+    except Settlement.DoesNotExist:
+        return None, JsonResponse({"error": "Settlement not found."}, status=404)
+
+
+def _house_description(names):
+    if not names:
+        return "House: Empty."
+    if len(names) == 1:
+        return f"House: {names[0]} lives here."
+    return f"House: {', '.join(names)} live here."
+
+
+async def _realm_clocks(realm_ids):
+    return {realm_id: await aget_clock(realm_id) for realm_id in set(realm_ids)}
+
+
+async def _building_payloads(building_ids, clocks):
+    """
+    BuildingSerializer output for `building_ids`, from three queries. `clocks` maps each
+    building's realm id to its clock. Returns {building_id: dict}.
+    """
+    if not building_ids:
+        return {}
+    workers, residents = {}, {}
+    async for settler_id, building_id in Settler.objects.filter(
+        assigned_building_id__in=building_ids
+    ).order_by("id").values_list("id", "assigned_building_id"):
+        workers.setdefault(building_id, []).append(settler_id)
+    async for name, house_id in Settler.objects.filter(
+        housing_assigned_id__in=building_ids
+    ).order_by("id").values_list("name", "housing_assigned_id"):
+        residents.setdefault(house_id, []).append(name)
+    payloads = {}
+    async for building in Building.objects.filter(id__in=building_ids).annotate(realm_id=F("settlement__realm_id")):
+        clock = clocks[building.realm_id]
+        if building.building_type == "house":
+            description = _house_description(residents.get(building.id, []))
+        else:
+            description = BUILDING_DESCRIPTIONS.get(building.building_type, "No additional info available.")
+        payloads[building.id] = {
+            "id": building.id,
+            "building_type": building.building_type,
+            "construction_progress": building.current_progress(clock.tick_count, clock.current_season),
+            "is_constructed": building.is_constructed,
+            "settlement_id": building.settlement_id,
+            "coordinate_x": building.coordinate_x,
+            "coordinate_y": building.coordinate_y,
+            "assigned_settlers": workers.get(building.id, []),
+            "description": description,
+        }
+    return payloads
+
+
+# --- Polling Endpoints ---
+
+@replica_read
+async def game_state_view(request):
+    realm_id = realm_from_request(request)
+    if realm_id is None:
+        return JsonResponse({"error": "realm must be an integer."}, status=400)
+    try:
+        clock = await aget_clock(realm_id)
+    except GameState.DoesNotExist:
+        return JsonResponse({"error": "Realm not found."}, status=404)
+    return JsonResponse({"realm": realm_id, "tick_count": clock.tick_count, "current_season": clock.current_season})
+
+@replica_read
+async def settlers_view(request):
+    try:
+        settlers = [
+            settler async for settler in Settler.objects.select_related("gathering_resource_node")
+            .filter(active_settlement_q()).annotate(realm_id=F("settlement__realm_id"))
+        ]
+        clocks = await _realm_clocks(s.realm_id for s in settlers)
+        building_ids = {s.assigned_building_id for s in settlers} | {s.housing_assigned_id for s in settlers}
+        building_ids.discard(None)
+        buildings = await _building_payloads(building_ids, clocks)
+        data = []
+        for settler in settlers:
+            clock = clocks[settler.realm_id]
+            node = settler.gathering_resource_node
+            data.append({
+                "id": settler.id,
+                "name": settler.name,
+                "status": settler.status,
+                "mood": settler.mood,
+                "hunger": settler.hunger,
+                "assigned_building": buildings.get(settler.assigned_building_id),
+                "housing_assigned": buildings.get(settler.housing_assigned_id),
+                "gathering_resource_node": {
+                    "id": node.id,
+                    "name": node.name,
+                    "resource_type": node.resource_type,
+                    "quantity": node.quantity_at(clock.tick_count),
+                    "max_quantity": node.max_quantity,
+                } if node else None,
+                "settlement_id": settler.settlement_id,
+                "birth_tick": settler.birth_tick,
+                "experience": settler.experience,
+                "age": clock.tick_count - settler.birth_tick if settler.birth_tick is not None else "N/A",
+            })
+        return JsonResponse(data, safe=False)
+    except Exception as e:
+        logger.exception("Error in settlers_view: %s", e)
+        return JsonResponse({"error": str(e)}, status=500)
+
+@replica_read
+@async_jwt_required
+@single_flight
+async def settlement_map_view(request, id):
+    settlement, error_response = await aget_settlement_or_error(request, id)
+    if error_response:
+        return error_response
+    clock = await aget_clock(settlement.realm_id)
+    nodes = {}
+    async for node in ResourceNode.objects.filter(map_tile__settlement_id=settlement.id).order_by("id"):
+        nodes.setdefault(node.map_tile_id, []).append({
+            "id": node.id,
+            "name": node.name,
+            "resource_type": node.resource_type,
+            "quantity": node.quantity_at(clock.tick_count),
+            "max_quantity": node.max_quantity,
+            "lore": node.lore,
+            "gatherer_id": node.gatherer_id,
+            "sprite_key": _node_serializer.get_sprite_key(node),
+        })
+    tiles = []
+    async for tile in MapTile.objects.filter(settlement_id=settlement.id):
+        tiles.append({
+            "coordinate_x": tile.coordinate_x,
+            "coordinate_y": tile.coordinate_y,
+            "terrain_type": tile.terrain_type,
+            "description": TILE_DESCRIPTIONS.get(tile.terrain_type, "Unknown terrain."),
+            "color": TILE_COLORS.get(tile.terrain_type, "#808080"),
+            "sprite": TILE_SPRITES.get(tile.terrain_type, None),
+            "resource_nodes": nodes.get(tile.id, []),
+        })
+    return JsonResponse(tiles, safe=False)
+
+@replica_read
+@async_jwt_required
+@single_flight
+async def settlement_detail_view(request, id):
+    settlement, error_response = await aget_settlement_or_error(request, id)
+    if error_response:
+        return error_response
+    clock = await aget_clock(settlement.realm_id)
+    # Rates and popularity come from the pure simulation core over one async load.
+    state = await aload_settlement(settlement.id)
+    if state is None:
+        return JsonResponse({"error": "Settlement not found."}, status=404)
+    settlers = sorted(state.settlers.values(), key=lambda s: s.id)
+    buildings = []
+    async for b in Building.objects.filter(settlement_id=settlement.id):
+        entry = {
+            "id": b.id,
+            "building_type": b.building_type,
+            "construction_progress": b.current_progress(clock.tick_count, clock.current_season),
+            "is_constructed": b.is_constructed,
+            "coordinate_x": b.coordinate_x,
+            "coordinate_y": b.coordinate_y,
+        }
+        if b.building_type == "house":
+            names = [s.name for s in settlers if s.housing_id == b.id]
+            if len(names) == 1:
+                entry["assigned"] = f"{names[0]} lives here"
+            elif names:
+                entry["assigned"] = f"{', '.join(names)} live here"
+            else:
+                entry["assigned"] = "Empty"
+        else:
+            entry["assigned"] = next((s.name for s in settlers if s.assigned_building_id == b.id), "")
+        buildings.append(entry)
+    rates = net_rates(state, clock.modifiers["production"], clock.modifiers["consumption"])
+    # The loaded state carries unfolded ledger deltas; the settlement row may not.
+    return JsonResponse({
+        "id": settlement.id,
+        "name": settlement.name,
+        "realm": settlement.realm_id,
+        "food": state.food,
+        "wood": state.wood,
+        "stone": state.stone,
+        "magic": state.magic,
+        "created_at": settlement.created_at,
+        "buildings": buildings,
+        "net_food_rate": round(rates.get("food", 0), 1),
+        "net_wood_rate": round(rates.get("wood", 0), 1),
+        "net_stone_rate": round(rates.get("stone", 0), 1),
+        "net_magic_rate": 0,
+        "current_season": clock.current_season,
+        "popularity_index": round(popularity_index(state), 2),
+    })
+
+@replica_read
+@async_jwt_required
+async def settlement_events_view(request, id):
+    try:
+        settlement, error_response = await aget_settlement_or_error(request, id)
+        if error_response:
+            return error_response
+        events = [
+            event async for event in settlement.events.order_by("-timestamp")
+            .values("id", "event_type", "description", "timestamp")[:10]
+        ]
+        return JsonResponse(events, safe=False)
+    except Exception as e:
+        logger.exception("Error retrieving settlement events: %s", str(e))
+        return JsonResponse({"error": str(e)}, status=500)
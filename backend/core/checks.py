@@ -0,0 +1,29 @@
+# core/checks.py
+# System checks for settings that only work with a cache shared by every worker process.
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Backends whose entries are visible to one process only.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_process_local(alias):
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', PROCESS_LOCAL_CACHES[0])
+    return backend in PROCESS_LOCAL_CACHES
+
+
+@register()
+def check_replica_pin_cache(app_configs, **kwargs):
+    from core.db_router import DATABASE_REPLICAS, REPLICA_PIN_CACHE
+    if DATABASE_REPLICAS and is_process_local(REPLICA_PIN_CACHE):
+        return [Error(
+            f"DATABASE_REPLICAS is set but REPLICA_PIN_CACHE ('{REPLICA_PIN_CACHE}') is a process-local cache.",
+            hint="Point it at a cache shared by every web worker (Redis, Memcached or the database "
+                 "cache); otherwise a write served by one worker does not pin the client's reads "
+                 "on the others.",
+            id="core.E001",
+        )]
+    return []
@@ -0,0 +1,60 @@
+# core/db.py
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections, close_old_connections, reset_queries
+from django.db.utils import InterfaceError, OperationalError
+
+from core.metrics import register_metric
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+DB_RECONNECT_ATTEMPTS = getattr(settings, 'DB_RECONNECT_ATTEMPTS', 5)
+DB_RECONNECT_BACKOFF = getattr(settings, 'DB_RECONNECT_BACKOFF', 0.5)
+
+
+def ensure_healthy_connection(alias="default"):
+    """
+    Verifies the connection with a round trip and reconnects with exponential backoff if the
+    server went away (e.g. a DB restart under the long-running scheduler).
+    Raises the last error once DB_RECONNECT_ATTEMPTS is exhausted.
+    """
+    connection = connections[alias]
+    delay = DB_RECONNECT_BACKOFF
+    for attempt in range(1, DB_RECONNECT_ATTEMPTS + 1):
+        try:
+            connection.ensure_connection()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return
+        except (OperationalError, InterfaceError) as e:
+            logger.warning(f"Database connection check failed (attempt {attempt}): {e}")
+            connection.close()
+            if attempt == DB_RECONNECT_ATTEMPTS:
+                raise
+            time.sleep(delay)
+            delay *= 2
+
+
+def release_connections():
+    """
+    Returns this thread's connections to the pool, or closes them once obsolete when
+    pooling is off, and clears their query logs (with DEBUG on, Django records every
+    query until the log is reset). Call at the end of each unit of background work.
+    """
+    reset_queries()
+    close_old_connections()
+
+
+def pool_stats():
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], "pool", None)
+        if pool is not None:
+            stats[alias] = pool.get_stats()
+    return stats
+
+
+register_metric("db_pool", pool_stats)
@@ -0,0 +1,138 @@
+# core/db_router.py
+import contextvars
+import logging
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+
+from core.token_cache import hash_token
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+# Aliases in DATABASES that replicate from 'default'. Empty disables replica routing.
+DATABASE_REPLICAS = getattr(settings, 'DATABASE_REPLICAS', [])
+# After a client mutates anything, its reads stay on the primary for this long.
+REPLICA_STICKY_SECONDS = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+# Cache alias holding those pins. Every web worker must see it, so with replicas it has to
+# be a shared backend (Redis, Memcached, database), which `manage.py check` enforces.
+REPLICA_PIN_CACHE = getattr(settings, 'REPLICA_PIN_CACHE', 'default')
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_read_alias = contextvars.ContextVar("coa_read_alias", default=None)
+
+
+def replica_read(view):
+    """
+    Marks a view as read-only so ReplicaRoutingMiddleware may serve it from a replica.
+    """
+    view.replica_safe = True
+    return view
+
+
+def use_primary():
+    """
+    Sends the rest of the current request's reads to the primary, e.g. after the request
+    itself wrote rows a replica may not have yet.
+    """
+    _read_alias.set(None)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads to the replica chosen for the current request, if any, and everything
+    else (writes, the tick, management commands) to 'default'.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
+
+
+def _client_key(request):
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    if not header:
+        return None
+    return f"coa:primary_pin:{hash_token(header)}"
+
+
+def _is_replica_safe(view_func):
+    if getattr(view_func, "replica_safe", False):
+        return True
+    # DRF views expose their class on the view function.
+    return getattr(getattr(view_func, "cls", None), "replica_safe", False)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Routes replica-safe GET requests to a random replica unless the same client (by bearer
+    token) mutated something in the last REPLICA_STICKY_SECONDS, which gives
+    read-your-writes. Unsafe requests pin the client to the primary.
+    Works under WSGI and ASGI; the chosen alias lives in a contextvar, so concurrent async
+    requests never see each other's routing.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request._replica_routed = False
+        try:
+            response = self.get_response(request)
+        finally:
+            self._reset(request)
+        self._pin_after_write(request)
+        return response
+
+    async def __acall__(self, request):
+        request._replica_routed = False
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._reset(request)
+        self._pin_after_write(request)
+        return response
+
+    @staticmethod
+    def _reset(request):
+        # Under ASGI process_view may run in a worker thread whose context is copied back,
+        # so clear the value rather than resetting a token from another context.
+        if request._replica_routed:
+            _read_alias.set(None)
+
+    @staticmethod
+    def _pin_after_write(request):
+        if request.method not in SAFE_METHODS and DATABASE_REPLICAS:
+            key = _client_key(request)
+            if key:
+                caches[REPLICA_PIN_CACHE].set(key, 1, REPLICA_STICKY_SECONDS)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+            return None
+        if not _is_replica_safe(view_func):
+            return None
+        key = _client_key(request)
+        if key and caches[REPLICA_PIN_CACHE].get(key):
+            logger.debug("Client pinned to primary after a recent write")
+            return None
+        _read_alias.set(random.choice(DATABASE_REPLICAS))
+        request._replica_routed = True
+        return None
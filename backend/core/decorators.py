@@ -1,37 +1,150 @@
 # core/decorators.py
 import logging
 from functools import wraps
-from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.http import JsonResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from core.token_cache import token_cache, hash_token
 
 logger = logging.getLogger(__name__)
 
+# When enabled, request.user is built from the token claims and never loaded from the DB.
+JWT_STATELESS_USER = getattr(settings, 'JWT_STATELESS_USER', False)
+
+# JWTAuthentication keeps no per-request state, so one instance serves every request.
+_authenticator = JWTAuthentication()
+
+
+class CachedUser:
+    """
+    Lightweight stand-in for an authenticated User resolved from the token cache.
+    `id`/`pk` are available without a query (enough for ownership checks); any other
+    attribute loads the real User once on first access.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self.pk = user_id
+        self._user = None
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._user is None:
+            self._user = get_user_model().objects.get(pk=self.id)
+        return getattr(self._user, name)
+
+    def __str__(self):
+        return f"User {self.id}"
+
+
+def _user_from_entry(user_id, claims):
+    if JWT_STATELESS_USER:
+        return TokenUser(claims)
+    return CachedUser(user_id)
+
+
+def authenticate_request(request):
+    """
+    Resolves request.user from the Authorization header, using the validated-token cache.
+    Returns the user, or None if no credentials were sent. Raises on an invalid token.
+    """
+    header = _authenticator.get_header(request)
+    if header is None:
+        return None
+    raw_token = _authenticator.get_raw_token(header)
+    if raw_token is None:
+        return None
+
+    key = hash_token(raw_token)
+    entry = token_cache.get(key)
+    if entry is not None:
+        user_id, claims, _ = entry
+        logger.debug("JWT cache hit for token %s", key[:12])
+        return _user_from_entry(user_id, claims)
+
+    validated_token = _authenticator.get_validated_token(raw_token)
+    claims = dict(validated_token.payload)
+    if JWT_STATELESS_USER:
+        user_id = claims[api_settings.USER_ID_CLAIM]
+        token_cache.put(key, user_id, claims)
+        return TokenUser(claims)
+    # Full resolution on a miss so inactive/deleted users are still rejected.
+    user = _authenticator.get_user(validated_token)
+    token_cache.put(key, user.id, claims)
+    logger.debug("JWT cache miss for token %s, user %s cached", key[:12], user.id)
+    return user
+
+
+async def aauthenticate_request(request):
+    """
+    Async authenticate_request. A token-cache hit is resolved on the event loop; a miss
+    (signature check plus user lookup) runs in a worker thread.
+    """
+    header = _authenticator.get_header(request)
+    if header is None:
+        return None
+    raw_token = _authenticator.get_raw_token(header)
+    if raw_token is None:
+        return None
+    entry = token_cache.get(hash_token(raw_token))
+    if entry is not None:
+        user_id, claims, _ = entry
+        return _user_from_entry(user_id, claims)
+    return await sync_to_async(authenticate_request)(request)
+
+
 def jwt_required(view_func):
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
-        # Log the headers received for debugging
-        auth_meta = request.META.get("HTTP_AUTHORIZATION")
-        auth_header = request.headers.get("Authorization")
-        logger.debug("Before processing, HTTP_AUTHORIZATION in META: %s", auth_meta)
-        logger.debug("Before processing, Authorization in request.headers: %s", auth_header)
-
-        # If not in META, try to set it from request.headers
-        if not auth_meta and auth_header:
-            request.META["HTTP_AUTHORIZATION"] = auth_header
-            logger.debug("Set HTTP_AUTHORIZATION in META from request.headers: %s", auth_header)
-
-        # Instantiate the JWT authenticator
-        authenticator = JWTAuthentication()
         try:
-            auth_result = authenticator.authenticate(request)
-            if auth_result is None:
-                logger.debug("JWTAuthentication.authenticate returned None")
+            user = authenticate_request(request)
+            if user is None:
+                logger.debug("No bearer token supplied")
                 return JsonResponse({"error": "Authentication required."}, status=401)
-            # If authentication succeeds, set request.user and log it
-            request.user = auth_result[0]
-            logger.debug("JWT authentication succeeded, user: %s", request.user)
+            request.user = user
         except Exception as e:
-            logger.exception("JWT authentication exception: %s", str(e))
+            logger.warning("JWT authentication failed: %s", str(e))
             return JsonResponse({"error": "Authentication failed", "details": str(e)}, status=401)
         return view_func(request, *args, **kwargs)
     return _wrapped_view
+
+
+def staff_required(view_func):
+    """
+    jwt_required that also requires a staff user (403 otherwise). With JWT_STATELESS_USER
+    the token must carry an `is_staff` claim.
+    """
+    @wraps(view_func)
+    def _staff_view(request, *args, **kwargs):
+        if not getattr(request.user, "is_staff", False):
+            return JsonResponse({"error": "Staff only."}, status=403)
+        return view_func(request, *args, **kwargs)
+    return jwt_required(_staff_view)
+
+
+def async_jwt_required(view_func):
+    """
+    jwt_required for async views.
+    """
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        try:
+            user = await aauthenticate_request(request)
+            if user is None:
+                logger.debug("No bearer token supplied")
+                return JsonResponse({"error": "Authentication required."}, status=401)
+            request.user = user
+        except Exception as e:
+            logger.warning("JWT authentication failed: %s", str(e))
+            return JsonResponse({"error": "Authentication failed", "details": str(e)}, status=401)
+        return await view_func(request, *args, **kwargs)
+    return _wrapped_view
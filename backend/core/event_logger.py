@@ -14,3 +14,18 @@ def log_event(settlement, event_type, description):
         logger.info("Logged event: %s - %s", event_type, description)
     except Exception as e:
         logger.exception("Error logging event: %s", str(e))
+
+def log_events(settlement, event_type, descriptions):
+    """
+    Logs several events of the same type for one settlement with a single INSERT.
+    """
+    if not descriptions:
+        return
+    try:
+        EventLog.objects.bulk_create([
+            EventLog(settlement=settlement, event_type=event_type, description=description)
+            for description in descriptions
+        ])
+        logger.info("Logged %d events: %s", len(descriptions), event_type)
+    except Exception as e:
+        logger.exception("Error logging events: %s", str(e))
@@ -0,0 +1,123 @@
+# core/forecast.py
+# Offline forecasts: copies a settlement into the DB-free simulation core and runs it N ticks
+# ahead in memory, returning resource trajectories and predicted events. Recruitment is the
+# only random step, so each scenario is one RNG seed; several scenarios can run in parallel
+# in a process pool. The pool's workers are spawned fresh rather than forked: forking a
+# threaded WSGI worker copies locks other threads may be holding, which can hang the child.
+import copy
+import logging
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+
+from core.simulation import RESOURCES, TickContext, simulate_tick
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+FORECAST_MAX_TICKS = getattr(settings, 'FORECAST_MAX_TICKS', 5000)
+FORECAST_MAX_SCENARIOS = getattr(settings, 'FORECAST_MAX_SCENARIOS', 16)
+FORECAST_MAX_EVENTS = getattr(settings, 'FORECAST_MAX_EVENTS', 200)
+# Trajectory points per scenario; longer forecasts are sampled more sparsely.
+FORECAST_MAX_POINTS = getattr(settings, 'FORECAST_MAX_POINTS', 200)
+# Worker processes for multi-scenario forecasts; 0 runs every scenario in the calling process.
+FORECAST_PROCESSES = getattr(settings, 'FORECAST_PROCESSES', 2)
+
+_pool = None
+
+
+def sample_step(ticks, sample_every=1):
+    """
+    The tick step between trajectory points: at least `sample_every`, and large enough
+    that a forecast of `ticks` ticks has at most FORECAST_MAX_POINTS points after the first.
+    """
+    return max(1, sample_every, -(-ticks // max(1, FORECAST_MAX_POINTS)))
+
+
+def forecast(state, tick_count, season, ticks, seed=None, sample_every=1):
+    """
+    Simulates `ticks` ticks after (tick_count, season) on a copy of `state` (a
+    SettlementRec). Returns a dict with the sampled trajectory (see sample_step), predicted
+    events (capped at FORECAST_MAX_EVENTS) and a summary of notable ticks.
+    """
+    state = copy.deepcopy(state)
+    ctx = TickContext(tick_count, season, random.Random(seed))
+    sample_every = sample_step(ticks, sample_every)
+    trajectory = []
+    events = []
+    raw_events = []
+    summary = {
+        "first_hungry_tick": None,
+        "first_death_tick": None,
+        "deaths": 0,
+        "recruits": 0,
+        "depleted_nodes": 0,
+    }
+
+    def sample():
+        row = {"tick": ctx.tick_count, "season": ctx.season, "population": len(state.living())}
+        for resource in RESOURCES:
+            row[resource] = getattr(state, resource)
+        trajectory.append(row)
+
+    sample()
+    for step in range(1, ticks + 1):
+        ctx.advance()
+        simulate_tick(state, ctx, raw_events)
+        for _, event_type, description in raw_events:
+            if event_type == "villager_dead":
+                summary["deaths"] += 1
+                if summary["first_death_tick"] is None:
+                    summary["first_death_tick"] = ctx.tick_count
+            elif event_type == "villager_recruited":
+                summary["recruits"] += 1
+            elif event_type == "resource_depleted":
+                summary["depleted_nodes"] += 1
+            if len(events) < FORECAST_MAX_EVENTS:
+                events.append({"tick": ctx.tick_count, "event_type": event_type, "description": description})
+        raw_events.clear()
+        if summary["first_hungry_tick"] is None and any(s.mood == "hungry" for s in state.living()):
+            summary["first_hungry_tick"] = ctx.tick_count
+        if step % sample_every == 0 or step == ticks:
+            sample()
+    summary["final"] = trajectory[-1]
+    return {"seed": seed, "trajectory": trajectory, "events": events, "summary": summary}
+
+
+def _forecast_job(args):
+    return forecast(*args)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=FORECAST_PROCESSES, mp_context=multiprocessing.get_context("spawn"), initializer=django.setup
+        )
+    return _pool
+
+
+def forecast_scenarios(state, tick_count, season, ticks, seeds, sample_every=1):
+    """
+    Runs one forecast per seed. With more than one seed and FORECAST_PROCESSES > 0 the
+    scenarios are spread over a process pool shared by the whole worker process.
+    Returns (scenarios, elapsed_seconds).
+    """
+    global _pool
+    started = time.perf_counter()
+    jobs = [(state, tick_count, season, ticks, seed, sample_every) for seed in seeds]
+    if len(jobs) > 1 and FORECAST_PROCESSES > 0:
+        try:
+            scenarios = list(_get_pool().map(_forecast_job, jobs))
+        except Exception as e:
+            # A broken pool (e.g. a killed worker) is replaced on the next call.
+            logger.exception("Forecast pool failed, running in process: %s", str(e))
+            _pool = None
+            scenarios = [_forecast_job(job) for job in jobs]
+    else:
+        scenarios = [_forecast_job(job) for job in jobs]
+    return scenarios, time.perf_counter() - started
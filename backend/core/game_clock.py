@@ -0,0 +1,217 @@
+# core/game_clock.py
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from core.config import SEASONS, SEASON_MODIFIERS, TICK_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+GAME_CLOCK_BACKEND = getattr(settings, 'GAME_CLOCK_BACKEND', 'core.game_clock.FileClockStore')
+GAME_CLOCK_PATH = getattr(
+    settings, 'GAME_CLOCK_PATH',
+    os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'coa_game_clock.json'),
+)
+GAME_CLOCK_CACHE_KEY = getattr(settings, 'GAME_CLOCK_CACHE_KEY', 'coa:game_clock')
+# A published clock older than this is treated as missing and readers fall back to the DB.
+GAME_CLOCK_MAX_STALENESS = getattr(settings, 'GAME_CLOCK_MAX_STALENESS', TICK_INTERVAL_SECONDS * 3)
+# How long a worker reuses its in-process copy before re-reading the store.
+GAME_CLOCK_LOCAL_TTL = getattr(settings, 'GAME_CLOCK_LOCAL_TTL', 0.5)
+
+# Realm whose clock is served when a caller does not name one. Same value as
+# core.models.DEFAULT_REALM_ID; models are only imported lazily here.
+DEFAULT_REALM_ID = 1
+
+ClockSnapshot = namedtuple("ClockSnapshot", ["tick_count", "current_season", "modifiers", "published_at"])
+
+
+def season_modifiers(season):
+    modifiers = SEASON_MODIFIERS.get(season, {})
+    return {
+        "production": modifiers.get("production", 1.0),
+        "consumption": modifiers.get("consumption", 1.0),
+        "construction_speed_multiplier": modifiers.get("construction_speed_multiplier", 1.0),
+    }
+
+
+class FileClockStore:
+    """
+    Single-host store: the snapshot lives in a small JSON file (under /dev/shm when
+    available, so it never touches disk). Writes are atomic via rename. The default realm
+    uses GAME_CLOCK_PATH itself, other realms a file next to it. write_entry/read_entry
+    keep other small payloads the scheduler shares with the web workers next to the clocks.
+    """
+
+    def __init__(self, path=GAME_CLOCK_PATH):
+        self.path = path
+
+    def _entry_path(self, name):
+        root, ext = os.path.splitext(self.path)
+        return f"{root}_{name}{ext}"
+
+    def _realm_path(self, realm_id):
+        return self.path if realm_id == DEFAULT_REALM_ID else self._entry_path(realm_id)
+
+    def write(self, payload, realm_id=DEFAULT_REALM_ID):
+        self._write_json(self._realm_path(realm_id), payload)
+
+    def read(self, realm_id=DEFAULT_REALM_ID):
+        return self._read_json(self._realm_path(realm_id))
+
+    def write_entry(self, name, payload):
+        self._write_json(self._entry_path(name), payload)
+
+    def read_entry(self, name):
+        return self._read_json(self._entry_path(name))
+
+    def _write_json(self, path, payload):
+        directory = os.path.dirname(path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".coa_clock_")
+        try:
+            with os.fdopen(fd, "w") as fh:
+                json.dump(payload, fh)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _read_json(self, path):
+        try:
+            with open(path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+
+class CacheClockStore:
+    """
+    Multi-host store backed by Django's cache framework (e.g. a shared Redis or
+    Memcached configured in CACHES). Entries are stored under GAME_CLOCK_CACHE_KEY:<name>.
+    """
+
+    def __init__(self, key=GAME_CLOCK_CACHE_KEY):
+        from django.core.cache import cache
+        self.cache = cache
+        self.key = key
+
+    def _entry_key(self, name):
+        return f"{self.key}:{name}"
+
+    def _realm_key(self, realm_id):
+        return self.key if realm_id == DEFAULT_REALM_ID else self._entry_key(realm_id)
+
+    def write(self, payload, realm_id=DEFAULT_REALM_ID):
+        self.cache.set(self._realm_key(realm_id), payload, timeout=None)
+
+    def read(self, realm_id=DEFAULT_REALM_ID):
+        return self.cache.get(self._realm_key(realm_id))
+
+    def write_entry(self, name, payload):
+        self.cache.set(self._entry_key(name), payload, timeout=None)
+
+    def read_entry(self, name):
+        return self.cache.get(self._entry_key(name))
+
+
+_store = None
+# In-process copies per realm: {realm_id: (snapshot, loaded_at)}.
+_local = {}
+_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = import_string(GAME_CLOCK_BACKEND)()
+    return _store
+
+
+def publish(tick_count, current_season, realm_id=DEFAULT_REALM_ID):
+    """
+    Called by the scheduler after every tick of a realm. Never raises: a failed publish
+    only means readers fall back to the DB until the next one succeeds.
+    """
+    payload = {
+        "tick_count": tick_count,
+        "current_season": current_season,
+        "modifiers": season_modifiers(current_season),
+        "published_at": time.time(),
+    }
+    try:
+        get_store().write(payload, realm_id)
+    except Exception as e:
+        logger.exception("Error publishing game clock: %s", str(e))
+    return ClockSnapshot(**payload)
+
+
+def _load_from_db(realm_id):
+    from core.models import GameState
+    if realm_id == DEFAULT_REALM_ID:
+        gs, _ = GameState.objects.get_or_create(
+            pk=realm_id, defaults={'tick_count': 0, 'current_season': SEASONS[0]}
+        )
+    else:
+        gs = GameState.objects.get(pk=realm_id)
+    return ClockSnapshot(gs.tick_count, gs.current_season, season_modifiers(gs.current_season), time.time())
+
+
+def get_clock(realm_id=DEFAULT_REALM_ID):
+    """
+    Returns the current ClockSnapshot of a realm. Served from process memory or the shared
+    store; only hits the DB when the published clock is missing or older than
+    GAME_CLOCK_MAX_STALENESS. Raises GameState.DoesNotExist for an unknown realm.
+    """
+    now = time.time()
+    snapshot, loaded_at = _local.get(realm_id, (None, 0.0))
+    if snapshot is not None and now - loaded_at < GAME_CLOCK_LOCAL_TTL:
+        return snapshot
+    with _lock:
+        payload = None
+        try:
+            payload = get_store().read(realm_id)
+        except Exception as e:
+            logger.warning("Error reading game clock store: %s", str(e))
+        if payload and now - payload.get("published_at", 0) <= GAME_CLOCK_MAX_STALENESS:
+            snapshot = ClockSnapshot(
+                payload["tick_count"], payload["current_season"], payload["modifiers"], payload["published_at"]
+            )
+        else:
+            logger.debug("Game clock missing or stale, reading GameState from DB")
+            snapshot = _load_from_db(realm_id)
+        _local[realm_id] = (snapshot, now)
+        return snapshot
+
+
+async def aget_clock(realm_id=DEFAULT_REALM_ID):
+    """
+    Async get_clock for ASGI views: the in-process copy is returned without leaving the
+    event loop; a refresh (store read or DB fallback) runs in a worker thread.
+    """
+    snapshot, loaded_at = _local.get(realm_id, (None, 0.0))
+    if snapshot is not None and time.time() - loaded_at < GAME_CLOCK_LOCAL_TTL:
+        return snapshot
+    return await sync_to_async(get_clock)(realm_id)
+
+
+def realm_from_request(request):
+    """
+    The realm named by the `realm` query parameter, or the default realm. Returns None
+    if the parameter is not an integer.
+    """
+    value = request.GET.get("realm")
+    if value in (None, ""):
+        return DEFAULT_REALM_ID
+    try:
+        return int(value)
+    except ValueError:
+        return None
@@ -0,0 +1,80 @@
+# core/graveyard.py
+# Settlers that die (starvation, old age) are marked status="dead" by the tick phases and
+# then moved to the Grave table here, so the Settler table, which every phase and view
+# scans, stays the size of the living population. Each batch, in one transaction:
+#   - inserts a Grave per settler (name, birth and death ticks, cause, experience);
+#   - releases the resource nodes the settlers were gathering from with one UPDATE;
+#   - deletes the settler rows with one DELETE, which drops their workplace and housing
+#     references with them.
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from core.metrics import register_metric
+from core.models import Grave, ResourceNode, Settler
+from core.simulation import STARVATION_HUNGER
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+GRAVEYARD_BATCH_SIZE = getattr(settings, 'GRAVEYARD_BATCH_SIZE', 500)
+
+_SETTLER_COLUMNS = ("id", "settlement_id", "name", "hunger", "birth_tick", "death_tick", "experience")
+
+
+def cause_of_death(hunger):
+    # Starvation is the only death that leaves a settler at STARVATION_HUNGER or above.
+    return "starvation" if hunger >= STARVATION_HUNGER else "old_age"
+
+
+def _grave(row, tick_count):
+    cause = cause_of_death(row["hunger"])
+    died_tick = row["death_tick"] if cause == "old_age" and row["death_tick"] is not None else tick_count
+    return Grave(
+        settlement_id=row["settlement_id"],
+        settler_id=row["id"],
+        name=row["name"],
+        cause=cause,
+        birth_tick=row["birth_tick"],
+        died_tick=died_tick,
+        experience=row["experience"],
+    )
+
+
+def bury(tick_count, realm_id=None, batch_size=GRAVEYARD_BATCH_SIZE):
+    """
+    Archives every dead settler (of `realm_id`, if given) in id-ordered batches of
+    `batch_size`, one transaction per batch. `tick_count` is recorded as the death tick
+    of settlers who starved. Returns the ids of the settlers archived.
+    """
+    dead = Settler.objects.filter(status="dead")
+    if realm_id is not None:
+        dead = dead.filter(settlement__realm_id=realm_id)
+    settler_table = connection.ops.quote_name(Settler._meta.db_table)
+    buried = []
+    after = 0
+    while True:
+        with transaction.atomic():
+            rows = list(dead.filter(id__gt=after).order_by("id").values(*_SETTLER_COLUMNS)[:max(1, batch_size)])
+            if not rows:
+                break
+            ids = [row["id"] for row in rows]
+            Grave.objects.bulk_create([_grave(row, tick_count) for row in rows])
+            ResourceNode.objects.filter(gatherer_id__in=ids).update(gatherer=None)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {settler_table} WHERE id IN ({', '.join(['%s'] * len(ids))})", ids
+                )
+        buried.extend(ids)
+        after = ids[-1]
+    if buried:
+        logger.info(f"Archived {len(buried)} dead settlers")
+    return buried
+
+
+def graveyard_stats():
+    return {"unburied": Settler.objects.filter(status="dead").count()}
+
+
+register_metric("graveyard", graveyard_stats)
@@ -0,0 +1,207 @@
+# core/ledger.py
+# Resource ledger (RESOURCE_LEDGER_MODE). Production, consumption, gathering and spending
+# append signed ResourceDelta rows instead of rewriting the settlement's resource columns,
+# so tick phases and player actions stop queueing on the same Settlement row. fold()
+# periodically merges the deltas into the columns; until then every read computes
+#   balance = folded columns + pending deltas
+# by replaying the deltas in id order. A gain carries the cap it was earned under
+# (RESOURCE_CAP + warehouses * WAREHOUSE_BONUS for production, RESOURCE_CAP for gathering)
+# and is clamped when replayed, so balances match the direct min(balance + gain, cap) writes.
+#
+# Engines that write absolute balances (sql, memory, distributed, dormant catch-up) load
+# settlements with their pending deltas applied; persist_states then deletes the deltas it
+# wrote through, so nothing is counted twice.
+import logging
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from core.metrics import register_metric
+from core.models import ResourceDelta, Settlement
+from core.simulation import RESOURCES
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+RESOURCE_LEDGER_MODE = getattr(settings, 'RESOURCE_LEDGER_MODE', False)
+# The db and sql engines fold every this many ticks.
+RESOURCE_LEDGER_FOLD_TICKS = getattr(settings, 'RESOURCE_LEDGER_FOLD_TICKS', 12)
+# Settlements folded per transaction.
+RESOURCE_LEDGER_FOLD_BATCH = getattr(settings, 'RESOURCE_LEDGER_FOLD_BATCH', 200)
+
+
+def delta(settlement_id, resource, amount, reason, tick=None, cap=None):
+    return ResourceDelta(settlement_id=settlement_id, resource=resource, amount=amount,
+                         cap=cap, reason=reason, tick=tick)
+
+
+def record(deltas):
+    """
+    Appends deltas (ResourceDelta instances) in one INSERT, skipping zero amounts.
+    """
+    deltas = [d for d in deltas if d.amount]
+    if deltas:
+        ResourceDelta.objects.bulk_create(deltas)
+    return len(deltas)
+
+
+def replay(balance, deltas):
+    """
+    Applies (resource, amount, cap) deltas in order to a {resource: amount} dict.
+    """
+    for resource, amount, cap in deltas:
+        value = balance[resource] + amount
+        balance[resource] = value if cap is None or amount < 0 else min(value, cap)
+    return balance
+
+
+def pending_deltas(settlement_ids):
+    """
+    Unfolded deltas per settlement: {settlement_id: (highest delta id, [(resource, amount, cap)])}.
+    """
+    pending = {}
+    if not RESOURCE_LEDGER_MODE or not settlement_ids:
+        return pending
+    rows = ResourceDelta.objects.filter(settlement_id__in=settlement_ids).order_by("id").values_list(
+        "id", "settlement_id", "resource", "amount", "cap"
+    )
+    for delta_id, settlement_id, resource, amount, cap in rows:
+        _, deltas = pending.setdefault(settlement_id, (None, []))
+        deltas.append((resource, amount, cap))
+        pending[settlement_id] = (delta_id, deltas)
+    return pending
+
+
+async def apending_deltas(settlement_id):
+    if not RESOURCE_LEDGER_MODE:
+        return None, []
+    mark, deltas = None, []
+    async for delta_id, resource, amount, cap in ResourceDelta.objects.filter(
+        settlement_id=settlement_id
+    ).order_by("id").values_list("id", "resource", "amount", "cap"):
+        mark = delta_id
+        deltas.append((resource, amount, cap))
+    return mark, deltas
+
+
+def resolve_rows(rows):
+    """
+    Replaces the resource values of Settlement .values() rows (which need "id") with the
+    ledger balance. Missing resource keys are left out. Returns `rows`.
+    """
+    pending = pending_deltas([row["id"] for row in rows])
+    for row in rows:
+        if row["id"] not in pending:
+            continue
+        balance = replay({r: row.get(r, 0) for r in RESOURCES}, pending[row["id"]][1])
+        row.update({r: balance[r] for r in RESOURCES if r in row})
+    return rows
+
+
+def resolve(settlements):
+    """
+    Sets the resource attributes of Settlement instances to their ledger balance, for
+    reads. Do not save() these columns afterwards: the deltas are still pending.
+    """
+    pending = pending_deltas([s.id for s in settlements])
+    for settlement in settlements:
+        if settlement.id not in pending:
+            continue
+        balance = replay({r: getattr(settlement, r) for r in RESOURCES}, pending[settlement.id][1])
+        for resource in RESOURCES:
+            setattr(settlement, resource, balance[resource])
+    return settlements
+
+
+def balances(settlement_ids):
+    """
+    {settlement_id: {resource: balance}} for the given settlements.
+    """
+    folded = Settlement.objects.filter(id__in=settlement_ids).values("id", *RESOURCES)
+    return {row.pop("id"): row for row in resolve_rows(list(folded))}
+
+
+def spendable(settlement):
+    """
+    Called by player actions before checking costs. In ledger mode the instance gets its
+    ledger balance and, inside a transaction, the settlement row is locked (not written),
+    so concurrent spends of one settlement cannot both pass the check.
+    """
+    if RESOURCE_LEDGER_MODE:
+        if transaction.get_connection().in_atomic_block:
+            Settlement.objects.select_for_update().filter(id=settlement.id).exists()
+        resolve([settlement])
+    return settlement
+
+
+def charge(settlement, costs, reason):
+    """
+    Deducts `costs` ({resource: amount}) from a settlement checked with spendable(): a
+    negative delta per resource in ledger mode, otherwise the columns themselves.
+    """
+    costs = {resource: amount for resource, amount in costs.items() if amount}
+    if RESOURCE_LEDGER_MODE:
+        record([delta(settlement.id, resource, -amount, reason) for resource, amount in costs.items()])
+    elif costs:
+        for resource, amount in costs.items():
+            setattr(settlement, resource, getattr(settlement, resource) - amount)
+        settlement.save(update_fields=[*costs, "last_updated"])
+
+
+def forget(marks):
+    """
+    Deletes deltas that were written through into the columns: `marks` maps settlement id
+    to the highest delta id included. Returns the number of rows deleted.
+    """
+    marks = {sid: mark for sid, mark in marks.items() if mark is not None}
+    if not marks:
+        return 0
+    return ResourceDelta.objects.filter(
+        reduce(or_, (Q(settlement_id=sid, id__lte=mark) for sid, mark in marks.items()))
+    ).delete()[0]
+
+
+def settlements_with_pending(settlement_ids=None):
+    if not RESOURCE_LEDGER_MODE:
+        return set()
+    qs = ResourceDelta.objects.all()
+    if settlement_ids is not None:
+        qs = qs.filter(settlement_id__in=settlement_ids)
+    return set(qs.values_list("settlement_id", flat=True).distinct())
+
+
+def fold(realm_id=None, batch_size=RESOURCE_LEDGER_FOLD_BATCH):
+    """
+    Merges pending deltas into the settlement columns, `batch_size` settlements per
+    transaction. Rows are locked in id order, so folds never deadlock with each other or
+    with player spends. Returns the number of deltas folded.
+    """
+    qs = ResourceDelta.objects.all()
+    if realm_id is not None:
+        qs = qs.filter(settlement__realm_id=realm_id)
+    settlement_ids = sorted(set(qs.values_list("settlement_id", flat=True).distinct()))
+    folded = 0
+    for i in range(0, len(settlement_ids), max(1, batch_size)):
+        chunk = settlement_ids[i:i + batch_size]
+        with transaction.atomic():
+            settlements = list(Settlement.objects.select_for_update().filter(id__in=chunk).order_by("id"))
+            pending = pending_deltas(chunk)
+            for settlement in settlements:
+                balance = replay({r: getattr(settlement, r) for r in RESOURCES}, pending.get(settlement.id, (None, []))[1])
+                for resource in RESOURCES:
+                    setattr(settlement, resource, balance[resource])
+            Settlement.objects.bulk_update(settlements, list(RESOURCES))
+            folded += forget({sid: mark for sid, (mark, _) in pending.items()})
+    if folded:
+        logger.info(f"Folded {folded} resource deltas into {len(settlement_ids)} settlements")
+    return folded
+
+
+def ledger_stats():
+    return {"enabled": RESOURCE_LEDGER_MODE, "pending": ResourceDelta.objects.count()}
+
+
+register_metric("resource_ledger", ledger_stats)
@@ -0,0 +1,119 @@
+#core/management/commands/pollbench.py
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+
+ENDPOINTS = {
+    "game_state": "/api/game-state/",
+    "detail": "/api/settlement/view/{id}/",
+    "map": "/api/settlement/{id}/map/",
+    "events": "/api/settlement/{id}/events/",
+    "settlers": "/api/settlers/",
+}
+
+
+class Command(BaseCommand):
+    help = ('Load-tests the polling endpoints with many concurrent keep-alive clients. Run it once '
+            'against the WSGI server and once against uvicorn with ASYNC_POLLING_VIEWS on to compare.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server base URL.')
+        parser.add_argument('--token', default='', help='JWT access token for the settlement owner.')
+        parser.add_argument('--settlement', type=int, default=1, help='Settlement id to poll.')
+        parser.add_argument('--clients', type=int, default=200, help='Concurrent polling clients.')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run.')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Pause between one client\'s polling rounds (the frontend polls once per tick).')
+        parser.add_argument('--endpoints', default='game_state,detail,map,events',
+                            help=f"Comma-separated subset of: {', '.join(ENDPOINTS)}.")
+
+    def handle(self, *args, **options):
+        parts = urlsplit(options['url'])
+        if parts.scheme != 'http':
+            raise CommandError("Only plain http:// URLs are supported.")
+        names = [name.strip() for name in options['endpoints'].split(',') if name.strip()]
+        unknown = set(names) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+        paths = [ENDPOINTS[name].format(id=options['settlement']) for name in names]
+        stats = asyncio.run(self._run(parts.hostname, parts.port or 80, paths, options))
+
+        self.stdout.write(f"{options['clients']} clients, {options['duration']}s, {options['url']}")
+        for path in paths:
+            latencies, errors = stats[path]
+            if not latencies:
+                self.stdout.write(f"  {path}: no successful requests ({errors} errors)")
+                continue
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.stdout.write(
+                f"  {path}: {len(latencies) / options['duration']:.1f} req/s, "
+                f"p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, "
+                f"max {latencies[-1] * 1000:.1f} ms, {errors} errors"
+            )
+
+    async def _run(self, host, port, paths, options):
+        stats = {path: ([], 0) for path in paths}
+        deadline = time.monotonic() + options['duration']
+        headers = f"Host: {host}\r\nConnection: keep-alive\r\n"
+        if options['token']:
+            headers += f"Authorization: Bearer {options['token']}\r\n"
+
+        async def client():
+            reader = writer = None
+            while time.monotonic() < deadline:
+                for path in paths:
+                    started = time.monotonic()
+                    try:
+                        if writer is None:
+                            reader, writer = await asyncio.open_connection(host, port)
+                        writer.write(f"GET {path} HTTP/1.1\r\n{headers}\r\n".encode())
+                        await writer.drain()
+                        status = await self._read_response(reader)
+                        ok = status == 200
+                    except (OSError, asyncio.IncompleteReadError, ValueError):
+                        ok = False
+                        if writer is not None:
+                            writer.close()
+                        reader = writer = None
+                    latencies, errors = stats[path]
+                    if ok:
+                        latencies.append(time.monotonic() - started)
+                    else:
+                        stats[path] = (latencies, errors + 1)
+                await asyncio.sleep(options['interval'])
+            if writer is not None:
+                writer.close()
+
+        await asyncio.gather(*(client() for _ in range(options['clients'])))
+        return stats
+
+    @staticmethod
+    async def _read_response(reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        status = int(status_line.split()[1])
+        length = None
+        chunked = False
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                length = int(value.strip())
+            elif name == "transfer-encoding" and "chunked" in value.lower():
+                chunked = True
+        if chunked:
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif length:
+            await reader.readexactly(length)
+        return status
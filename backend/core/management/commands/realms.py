@@ -0,0 +1,44 @@
+#core/management/commands/realms.py
+from django.core.management.base import BaseCommand, CommandError
+
+from core.config import SEASONS, TICK_INTERVAL_SECONDS
+from core.models import GameState, Settlement
+
+class Command(BaseCommand):
+    help = ('Lists, creates or reconfigures realms. Each realm has its own clock and tick loop; '
+            'run `runapscheduler --realm <id>` per process to spread realms across hosts.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--create', metavar='NAME', help='Create a realm with this name.')
+        parser.add_argument('--interval', type=float, help='Seconds between ticks (create or --realm).')
+        parser.add_argument('--season-offset', type=int, default=0,
+                            help=f"Create: start this many seasons after {SEASONS[0]}, so realms "
+                                 f"run through the year out of step.")
+        parser.add_argument('--realm', type=int, help='Realm id to reconfigure.')
+
+    def handle(self, *args, **options):
+        if options['interval'] is not None and options['interval'] <= 0:
+            raise CommandError("--interval must be positive.")
+        if options['create']:
+            realm = GameState.objects.create(
+                name=options['create'],
+                tick_count=0,
+                current_season=SEASONS[options['season_offset'] % len(SEASONS)],
+                tick_interval=options['interval'] or TICK_INTERVAL_SECONDS,
+            )
+            self.stdout.write(f"Created realm {realm.id} ({realm.name}), starting in {realm.current_season}")
+        elif options['realm'] is not None:
+            if options['interval'] is None:
+                raise CommandError("Nothing to change; pass --interval.")
+            updated = GameState.objects.filter(pk=options['realm']).update(tick_interval=options['interval'])
+            if not updated:
+                raise CommandError(f"Unknown realm: {options['realm']}")
+            self.stdout.write(f"Realm {options['realm']} now ticks every {options['interval']}s "
+                              f"(takes effect when its scheduler restarts)")
+        for realm in GameState.objects.order_by('id'):
+            settlements = Settlement.objects.active().filter(realm_id=realm.id)
+            self.stdout.write(
+                f"  {realm.id:>4}  {realm.name:<20} tick {realm.tick_count:<8} {realm.current_season:<8} "
+                f"every {realm.tick_interval}s  {settlements.count()} settlements "
+                f"({settlements.filter(simulated_tick__isnull=True).count()} ticking)"
+            )
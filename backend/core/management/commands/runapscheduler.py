@@ -1,51 +1,359 @@
 #core/management/commands/runapscheduler.py
 import logging
-from django.core.management.base import BaseCommand
+import signal
+from django.core.management.base import BaseCommand, CommandError
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.schedulers.blocking import BlockingScheduler
 from django.db import transaction
 from django.utils import timezone
 
-from core.models import Building, Settlement, Settler, GameState, ResourceNode
+from core.models import (
+    DEFAULT_REALM_ID,
+    Building,
+    Settlement,
+    Settler,
+    GameState,
+    ResourceNode,
+    TickBatch,
+)
 from core.config import SEASONS, SEASON_CHANGE_TICKS, SEASON_MODIFIERS, PRODUCTION_TICK
-from core.population import apply_happiness_effects, process_villager_recruitment
+from core.population import (
+    apply_happiness_effects,
+    process_villager_recruitment,
+    mark_housing_dirty,
+    process_dirty_housing,
+)
 from core.event_logger import log_event
+from core import game_clock
+from core.scheduling import rebuild_schedule, schedule_new_settlers, season_at
+from core.tiering import update_tiers, sweep_dormant, DORMANT_SWEEP_TICKS
+from core.actions import drain_action_queue, COMMAND_QUEUE_MODE
+from core.purge import purge_deleted_settlements, PURGE_INTERVAL_SECONDS
+from core.db import ensure_healthy_connection, release_connections
+from core.world import World
+from core.world_snapshot import realm_snapshot_path
+from core.tick_queue import enqueue_tick, park_failed, prune_batches, requeue_expired, tick_progress
+from core import sql_tick
+from core import ledger
+from core.ledger import RESOURCE_LEDGER_MODE, RESOURCE_LEDGER_FOLD_TICKS
+from core.tick_chunks import finish_tick, run_phase, start_tick, unfinished_tick
+from core.graveyard import bury
+from core import memory_watch
+from core.memory_watch import SCHEDULER_MEMORY_SAMPLE_SECONDS
 
 logger = logging.getLogger(__name__)
 
 class Command(BaseCommand):
-    help = 'Runs the tick simulation scheduler and updates the GameState model.'
+    help = 'Runs the tick simulation scheduler for one or more realms and updates their GameState rows.'
 
-    def handle(self, *args, **options):
-        gs, created = GameState.objects.get_or_create(
-            pk=1, defaults={'tick_count': 0, 'current_season': SEASONS[0]}
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--engine", choices=["db", "sql", "memory", "distributed"], default="db",
+            help="db: every phase reads and writes the DB each tick. "
+                 "sql: like db, but construction, production, feeding and aging run as set-based "
+                 "statements inside PostgreSQL (core.sql_tick). "
+                 "memory: tick an in-memory world and checkpoint it every WORLD_CHECKPOINT_TICKS ticks. "
+                 "distributed: coordinate `runtickworker` processes through the TickBatch queue.",
+        )
+        parser.add_argument(
+            "--no-snapshot", action="store_true",
+            help="Memory engine: ignore the world snapshot and load from the DB (also disables writing it).",
+        )
+        parser.add_argument(
+            "--realm", action="append", default=[],
+            help="Realm id or name to tick (repeatable). Defaults to every realm; the memory and "
+                 "distributed engines take exactly one.",
+        )
+        parser.add_argument(
+            "--threads", type=int, default=0,
+            help="Scheduler threads, i.e. how many realms may tick at once "
+                 "(default: one per realm, plus purge and memory sampling).",
         )
-        self.stdout.write("Starting tick simulation...")
-        scheduler = BlockingScheduler()
-        scheduler.add_job(lambda: self.tick(gs), 'interval', seconds=5)
+        parser.add_argument(
+            "--no-purge", action="store_true",
+            help="Skip the purge job, e.g. on all but one scheduler when realms are split across processes.",
+        )
+
+    def handle(self, *args, **options):
+        realms = self._select_realms(options["realm"])
+        if options["engine"] in ("memory", "distributed") and len(realms) != 1:
+            raise CommandError(f"The {options['engine']} engine runs one realm per process; pass a single --realm.")
+        if options["engine"] == "sql" and not sql_tick.supported():
+            raise CommandError("The sql engine needs PostgreSQL.")
+        if options["engine"] in ("memory", "distributed") and not COMMAND_QUEUE_MODE:
+            # Both engines write back whole settlements they loaded earlier (at the next
+            # checkpoint, or when a worker finishes its batch), overwriting direct player writes.
+            raise CommandError(f"The {options['engine']} engine needs COMMAND_QUEUE_MODE = True.")
+        self.engine = options["engine"]
+        threads = options["threads"] or len(realms) + 2
+        executor = ThreadPoolExecutor(threads)
+        scheduler = BlockingScheduler(executors={"default": executor})
+        self.scheduler = scheduler
+        self.realm_ids = [gs.id for gs in realms]
+        self.restart_requested = False
+        self.world = None
+        self.enqueued_ticks = {}
+        memory_watch.start_tracing()
+        for gs in realms:
+            game_clock.publish(gs.tick_count, gs.current_season, gs.id)
+            job_id = f"realm-{gs.id}"
+            if options["engine"] == "memory":
+                snapshot_path = None if options["no_snapshot"] else realm_snapshot_path(gs.id)
+                self.world = World(gs, snapshot_path=snapshot_path)
+                # A snapshot matching GameState was written right after a checkpoint, so the
+                # schedule it carries is already current.
+                if not self.world.load_snapshot():
+                    rebuild_schedule(gs.tick_count, gs.current_season, gs.id)
+                    self.world.load()
+                # `kill -USR1 <pid>` forces a checkpoint at the end of the next tick.
+                signal.signal(signal.SIGUSR1, lambda signum, frame: self.world.request_checkpoint())
+                signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.shutdown(wait=False))
+                scheduler.add_job(self.tick_memory, 'interval', seconds=gs.tick_interval, id=job_id)
+            elif options["engine"] == "distributed":
+                rebuild_schedule(gs.tick_count, gs.current_season, gs.id)
+                # Resume waiting on a tick that was enqueued before a restart.
+                next_tick = gs.tick_count + 1
+                if TickBatch.objects.filter(realm_id=gs.id, tick=next_tick).exists():
+                    self.enqueued_ticks[gs.id] = next_tick
+                scheduler.add_job(self.tick_distributed, 'interval', args=[gs], seconds=gs.tick_interval, id=job_id)
+            else:
+                rebuild_schedule(gs.tick_count, gs.current_season, gs.id)
+                for settlement_id in Settlement.objects.ticking().filter(realm_id=gs.id).values_list("id", flat=True):
+                    mark_housing_dirty(settlement_id)
+                self._resume_tick(gs)
+                scheduler.add_job(self.tick, 'interval', args=[gs], seconds=gs.tick_interval, id=job_id)
+            self.stdout.write(f"Realm {gs.id} ({gs.name}): tick {gs.tick_count}, every {gs.tick_interval}s")
+        if not options["no_purge"]:
+            scheduler.add_job(self.purge, 'interval', seconds=PURGE_INTERVAL_SECONDS)
+        scheduler.add_job(self.watch_memory, 'interval', seconds=SCHEDULER_MEMORY_SAMPLE_SECONDS)
+        self.stdout.write(f"Starting tick simulation ({options['engine']} engine)...")
         try:
             scheduler.start()
         except KeyboardInterrupt:
             self.stdout.write("Tick simulation stopped.")
+        # Let ticks still running in the pool finish before writing back and exiting.
+        executor.shutdown(wait=True)
+        if self.world is not None:
+            ensure_healthy_connection()
+            self.world.checkpoint()
+            self.world.write_snapshot()
+        if self.restart_requested:
+            memory_watch.restart()
+
+    def _select_realms(self, selectors):
+        """
+        Realms named by --realm (ids or names), or every realm. The default realm is
+        created on first start.
+        """
+        GameState.objects.get_or_create(
+            pk=DEFAULT_REALM_ID, defaults={'tick_count': 0, 'current_season': SEASONS[0]}
+        )
+        if not selectors:
+            return list(GameState.objects.order_by("id"))
+        realms = []
+        for selector in selectors:
+            lookup = {"pk": int(selector)} if selector.isdigit() else {"name": selector}
+            try:
+                realms.append(GameState.objects.get(**lookup))
+            except GameState.DoesNotExist:
+                raise CommandError(f"Unknown realm: {selector}")
+        return realms
+
+    def purge(self):
+        ensure_healthy_connection()
+        try:
+            purged = purge_deleted_settlements()
+            if purged:
+                logger.info(f"Purged {purged} deleted settlements")
+        finally:
+            release_connections()
+
+    def watch_memory(self):
+        data = memory_watch.sample()
+        logger.info(f"Scheduler RSS {data['rss_mb']} MiB")
+        for site in data.get("top", []):
+            logger.debug(f"  {site['size_kb']} KiB in {site['count']} blocks at {site['site']}")
+        memory_watch.publish(data, self.realm_ids)
+        if memory_watch.over_ceiling(data) and not self.restart_requested:
+            logger.warning(f"Scheduler RSS {data['rss_mb']} MiB is over the memory ceiling; restarting")
+            self.restart_requested = True
+            self.scheduler.shutdown(wait=False)
 
     def tick(self, gs):
-        # Update game state tick and season.
+        # Reconnect transparently if the DB restarted since the last tick.
+        ensure_healthy_connection()
+        try:
+            self._run_tick(gs)
+        finally:
+            release_connections()
+
+    def tick_memory(self):
+        ensure_healthy_connection()
+        try:
+            self._run_memory_tick()
+        finally:
+            release_connections()
+
+    def tick_distributed(self, gs):
+        ensure_healthy_connection()
+        try:
+            self._run_distributed_tick(gs)
+        finally:
+            release_connections()
+
+    def _run_distributed_tick(self, gs):
+        # Finish the tick the workers were given last time, then hand out the next one, so
+        # workers get a whole interval per tick.
+        enqueued_tick = self.enqueued_ticks.get(gs.id)
+        if enqueued_tick is not None:
+            requeue_expired()
+            progress = tick_progress(enqueued_tick, gs.id)
+            if progress["pending"] or progress["running"]:
+                logger.warning(
+                    f"Tick {enqueued_tick} still running: {progress['pending']} pending, "
+                    f"{progress['running']} running, {progress['done']} done"
+                )
+                return
+            with transaction.atomic():
+                # Settlements of failed batches go dormant and are caught up by tiering.
+                parked = park_failed(enqueued_tick, gs.id)
+                self._update_game_state(gs)
+            if progress["failed"]:
+                logger.error(
+                    f"Tick {enqueued_tick}: {progress['failed']} batches failed; "
+                    f"{parked} settlements left for a dormant catch-up"
+                )
+            game_clock.publish(gs.tick_count, gs.current_season, gs.id)
+            self.stdout.write(f"Tick {gs.tick_count} - Season: {gs.current_season} - {timezone.now()}")
+            logger.info(f"Tick {gs.tick_count} - Season: {gs.current_season} ({progress['done']} batches)")
+            prune_batches(gs.tick_count, gs.id)
+            bury(gs.tick_count, gs.id)
+            del self.enqueued_ticks[gs.id]
+
+        # Between ticks every ticking settlement is at gs.tick_count: retier and apply
+        # queued player actions before the next tick is handed out.
+        self._update_tiers(gs.tick_count, gs.current_season, gs.id)
+        with transaction.atomic():
+            applied = drain_action_queue(game_clock.get_clock(gs.id), gs.id)
+        if applied:
+            logger.info(f"Applied {applied} queued player actions")
+        next_tick = gs.tick_count + 1
+        with transaction.atomic():
+            batches = enqueue_tick(next_tick, season_at(next_tick, gs.tick_count, gs.current_season), gs.id)
+        self.enqueued_ticks[gs.id] = next_tick
+        logger.debug(f"Enqueued {batches} batches for tick {next_tick}")
+
+    def _run_memory_tick(self):
+        world = self.world
+        season = world.ctx.season
+        world.ctx.advance()
+        if world.ctx.season != season:
+            logger.info(f"Season changed to {world.ctx.season}")
+        clock = game_clock.publish(world.ctx.tick_count, world.ctx.season, world.gs.id)
+        logger.info(f"Tick {world.ctx.tick_count} - Season: {world.ctx.season} (memory engine)")
+
+        # Player actions are applied by the ORM handlers: only the settlements they touch
+        # are written out first and reloaded afterwards; the rest stay write-behind.
+        touched = world.pending_action_settlements()
+        if touched:
+            world.flush(touched)
+            with transaction.atomic():
+                applied = drain_action_queue(clock, world.gs.id)
+            world.reload(touched)
+            logger.info(f"Applied {applied} queued player actions")
+
+        world.advance()
+        if world.ctx.tick_count % DORMANT_SWEEP_TICKS == 0:
+            sweep_dormant(world.ctx.tick_count, world.ctx.season, realm_id=world.gs.id)
+
+    def _run_tick(self, gs):
+        # Update game state tick and season; the tick cursor starts in the same transaction.
         with transaction.atomic():
             self._update_game_state(gs)
+            start_tick(gs.id, gs.tick_count)
+        clock = game_clock.publish(gs.tick_count, gs.current_season, gs.id)
         self.stdout.write(f"Tick {gs.tick_count} - Season: {gs.current_season} - {timezone.now()}")
         logger.info(f"Tick {gs.tick_count} - Season: {gs.current_season}")
 
-        # Process building construction.
-        self._process_construction(gs)
+        # Every ticking settlement is at the previous tick here: retier, and now and then
+        # catch up the stalest dormant settlements.
+        self._update_tiers(gs.tick_count - 1, season_at(gs.tick_count - 1, gs.tick_count, gs.current_season), gs.id)
 
-        # Process housing assignment.
-        self._process_housing_assignment(gs)
+        # Apply player actions queued since the last tick (COMMAND_QUEUE_MODE).
+        with transaction.atomic():
+            applied = drain_action_queue(clock, gs.id)
+        if applied:
+            logger.info(f"Applied {applied} queued player actions")
+
+        # Ledger mode: merge appended resource deltas into the settlement rows now and then.
+        # The sql engine reads the columns directly, so it folds every tick.
+        if RESOURCE_LEDGER_MODE and (self.engine == "sql" or gs.tick_count % RESOURCE_LEDGER_FOLD_TICKS == 0):
+            ledger.fold(gs.id)
+
+        self._run_phases(gs)
+
+        # Settlers who died this tick (or in a dormant catch-up) move to the graveyard.
+        bury(gs.tick_count, gs.id)
+
+    def _resume_tick(self, gs):
+        # A tick interrupted by a crash or restart is finished before new ticks start.
+        cursor = unfinished_tick(gs.id)
+        if cursor is None or cursor.tick != gs.tick_count:
+            return
+        self.stdout.write(f"Resuming tick {cursor.tick} at {cursor.phase} (after settlement {cursor.after_settlement_id})")
+        logger.info(f"Resuming tick {cursor.tick} at phase {cursor.phase}, after settlement {cursor.after_settlement_id}")
+        self._run_phases(gs)
+
+    def _run_phases(self, gs):
+        # Every phase commits in chunks of settlements (core.tick_chunks); phases and chunks
+        # finished before a restart are skipped.
+        phases = self._sql_phases(gs) if self.engine == "sql" else self._db_phases(gs)
+        production_tick = gs.tick_count % PRODUCTION_TICK == 0
+        for phase, fn in phases:
+            if phase in ("construction", "housing") or production_tick:
+                run_phase(gs.id, gs.tick_count, phase, fn)
+        finish_tick(gs.id, gs.tick_count)
+
+    def _db_phases(self, gs):
+        return [
+            ("construction", lambda ids: self._process_construction(gs, ids)),
+            ("housing", lambda ids: self._process_housing_assignment(gs, ids)),
+            ("production", lambda ids: self.process_production(gs, ids)),
+            ("feeding", lambda ids: self.process_settler_feeding(gs, ids)),
+            ("lifecycle", lambda ids: self.process_villager_lifecycle(gs, ids)),
+            ("gathering", lambda ids: self.process_resource_gathering(gs, ids)),
+        ]
 
-        # On production tick, process additional simulation steps.
-        if gs.tick_count % PRODUCTION_TICK == 0:
-            self.process_production(gs)
-            self.process_settler_feeding(gs)
-            self.process_villager_lifecycle(gs)
-            self.process_resource_gathering(gs)
+    def _sql_phases(self, gs):
+        def construction(ids):
+            for settlement_id in sql_tick.complete_construction(gs.tick_count, gs.id, ids):
+                mark_housing_dirty(settlement_id)
+
+        def feeding(ids):
+            for settlement_id in sql_tick.feed(gs.current_season, gs.id, ids):
+                mark_housing_dirty(settlement_id)
+
+        def lifecycle(ids):
+            for settlement_id in sql_tick.age(gs.tick_count, gs.id, ids):
+                mark_housing_dirty(settlement_id)
+            self._process_happiness(gs, ids)
+
+        return [
+            ("construction", construction),
+            ("housing", lambda ids: self._process_housing_assignment(gs, ids)),
+            ("production", lambda ids: sql_tick.produce(gs.current_season, gs.id, ids)),
+            ("feeding", feeding),
+            ("lifecycle", lifecycle),
+            ("gathering", lambda ids: self.process_resource_gathering(gs, ids)),
+        ]
+
+    def _update_tiers(self, tick_count, season, realm_id):
+        with transaction.atomic():
+            update_tiers(tick_count, season, realm_id)
+        if tick_count % DORMANT_SWEEP_TICKS == 0:
+            swept = sweep_dormant(tick_count, season, realm_id=realm_id)
+            if swept:
+                logger.info(f"Caught up {swept} dormant settlements")
 
     def _update_game_state(self, gs):
         gs.tick_count += 1
@@ -60,143 +368,177 @@ class Command(BaseCommand):
             logger.info(f"Season changed to {gs.current_season}")
         gs.save()
 
-    def _process_construction(self, gs):
-        with transaction.atomic():
-            buildings = Building.objects.filter(is_constructed=False)
-            for building in buildings:
-                multiplier = SEASON_MODIFIERS.get(gs.current_season, {}).get('construction_speed_multiplier', 1.0)
-                increment = int(10 * multiplier)
-                building.construction_progress += increment
-                if building.construction_progress >= 100:
-                    building.construction_progress = 100
-                    building.is_constructed = True
-                    self.stdout.write(f"{building} construction completed.")
-                    logger.info(f"{building} construction completed.")
-                    log_event(building.settlement, "building_finished",
-                              f"{building.get_building_type_display()} finished construction.")
-                    if building.building_type == "house":
-                        from core.population import reassign_homeless_settlers
-                        reassign_homeless_settlers(building.settlement)
-                building.save()
-
-    def _process_housing_assignment(self, gs):
-        with transaction.atomic():
-            from core.population import reassign_homeless_settlers
-            settlements = Settlement.objects.all()
-            for settlement in settlements:
-                reassign_homeless_settlers(settlement)
+    def _process_construction(self, gs, settlement_ids):
+        # Only buildings whose projected completion tick has arrived are loaded.
+        buildings = Building.objects.select_related("settlement").filter(
+            settlement_id__in=settlement_ids, is_constructed=False, completion_tick__lte=gs.tick_count
+        ).order_by("settlement_id", "id")
+        for building in buildings:
+            building.construction_progress = 100
+            building.is_constructed = True
+            building.save(update_fields=["construction_progress", "is_constructed"])
+            self.stdout.write(f"{building} construction completed.")
+            logger.info(f"{building} construction completed.")
+            log_event(building.settlement, "building_finished",
+                      f"{building.get_building_type_display()} finished construction.")
+            if building.building_type == "house":
+                mark_housing_dirty(building.settlement_id)
 
-    def process_production(self, gs):
+    def _process_housing_assignment(self, gs, settlement_ids):
+        # Only settlements marked dirty by a house completion, death or recruitment.
+        visited = process_dirty_housing(gs.id, settlement_ids)
+        if visited:
+            logger.debug(f"Housing allocator visited {visited} settlements")
+
+    def process_production(self, gs, settlement_ids):
         from core.config import PRODUCTION_RATES, RESOURCE_CAP, WAREHOUSE_BONUS
-        with transaction.atomic():
-            buildings = Building.objects.filter(is_constructed=True)
-            current_season = gs.current_season
-            prod_modifier = SEASON_MODIFIERS.get(current_season, {}).get('production', 1.0)
-            for building in buildings:
-                if building.building_type not in PRODUCTION_RATES:
-                    continue
-                worker_count = building.assigned_settlers.count()
-                if worker_count == 0:
-                    logger.debug(f"{building}: Skipped production (no workers assigned)")
-                    continue
-                if building.building_type == "lumber_mill":
-                    rate = PRODUCTION_RATES["lumber_mill"].get("wood", 0)
-                elif building.building_type == "quarry":
-                    rate = PRODUCTION_RATES["quarry"].get("stone", 0)
-                elif building.building_type == "farmhouse":
-                    rate = PRODUCTION_RATES["farmhouse"].get("food", 0)
-                else:
-                    continue
-                production = int((rate * prod_modifier * worker_count) / PRODUCTION_TICK)
-                settlement = building.settlement
-                warehouse_count = settlement.buildings.filter(is_constructed=True, building_type="warehouse").count()
-                effective_cap = RESOURCE_CAP + (warehouse_count * WAREHOUSE_BONUS)
-                if building.building_type == "lumber_mill":
-                    settlement.wood = min(settlement.wood + production, effective_cap)
-                elif building.building_type == "quarry":
-                    settlement.stone = min(settlement.stone + production, effective_cap)
-                elif building.building_type == "farmhouse":
-                    settlement.food = min(settlement.food + production, effective_cap)
+        deltas = []
+        buildings = Building.objects.filter(settlement_id__in=settlement_ids, is_constructed=True).order_by("settlement_id", "id")
+        current_season = gs.current_season
+        prod_modifier = SEASON_MODIFIERS.get(current_season, {}).get('production', 1.0)
+        for building in buildings:
+            if building.building_type not in PRODUCTION_RATES:
+                continue
+            worker_count = building.assigned_settlers.exclude(status="dead").count()
+            if worker_count == 0:
+                logger.debug(f"{building}: Skipped production (no workers assigned)")
+                continue
+            if building.building_type == "lumber_mill":
+                rate = PRODUCTION_RATES["lumber_mill"].get("wood", 0)
+            elif building.building_type == "quarry":
+                rate = PRODUCTION_RATES["quarry"].get("stone", 0)
+            elif building.building_type == "farmhouse":
+                rate = PRODUCTION_RATES["farmhouse"].get("food", 0)
+            else:
+                continue
+            production = int((rate * prod_modifier * worker_count) / PRODUCTION_TICK)
+            settlement = building.settlement
+            warehouse_count = settlement.buildings.filter(is_constructed=True, building_type="warehouse").count()
+            effective_cap = RESOURCE_CAP + (warehouse_count * WAREHOUSE_BONUS)
+            if RESOURCE_LEDGER_MODE:
+                resource = next(iter(PRODUCTION_RATES[building.building_type]))
+                deltas.append(ledger.delta(settlement.id, resource, production, "production",
+                                           gs.tick_count, cap=effective_cap))
+            elif building.building_type == "lumber_mill":
+                settlement.wood = min(settlement.wood + production, effective_cap)
+            elif building.building_type == "quarry":
+                settlement.stone = min(settlement.stone + production, effective_cap)
+            elif building.building_type == "farmhouse":
+                settlement.food = min(settlement.food + production, effective_cap)
+            if not RESOURCE_LEDGER_MODE:
                 settlement.save()
-                logger.debug(
-                    f"{building}: Produced {production} (workers: {worker_count}, modifier: {prod_modifier}, rate: {rate}), Effective Cap: {effective_cap}"
-                )
+            logger.debug(
+                f"{building}: Produced {production} (workers: {worker_count}, modifier: {prod_modifier}, rate: {rate}), Effective Cap: {effective_cap}"
+            )
+        ledger.record(deltas)
 
-    def process_settler_feeding(self, gs):
+    def process_settler_feeding(self, gs, settlement_ids):
         from core.config import VILLAGER_CONSUMPTION_RATE, FEEDING_TICK
         from django.db.models import F
-        with transaction.atomic():
-            current_season = gs.current_season
-            cons_modifier = SEASON_MODIFIERS.get(current_season, {}).get('consumption', 1.0)
-            total_food_consumption = 0
-            settlers = Settler.objects.exclude(status="dead")
-            for settler in settlers:
-                consumption = int(VILLAGER_CONSUMPTION_RATE * cons_modifier / FEEDING_TICK)
-                settlement = settler.settlement
-                if settlement.food >= consumption:
+        current_season = gs.current_season
+        cons_modifier = SEASON_MODIFIERS.get(current_season, {}).get('consumption', 1.0)
+        total_food_consumption = 0
+        settlers = Settler.objects.filter(settlement_id__in=settlement_ids).exclude(status="dead").order_by("settlement_id", "id")
+        # Ledger mode: food is tracked in memory from one balance read and eaten food is
+        # appended as one delta per settlement.
+        food_left = None
+        if RESOURCE_LEDGER_MODE:
+            food_left = {
+                settlement_id: balance["food"]
+                for settlement_id, balance in ledger.balances(settlement_ids).items()
+            }
+            eaten = {}
+        for settler in settlers:
+            consumption = int(VILLAGER_CONSUMPTION_RATE * cons_modifier / FEEDING_TICK)
+            settlement = settler.settlement
+            food = settlement.food if food_left is None else food_left[settler.settlement_id]
+            if food >= consumption:
+                if food_left is None:
                     settlement.food = F('food') - consumption
-                    settler.hunger = 0
-                    settler.mood = "content"
                 else:
-                    settler.hunger += consumption
-                    settler.mood = "hungry"
-                    if settler.hunger >= 50:
-                        settler.status = "dead"
-                        settler.mood = "sick"
-                        log_event(settlement, "villager_dead",
-                                  f"Villager {settler.name} died of starvation (hunger {settler.hunger}).")
+                    food_left[settler.settlement_id] -= consumption
+                    eaten[settler.settlement_id] = eaten.get(settler.settlement_id, 0) + consumption
+                settler.hunger = 0
+                settler.mood = "content"
+            else:
+                settler.hunger += consumption
+                settler.mood = "hungry"
+                if settler.hunger >= 50:
+                    settler.status = "dead"
+                    settler.mood = "sick"
+                    log_event(settlement, "villager_dead",
+                              f"Villager {settler.name} died of starvation (hunger {settler.hunger}).")
+                    mark_housing_dirty(settler.settlement_id)
+            if food_left is None:
                 settlement.save()
-                settler.save()
-                total_food_consumption += consumption
-            logger.info(f"Settlers consumed a total of {total_food_consumption} food units (modifier: {cons_modifier})")
+            settler.save()
+            total_food_consumption += consumption
+        if food_left is not None:
+            ledger.record([
+                ledger.delta(settlement_id, "food", -amount, "consumption", gs.tick_count)
+                for settlement_id, amount in eaten.items()
+            ])
+        logger.info(f"Settlers consumed a total of {total_food_consumption} food units (modifier: {cons_modifier})")
 
-    def process_villager_lifecycle(self, gs):
-        from core.config import MAX_VILLAGER_AGE, EXPERIENCE_GAIN_PER_TICK, VILLAGER_NAMES
+    def process_villager_lifecycle(self, gs, settlement_ids):
+        from core.config import EXPERIENCE_GAIN_PER_TICK, VILLAGER_NAMES
         import random
         from core.event_logger import log_event
-        with transaction.atomic():
-            settlers = Settler.objects.exclude(status="dead")
-            for settler in settlers:
-                if settler.assigned_building:
-                    settler.experience += EXPERIENCE_GAIN_PER_TICK  
-                if settler.birth_tick is None:
-                    settler.birth_tick = gs.tick_count
-                age = gs.tick_count - settler.birth_tick
-                if age >= MAX_VILLAGER_AGE:
-                    settler.status = "dead"
-                    settler.mood = "sick"
-                    log_event(settler.settlement, "villager_dead", f"Villager {settler.name} died of old age (age {age}).")
-                settler.save()
+        from django.db.models import F
+        living = Settler.objects.filter(settlement_id__in=settlement_ids).exclude(status="dead")
+        living.filter(assigned_building__isnull=False).update(
+            experience=F("experience") + EXPERIENCE_GAIN_PER_TICK
+        )
+        schedule_new_settlers(gs.tick_count, gs.id, settlement_ids)
+        # Only settlers whose death tick has arrived are loaded.
+        for settler in living.select_related("settlement").filter(death_tick__lte=gs.tick_count).order_by("settlement_id", "id"):
+            age = gs.tick_count - settler.birth_tick
+            settler.status = "dead"
+            settler.mood = "sick"
+            settler.save(update_fields=["status", "mood"])
+            log_event(settler.settlement, "villager_dead", f"Villager {settler.name} died of old age (age {age}).")
+            mark_housing_dirty(settler.settlement_id)
+        self._process_happiness(gs, settlement_ids)
 
-            settlements = Settlement.objects.all()
-            for settlement in settlements:
-                popularity = apply_happiness_effects(settlement)
-                settlement.save()
-                logger.info(f"Settlement '{settlement.name}' popularity updated: {popularity}")
-                new_settler = process_villager_recruitment(settlement)
-                if new_settler:
-                    log_event(settlement, "villager_recruited", f"New settler {new_settler.name} recruited (popularity: {popularity}).")
-                    logger.info(f"Settlement '{settlement.name}' recruited new settler: {new_settler.name}")
+    def _process_happiness(self, gs, settlement_ids):
+        # Happiness and recruitment; runs inside the lifecycle chunk's transaction.
+        settlements = ledger.resolve(list(Settlement.objects.filter(id__in=settlement_ids).order_by("id")))
+        for settlement in settlements:
+            popularity = apply_happiness_effects(settlement)
+            settlement.save(update_fields=["happy_duration", "happiness_boost", "last_updated"])
+            logger.info(f"Settlement '{settlement.name}' popularity updated: {popularity}")
+            new_settler = process_villager_recruitment(settlement)
+            if new_settler:
+                log_event(settlement, "villager_recruited", f"New settler {new_settler.name} recruited (popularity: {popularity}).")
+                logger.info(f"Settlement '{settlement.name}' recruited new settler: {new_settler.name}")
 
-    def process_resource_gathering(self, gs):
+    def process_resource_gathering(self, gs, settlement_ids):
         from core.config import GATHER_RATES
-        with transaction.atomic():
-            nodes = ResourceNode.objects.filter(gatherer__isnull=False)
-            for node in nodes:
-                gather_rate = GATHER_RATES.get(node.resource_type, 1)
-                node.quantity = max(node.quantity - gather_rate, 0)
-                node.save()
-                settlement = node.map_tile.settlement
+        deltas = []
+        nodes = ResourceNode.objects.filter(
+            map_tile__settlement_id__in=settlement_ids, gatherer__isnull=False
+        ).order_by("map_tile__settlement_id", "id")
+        for node in nodes:
+            gather_rate = GATHER_RATES.get(node.resource_type, 1)
+            node.materialize(gs.tick_count)
+            node.quantity = max(node.quantity - gather_rate, 0)
+            node.save(update_fields=["quantity", "last_harvest_tick"])
+            settlement = node.map_tile.settlement
+            from core.config import RESOURCE_CAP
+            if RESOURCE_LEDGER_MODE:
+                deltas.append(ledger.delta(settlement.id, node.resource_type, gather_rate, "gathering",
+                                           gs.tick_count, cap=RESOURCE_CAP))
+            else:
                 current_amount = getattr(settlement, node.resource_type, 0)
-                from core.config import RESOURCE_CAP
                 new_amount = min(current_amount + gather_rate, RESOURCE_CAP)
                 setattr(settlement, node.resource_type, new_amount)
                 settlement.save(update_fields=[node.resource_type])
-                if node.quantity == 0:
-                    log_event(settlement, "resource_depleted", f"{node.name} has been depleted.")
-                    villager = node.gatherer
-                    if villager:
-                        villager.gathering_resource_node = None
-                        villager.status = "idle"
-                        villager.save(update_fields=["gathering_resource_node", "status"])
-                    node.delete()
+            if node.quantity == 0:
+                log_event(settlement, "resource_depleted", f"{node.name} has been depleted.")
+                villager = node.gatherer
+                if villager:
+                    villager.gathering_resource_node = None
+                    villager.status = "idle"
+                    villager.save(update_fields=["gathering_resource_node", "status"])
+                node.delete()
+        ledger.record(deltas)
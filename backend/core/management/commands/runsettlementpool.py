@@ -0,0 +1,44 @@
+#core/management/commands/runsettlementpool.py
+import logging
+import os
+import time
+from django.core.management.base import BaseCommand
+
+from core.settlement_pool import SETTLEMENT_POOL_SIZE, SETTLEMENT_POOL_INTERVAL, pool_depth, refill_pool
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Keeps the pool of pre-generated, unowned settlements topped up.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=SETTLEMENT_POOL_SIZE, help='Target pool depth.')
+        parser.add_argument('--interval', type=float, default=SETTLEMENT_POOL_INTERVAL,
+                            help='Seconds between refill checks.')
+        parser.add_argument('--once', action='store_true', help='Refill once and exit.')
+        parser.add_argument('--status', action='store_true', help='Print the current pool depth and exit.')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self.stdout.write(f"Settlement pool depth: {pool_depth()} / {options['size']}")
+            return
+        # Low priority: the pool worker should never compete with the tick or web workers.
+        try:
+            os.nice(10)
+        except (AttributeError, OSError):
+            pass
+        self.stdout.write(f"Keeping settlement pool at {options['size']}...")
+        while True:
+            try:
+                created = refill_pool(options['size'])
+                if created:
+                    self.stdout.write(f"Created {created} pooled settlements")
+            except Exception as e:
+                logger.exception("Error refilling settlement pool: %s", str(e))
+            if options['once']:
+                return
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                self.stdout.write("Settlement pool worker stopped.")
+                return
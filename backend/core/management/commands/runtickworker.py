@@ -0,0 +1,64 @@
+#core/management/commands/runtickworker.py
+import logging
+import multiprocessing
+import time
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.db import ensure_healthy_connection, release_connections
+from core.tick_queue import default_worker_id, work_once
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = ('Claims and runs tick batches for `runapscheduler --engine distributed`. Start as many '
+            'as needed, on any host that reaches the database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Worker processes to fork on this host (each claims batches independently).')
+        parser.add_argument('--poll', type=float, default=0.2, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--worker-id', default='', help='Worker name recorded on claimed batches.')
+
+    def handle(self, *args, **options):
+        processes = max(1, options['processes'])
+        if processes == 1:
+            self._work(options['worker_id'] or default_worker_id(), options['poll'])
+            return
+        # Children must not inherit the parent's open DB connections.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        children = [
+            context.Process(
+                target=self._work,
+                args=(f"{options['worker_id'] or default_worker_id()}/{n}", options['poll']),
+                daemon=True,
+            )
+            for n in range(processes)
+        ]
+        for child in children:
+            child.start()
+        self.stdout.write(f"Started {processes} tick workers")
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Tick workers stopped.")
+
+    def _work(self, worker_id, poll):
+        self.stdout.write(f"Tick worker {worker_id} waiting for batches...")
+        while True:
+            try:
+                ensure_healthy_connection()
+                while work_once(worker_id):
+                    pass
+            except KeyboardInterrupt:
+                return
+            except Exception as e:
+                logger.exception("Tick worker %s error: %s", worker_id, str(e))
+            finally:
+                release_connections()
+            try:
+                time.sleep(poll)
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,142 @@
+#core/management/commands/sqltickcheck.py
+import copy
+import random
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import sql_tick
+from core.config import GRID_SIZE, PRODUCTION_TICK, RESOURCE_CAP, SEASONS, VILLAGER_NAMES
+from core.models import Building, EventLog, GameState, Settler
+from core.settlement_pool import materialize_settlement
+from core.simulation import RESOURCES, TickContext, run_aging, run_construction, run_feeding, run_production
+from core.world import load_settlements
+
+SETTLER_FIELDS = ("status", "mood", "hunger", "experience", "birth_tick", "death_tick")
+BUILDING_FIELDS = ("is_constructed", "construction_progress")
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Checks the set-based SQL tick phases (runapscheduler --engine sql) against the pure '
+            'simulation core on randomly generated settlements. Runs in one transaction that is '
+            'rolled back, so nothing is kept.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--settlements', type=int, default=20, help='Settlements to generate.')
+        parser.add_argument('--ticks', type=int, default=100, help='Ticks to compare.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for world generation.')
+        parser.add_argument('--show', type=int, default=20, help='Mismatches to print.')
+
+    def handle(self, *args, **options):
+        if not sql_tick.supported():
+            raise CommandError("The SQL tick phases need PostgreSQL.")
+        random.seed(options['seed'])
+        mismatches = []
+        try:
+            with transaction.atomic():
+                realm = self._generate(options['settlements'], options['ticks'])
+                ctx = TickContext(0, SEASONS[0], random.Random(options['seed']))
+                for _ in range(options['ticks']):
+                    ctx.advance()
+                    mismatches += self._compare_tick(realm, ctx)
+                raise _Rollback
+        except _Rollback:
+            pass
+        for line in mismatches[:options['show']]:
+            self.stdout.write(f"  {line}")
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} mismatches over {options['ticks']} ticks.")
+        self.stdout.write(f"SQL phases match the simulation core over {options['ticks']} ticks "
+                          f"and {options['settlements']} settlements.")
+
+    def _generate(self, count, ticks):
+        """
+        A throwaway realm of settlements with buildings finishing during the run, staffed
+        producers, warehouses, resources near the cap, scarce food and settlers near death.
+        """
+        realm = GameState.objects.create(name=f"sqltickcheck-{uuid.uuid4().hex[:8]}", current_season=SEASONS[0])
+        owner = get_user_model().objects.create_user(username=f"sqltickcheck-{uuid.uuid4().hex[:8]}")
+        types = [value for value, _ in Building.BUILDING_TYPES]
+        for i in range(count):
+            settlement = materialize_settlement(owner.id, f"Check {i}", realm.id)
+            for resource in RESOURCES:
+                setattr(settlement, resource, random.randint(0, RESOURCE_CAP + 100))
+            settlement.food = random.randint(0, 40)
+            settlement.save()
+            cells = random.sample([(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE)], random.randint(2, 8))
+            buildings = Building.objects.bulk_create([
+                Building(
+                    settlement=settlement,
+                    building_type=random.choice(types),
+                    is_constructed=random.random() < 0.5,
+                    construction_progress=0,
+                    coordinate_x=x,
+                    coordinate_y=y,
+                    completion_tick=random.randint(1, max(1, ticks)),
+                )
+                for x, y in cells
+            ])
+            Settler.objects.bulk_create([
+                Settler(settlement=settlement, name=random.choice(VILLAGER_NAMES))
+                for _ in range(random.randint(0, 6))
+            ])
+            settlers = list(settlement.settlers.all())
+            for settler in settlers:
+                settler.hunger = random.randint(0, 49)
+                if random.random() < 0.7:
+                    settler.assigned_building = random.choice(buildings)
+                    settler.status = "working"
+                if random.random() < 0.5:
+                    settler.birth_tick = 0
+                    settler.death_tick = random.randint(1, max(1, ticks))
+                if random.random() < 0.1:
+                    settler.status = "dead"
+            Settler.objects.bulk_update(settlers, ["hunger", "assigned_building", "status", "birth_tick", "death_tick"])
+        return realm
+
+    def _compare_tick(self, realm, ctx):
+        expected = copy.deepcopy(load_settlements(realm_id=realm.id))
+        expected_events = []
+        for state in expected.values():
+            run_construction(state, ctx, expected_events)
+            if ctx.tick_count % PRODUCTION_TICK == 0:
+                run_production(state, ctx, expected_events)
+                run_feeding(state, ctx, expected_events)
+                run_aging(state, ctx, expected_events)
+
+        last_event = EventLog.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        sql_tick.complete_construction(ctx.tick_count, realm.id)
+        if ctx.tick_count % PRODUCTION_TICK == 0:
+            sql_tick.produce(ctx.season, realm.id)
+            sql_tick.feed(ctx.season, realm.id)
+            sql_tick.age(ctx.tick_count, realm.id)
+        actual = load_settlements(realm_id=realm.id)
+        actual_events = list(
+            EventLog.objects.filter(id__gt=last_event).values_list("settlement_id", "event_type", "description")
+        )
+
+        prefix = f"tick {ctx.tick_count}:"
+        mismatches = []
+        for settlement_id, want in expected.items():
+            got = actual[settlement_id]
+            for resource in RESOURCES:
+                if getattr(want, resource) != getattr(got, resource):
+                    mismatches.append(f"{prefix} settlement {settlement_id} {resource}: "
+                                      f"expected {getattr(want, resource)}, got {getattr(got, resource)}")
+            for records, fields, kind in ((want.settlers, SETTLER_FIELDS, "settler"),
+                                          (want.buildings, BUILDING_FIELDS, "building")):
+                got_records = got.settlers if kind == "settler" else got.buildings
+                for record_id, record in records.items():
+                    for field in fields:
+                        if getattr(record, field) != getattr(got_records[record_id], field):
+                            mismatches.append(f"{prefix} {kind} {record_id} {field}: expected "
+                                              f"{getattr(record, field)}, got {getattr(got_records[record_id], field)}")
+        if sorted(expected_events) != sorted(actual_events):
+            mismatches.append(f"{prefix} events differ: expected {sorted(expected_events)}, got {sorted(actual_events)}")
+        return mismatches
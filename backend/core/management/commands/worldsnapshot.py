@@ -0,0 +1,66 @@
+#core/management/commands/worldsnapshot.py
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import DEFAULT_REALM_ID, GameState
+from core.simulation import TickContext, simulate_tick
+from core.world import load_settlements
+from core.world_snapshot import read_snapshot, realm_snapshot_path, write_snapshot
+
+class Command(BaseCommand):
+    help = 'Writes, inspects or benchmarks the binary world snapshot used by the memory engine.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--realm', type=int, default=DEFAULT_REALM_ID, help='Realm id.')
+        parser.add_argument('--path', default='', help="Snapshot file (default: the realm's snapshot).")
+        parser.add_argument('--write', action='store_true',
+                            help='Write a snapshot of the current DB world (while the scheduler is stopped).')
+        parser.add_argument('--bench', type=int, metavar='TICKS',
+                            help='Load the snapshot and simulate TICKS ticks in memory, without DB writes.')
+        parser.add_argument('--seed', type=int, default=0, help='RNG seed for --bench.')
+
+    def handle(self, *args, **options):
+        path = options['path'] or realm_snapshot_path(options['realm'])
+        if options['write']:
+            try:
+                gs = GameState.objects.get(pk=options['realm'])
+            except GameState.DoesNotExist:
+                raise CommandError(f"Unknown realm: {options['realm']}")
+            started = time.perf_counter()
+            settlements = load_settlements(realm_id=gs.id)
+            loaded = time.perf_counter()
+            size = write_snapshot(gs.tick_count, gs.current_season, settlements, path)
+            self.stdout.write(
+                f"Wrote {len(settlements)} settlements at tick {gs.tick_count} to {path} ({size} bytes): "
+                f"DB load {loaded - started:.3f}s, write {time.perf_counter() - loaded:.3f}s"
+            )
+            return
+
+        started = time.perf_counter()
+        snapshot = read_snapshot(path)
+        if snapshot is None:
+            raise CommandError(f"No usable snapshot at {path}.")
+        tick_count, season, settlements = snapshot
+        loaded = time.perf_counter()
+        self.stdout.write(
+            f"Snapshot at tick {tick_count} ({season}): {len(settlements)} settlements, "
+            f"{sum(len(s.settlers) for s in settlements.values())} settlers, "
+            f"{sum(len(s.buildings) for s in settlements.values())} buildings, "
+            f"{sum(len(s.nodes) for s in settlements.values())} nodes; loaded in {loaded - started:.3f}s"
+        )
+        ticks = options['bench']
+        if not ticks:
+            return
+        ctx = TickContext(tick_count, season, random.Random(options['seed']))
+        events = []
+        started = time.perf_counter()
+        for _ in range(ticks):
+            ctx.advance()
+            for state in settlements.values():
+                simulate_tick(state, ctx, events)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Simulated {ticks} ticks in {elapsed:.3f}s ({elapsed / ticks * 1000:.2f} ms/tick), "
+            f"{len(events)} events"
+        )
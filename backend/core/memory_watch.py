@@ -0,0 +1,107 @@
+# core/memory_watch.py
+# Memory sampling for the long-running scheduler. runapscheduler samples its own RSS (and,
+# with SCHEDULER_TRACEMALLOC_TOP, the largest tracemalloc allocation sites) every
+# SCHEDULER_MEMORY_SAMPLE_SECONDS and publishes the sample per realm as an entry of the
+# game clock store, so the web workers can serve it from /api/metrics/ under "scheduler_memory".
+# Past SCHEDULER_MEMORY_CEILING_MB the scheduler shuts down cleanly and re-executes itself.
+import logging
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+from django.conf import settings
+
+from core.game_clock import get_store
+from core.metrics import register_metric
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+SCHEDULER_MEMORY_SAMPLE_SECONDS = getattr(settings, 'SCHEDULER_MEMORY_SAMPLE_SECONDS', 300)
+# Allocation sites reported per sample; 0 leaves tracemalloc off (it slows every allocation).
+SCHEDULER_TRACEMALLOC_TOP = getattr(settings, 'SCHEDULER_TRACEMALLOC_TOP', 0)
+SCHEDULER_TRACEMALLOC_FRAMES = getattr(settings, 'SCHEDULER_TRACEMALLOC_FRAMES', 1)
+# RSS (MiB) above which the scheduler restarts itself; None never restarts.
+SCHEDULER_MEMORY_CEILING_MB = getattr(settings, 'SCHEDULER_MEMORY_CEILING_MB', None)
+
+
+def _entry_name(realm_id):
+    return f"memory_{realm_id}"
+
+
+def rss_bytes():
+    """
+    Current resident set size. Falls back to the peak RSS where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def start_tracing():
+    if SCHEDULER_TRACEMALLOC_TOP and not tracemalloc.is_tracing():
+        tracemalloc.start(SCHEDULER_TRACEMALLOC_FRAMES)
+
+
+def sample():
+    """
+    {"pid", "rss_mb", "sampled_at"} plus, while tracemalloc is tracing, "traced_mb",
+    "traced_peak_mb" and "top": the SCHEDULER_TRACEMALLOC_TOP largest allocation sites.
+    """
+    data = {"pid": os.getpid(), "rss_mb": round(rss_bytes() / 2 ** 20, 1), "sampled_at": time.time()}
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        stats = tracemalloc.take_snapshot().statistics("lineno")[:SCHEDULER_TRACEMALLOC_TOP]
+        data["traced_mb"] = round(current / 2 ** 20, 1)
+        data["traced_peak_mb"] = round(peak / 2 ** 20, 1)
+        data["top"] = [
+            {"site": str(stat.traceback[0]), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+            for stat in stats
+        ]
+    return data
+
+
+def over_ceiling(data):
+    return SCHEDULER_MEMORY_CEILING_MB is not None and data["rss_mb"] > SCHEDULER_MEMORY_CEILING_MB
+
+
+def publish(data, realm_ids):
+    """
+    Called by the scheduler for each sample. Never raises.
+    """
+    for realm_id in realm_ids:
+        try:
+            get_store().write_entry(_entry_name(realm_id), data)
+        except Exception as e:
+            logger.exception("Error publishing scheduler memory sample: %s", str(e))
+
+
+def restart():
+    """
+    Replaces the process with a fresh copy of itself (same interpreter and arguments).
+    Call once the scheduler has stopped and written back its state.
+    """
+    from django.db import connections
+    connections.close_all()
+    logger.warning(f"Restarting scheduler: {' '.join(sys.argv)}")
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.execv(sys.executable, [sys.executable, *sys.argv])
+
+
+def scheduler_memory_stats():
+    from core.models import GameState
+    store = get_store()
+    return {
+        realm_id: store.read_entry(_entry_name(realm_id))
+        for realm_id in GameState.objects.values_list("id", flat=True)
+    }
+
+
+register_metric("scheduler_memory", scheduler_memory_stats)
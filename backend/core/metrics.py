@@ -0,0 +1,32 @@
+# core/metrics.py
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+# /api/metrics/ shows pool, queue and scheduler internals: staff only unless this is set.
+METRICS_PUBLIC = getattr(settings, 'METRICS_PUBLIC', False)
+
+# Named metric sources; each is a zero-argument callable returning a JSON-serializable dict.
+_sources = {}
+
+
+def register_metric(name, source):
+    _sources[name] = source
+
+
+def collect_metrics():
+    """
+    Evaluates every registered source. A failing source reports its error instead of
+    hiding the others.
+    """
+    data = {}
+    for name, source in _sources.items():
+        try:
+            data[name] = source()
+        except Exception as e:
+            logger.exception("Error collecting metric %s: %s", name, str(e))
+            data[name] = {"error": str(e)}
+    return data
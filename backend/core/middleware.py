@@ -1,10 +1,25 @@
 # core/middleware.py
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
 class ForceCorsCredentialsMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         response = self.get_response(request)
         # Force the header to be true
         response["Access-Control-Allow-Credentials"] = "true"
         return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        response["Access-Control-Allow-Credentials"] = "true"
+        return response
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_alter_eventlog_event_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='building',
+            name='construction_started_tick',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='building',
+            name='completion_tick',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='settler',
+            name='death_tick',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
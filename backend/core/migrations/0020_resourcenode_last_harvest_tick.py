@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_building_construction_started_tick_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resourcenode',
+            name='last_harvest_tick',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
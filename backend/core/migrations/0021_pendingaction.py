@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-19 10:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_resourcenode_last_harvest_tick'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingAction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action_type', models.CharField(choices=[('place_building', 'Place Building'), ('assign_villager', 'Assign Villager'), ('gather_resource', 'Gather Resource'), ('toggle_assignment', 'Toggle Assignment')], max_length=30)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('applied', 'Applied'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('applied_tick', models.IntegerField(blank=True, null=True)),
+                ('settlement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_actions', to='core.settlement')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_pendingaction'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pendingaction',
+            name='action_type',
+            field=models.CharField(choices=[('place_building', 'Place Building'), ('assign_villager', 'Assign Villager'), ('gather_resource', 'Gather Resource'), ('toggle_assignment', 'Toggle Assignment'), ('batch', 'Batch')], max_length=30),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:02
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+
+from core.config import BUILDING_COSTS
+
+
+def remove_duplicate_buildings(apps, schema_editor):
+    # The old place_building checked the tile with a racy exists(), so concurrent placements
+    # could put several buildings on one tile. Keep the oldest, refund the others and send
+    # their workers back to idle before the unique constraint is added.
+    Building = apps.get_model('core', 'Building')
+    Settlement = apps.get_model('core', 'Settlement')
+    Settler = apps.get_model('core', 'Settler')
+    tiles = (
+        Building.objects.values('settlement_id', 'coordinate_x', 'coordinate_y')
+        .annotate(keep=Min('id'), buildings=Count('id')).filter(buildings__gt=1)
+    )
+    for tile in tiles:
+        extra = Building.objects.filter(
+            settlement_id=tile['settlement_id'], coordinate_x=tile['coordinate_x'], coordinate_y=tile['coordinate_y'],
+        ).exclude(id=tile['keep'])
+        refund = {'wood': 0, 'stone': 0}
+        for building_type in extra.values_list('building_type', flat=True):
+            for resource, amount in BUILDING_COSTS.get(building_type, {}).items():
+                refund[resource] = refund.get(resource, 0) + amount
+        Settler.objects.filter(assigned_building__in=extra, status='working').update(
+            status='idle', assigned_building=None
+        )
+        extra.delete()
+        Settlement.objects.filter(id=tile['settlement_id']).update(
+            **{resource: F(resource) + amount for resource, amount in refund.items()}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_alter_pendingaction_action_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_buildings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='building',
+            constraint=models.UniqueConstraint(fields=('settlement', 'coordinate_x', 'coordinate_y'), name='unique_building_tile'),
+        ),
+        migrations.AlterField(
+            model_name='pendingaction',
+            name='action_type',
+            field=models.CharField(choices=[('place_building', 'Place Building'), ('assign_villager', 'Assign Villager'), ('gather_resource', 'Gather Resource'), ('toggle_assignment', 'Toggle Assignment'), ('place_blueprint', 'Place Blueprint'), ('batch', 'Batch')], max_length=30),
+        ),
+    ]
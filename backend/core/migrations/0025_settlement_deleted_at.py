@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_alter_settlement_owner'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='settlement',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
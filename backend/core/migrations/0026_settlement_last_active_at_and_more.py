@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:40
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_owned_active(apps, schema_editor):
+    # Existing settlements start in the per-tick set and age out normally.
+    Settlement = apps.get_model('core', 'Settlement')
+    Settlement.objects.filter(owner__isnull=False).update(last_active_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_settlement_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='settlement',
+            name='last_active_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='settlement',
+            name='simulated_tick',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(mark_owned_active, migrations.RunPython.noop),
+    ]
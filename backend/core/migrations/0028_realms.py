@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from core.config import TICK_INTERVAL_SECONDS
+
+
+def ensure_default_realm(apps, schema_editor):
+    # Existing settlements and tick batches are assigned to the original singleton GameState.
+    GameState = apps.get_model('core', 'GameState')
+    GameState.objects.get_or_create(pk=1, defaults={'tick_count': 0, 'current_season': 'Spring'})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_tickbatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamestate',
+            name='name',
+            field=models.CharField(default='Aurora', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='gamestate',
+            name='tick_interval',
+            # Existing realms keep the interval the scheduler used before realms.
+            field=models.FloatField(default=TICK_INTERVAL_SECONDS),
+        ),
+        migrations.RunPython(ensure_default_realm, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='settlement',
+            name='realm',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.PROTECT, related_name='settlements', to='core.gamestate'),
+        ),
+        migrations.AddField(
+            model_name='tickbatch',
+            name='realm',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.CASCADE, related_name='tick_batches', to='core.gamestate'),
+        ),
+    ]
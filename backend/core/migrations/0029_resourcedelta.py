@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-19 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_realms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(choices=[('food', 'Food'), ('wood', 'Wood'), ('stone', 'Stone'), ('magic', 'Magic')], max_length=10)),
+                ('amount', models.IntegerField()),
+                ('cap', models.IntegerField(blank=True, null=True)),
+                ('reason', models.CharField(max_length=20)),
+                ('tick', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('settlement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resource_deltas', to='core.settlement')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['settlement', 'id'], name='resourcedelta_settlement_id')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-19 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_resourcedelta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TickCursor',
+            fields=[
+                ('realm', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='tick_cursor', serialize=False, to='core.gamestate')),
+                ('tick', models.IntegerField()),
+                ('phase', models.CharField(max_length=20)),
+                ('after_settlement_id', models.BigIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
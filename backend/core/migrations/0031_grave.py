@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_tickcursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Grave',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('settler_id', models.BigIntegerField()),
+                ('name', models.CharField(max_length=100)),
+                ('cause', models.CharField(choices=[('old_age', 'Old age'), ('starvation', 'Starvation')], max_length=20)),
+                ('birth_tick', models.IntegerField(blank=True, null=True)),
+                ('died_tick', models.IntegerField(blank=True, null=True)),
+                ('experience', models.IntegerField(default=0)),
+                ('buried_at', models.DateTimeField(auto_now_add=True)),
+                ('settlement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='graves', to='core.settlement')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['settlement', 'id'], name='grave_settlement_id')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='settler',
+            index=models.Index(condition=models.Q(('status', 'dead')), fields=['id'], name='settler_dead_id'),
+        ),
+    ]
@@ -2,13 +2,71 @@
 from django.db import models
 from django.contrib.auth.models import User  # Import the built-in User model
 
-# Model for game state (tick count and current season)
+from core.config import TICK_INTERVAL_SECONDS
+
+# The realm every settlement starts in; it was the only GameState row before realms.
+DEFAULT_REALM_ID = 1
+
+# Shared by ResourceNode and ResourceDelta.
+RESOURCE_TYPE_CHOICES = (
+    ('food', 'Food'),
+    ('wood', 'Wood'),
+    ('stone', 'Stone'),
+    ('magic', 'Magic'),
+)
+
+
+# Model for game state (tick count and current season). Each row is a realm with its own
+# clock and tick loop; settlements belong to exactly one realm.
 class GameState(models.Model):
     tick_count = models.IntegerField(default=0)
     current_season = models.CharField(max_length=20, default="Spring")
+    name = models.CharField(max_length=50, default="Aurora")
+    # Seconds between this realm's ticks.
+    tick_interval = models.FloatField(default=TICK_INTERVAL_SECONDS)
 
     def __str__(self):
-        return f"Tick: {self.tick_count}, Season: {self.current_season}"
+        return f"{self.name} - Tick: {self.tick_count}, Season: {self.current_season}"
+
+
+class SettlementQuerySet(models.QuerySet):
+    def active(self):
+        # Settlements that belong to a player and take part in the simulation.
+        return self.filter(owner__isnull=False, deleted_at__isnull=True)
+
+    def pooled(self):
+        # Pre-generated settlements waiting to be claimed (see core.settlement_pool).
+        return self.filter(owner__isnull=True, deleted_at__isnull=True)
+
+    def deleted(self):
+        # Soft-deleted settlements waiting for the background purge (see core.purge).
+        return self.filter(deleted_at__isnull=False)
+
+    def ticking(self):
+        # Active settlements the scheduler advances every tick; dormant ones are caught up
+        # on access instead (see core.tiering).
+        return self.active().filter(simulated_tick__isnull=True)
+
+    def dormant(self):
+        return self.active().filter(simulated_tick__isnull=False)
+
+
+def active_settlement_q(prefix="settlement__"):
+    """
+    Filter for rows of child models (settlers, buildings, ...) whose settlement is active.
+    """
+    return models.Q(**{f"{prefix}owner__isnull": False, f"{prefix}deleted_at__isnull": True})
+
+
+def ticking_settlement_q(prefix="settlement__", realm_id=None):
+    """
+    Like active_settlement_q, restricted to settlements in the per-tick set (of one realm
+    if `realm_id` is given).
+    """
+    q = active_settlement_q(prefix) & models.Q(**{f"{prefix}simulated_tick__isnull": True})
+    if realm_id is not None:
+        q &= models.Q(**{f"{prefix}realm_id": realm_id})
+    return q
 
 
 # Updated Settlement model to include an owner (User) and created_at field
@@ -18,14 +76,23 @@ class Settlement(models.Model):
     wood = models.IntegerField(default=50)
     stone = models.IntegerField(default=50)
     magic = models.IntegerField(default=0)
-    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="settlements")
+    # Null while the settlement sits in the pre-generated pool.
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="settlements", null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     last_updated = models.DateTimeField(auto_now=True)
     happy_duration = models.IntegerField(default=0)
     happiness_boost = models.FloatField(default=1.0)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Last owner request, refreshed at most every ACTIVITY_TOUCH_INTERVAL seconds.
+    last_active_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Set while the settlement is dormant: the last tick its state was simulated to.
+    simulated_tick = models.IntegerField(null=True, blank=True, db_index=True)
+    realm = models.ForeignKey(GameState, on_delete=models.PROTECT, related_name="settlements", default=DEFAULT_REALM_ID)
+
+    objects = SettlementQuerySet.as_manager()
 
     def __str__(self):
-        return f"{self.name} (Owner: {self.owner.username})"
+        return f"{self.name} (Owner: {self.owner.username if self.owner_id else 'unclaimed'})"
         
     
     def calculate_net_resource_rates(self, prod_modifier=1.0, cons_modifier=1.0):
@@ -44,7 +111,7 @@ class Settlement(models.Model):
         production_buildings = self.buildings.filter(is_constructed=True, assigned_settlers__isnull=False).distinct()
         for building in production_buildings:
             if building.building_type in PRODUCTION_RATES:
-                worker_count = building.assigned_settlers.count()
+                worker_count = building.assigned_settlers.exclude(status="dead").count()
                 for resource, rate in PRODUCTION_RATES[building.building_type].items():
                     production_totals[resource] = production_totals.get(resource, 0) + (rate * prod_modifier * worker_count / PRODUCTION_TICK)
         villager_count = self.settlers.filter(status__in=["idle", "working"]).count()
@@ -94,10 +161,33 @@ class Building(models.Model):
     villagers_generated = models.IntegerField(default=0)
     coordinate_x = models.IntegerField(null=True, blank=True)
     coordinate_y = models.IntegerField(null=True, blank=True)
+    # Tick at which construction_progress was last baselined, and the projected completion tick.
+    construction_started_tick = models.IntegerField(null=True, blank=True)
+    completion_tick = models.IntegerField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["settlement", "coordinate_x", "coordinate_y"], name="unique_building_tile"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.get_building_type_display()} in {self.settlement.name} at ({self.coordinate_x}, {self.coordinate_y})"
 
+    def current_progress(self, tick_count, current_season):
+        """
+        Construction progress at `tick_count`, derived from the baseline instead of
+        being written every tick.
+        """
+        if self.is_constructed or self.construction_started_tick is None:
+            return self.construction_progress
+        from core.scheduling import project_construction
+        return project_construction(
+            self.construction_progress, self.construction_started_tick,
+            tick_count, current_season, until_tick=tick_count,
+        )
+
 
 class EventLog(models.Model):
     EVENT_TYPES = (
@@ -117,6 +207,80 @@ class EventLog(models.Model):
         return f"{self.get_event_type_display()} at {self.timestamp}"
 
 
+# Player action queued in COMMAND_QUEUE_MODE; applied at the start of the next tick (core.actions).
+class PendingAction(models.Model):
+    ACTION_TYPES = (
+        ("place_building", "Place Building"),
+        ("assign_villager", "Assign Villager"),
+        ("gather_resource", "Gather Resource"),
+        ("toggle_assignment", "Toggle Assignment"),
+        ("place_blueprint", "Place Blueprint"),
+        ("batch", "Batch"),
+    )
+    STATUS_CHOICES = (('pending', 'Pending'), ('applied', 'Applied'), ('failed', 'Failed'))
+    settlement = models.ForeignKey("Settlement", on_delete=models.CASCADE, related_name="pending_actions")
+    action_type = models.CharField(max_length=30, choices=ACTION_TYPES)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', db_index=True)
+    result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    applied_tick = models.IntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_action_type_display()} for settlement {self.settlement_id} ({self.status})"
+
+
+# One batch of settlements to advance to `tick` in distributed tick mode (core.tick_queue).
+class TickBatch(models.Model):
+    STATUS_CHOICES = (('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'))
+    realm = models.ForeignKey(GameState, on_delete=models.CASCADE, related_name="tick_batches", default=DEFAULT_REALM_ID)
+    tick = models.IntegerField(db_index=True)
+    season = models.CharField(max_length=20)
+    settlement_ids = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', db_index=True)
+    attempts = models.IntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Tick {self.tick} batch {self.id} ({len(self.settlement_ids)} settlements, {self.status})"
+
+
+# How far the db/sql engines got through a realm's current tick (core.tick_chunks): the
+# phase in progress and the last settlement whose chunk of it committed.
+class TickCursor(models.Model):
+    realm = models.OneToOneField(GameState, on_delete=models.CASCADE, primary_key=True, related_name="tick_cursor")
+    tick = models.IntegerField()
+    phase = models.CharField(max_length=20)
+    after_settlement_id = models.BigIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Realm {self.realm_id} tick {self.tick}: {self.phase} after settlement {self.after_settlement_id}"
+
+
+# Signed change to one settlement resource in RESOURCE_LEDGER_MODE (core.ledger). Rows are
+# appended instead of rewriting the Settlement row and folded into it periodically.
+class ResourceDelta(models.Model):
+    settlement = models.ForeignKey("Settlement", on_delete=models.CASCADE, related_name="resource_deltas")
+    resource = models.CharField(max_length=10, choices=RESOURCE_TYPE_CHOICES)
+    amount = models.IntegerField()
+    # Balance ceiling a gain is clamped to when applied, as in the direct writes; None for spending.
+    cap = models.IntegerField(null=True, blank=True)
+    reason = models.CharField(max_length=20)
+    tick = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["settlement", "id"], name="resourcedelta_settlement_id")]
+
+    def __str__(self):
+        return f"{self.amount:+d} {self.resource} for settlement {self.settlement_id} ({self.reason})"
+
+
 class LoreEntry(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
@@ -148,24 +312,53 @@ class Settler(models.Model):
         related_name='assigned_gatherer'
     )
     birth_tick = models.IntegerField(null=True, blank=True)
+    death_tick = models.IntegerField(null=True, blank=True, db_index=True)
     experience = models.IntegerField(default=0)
 
+    class Meta:
+        # Dead settlers only wait here until core.graveyard archives them.
+        indexes = [models.Index(fields=["id"], condition=models.Q(status="dead"), name="settler_dead_id")]
+
     def __str__(self):
         return self.name
 
 
+# Archived dead settler (core.graveyard). Dead settlers are moved here in batches so the
+# Settler table only holds the living population.
+class Grave(models.Model):
+    CAUSE_CHOICES = (('old_age', 'Old age'), ('starvation', 'Starvation'))
+    settlement = models.ForeignKey("Settlement", on_delete=models.CASCADE, related_name="graves")
+    settler_id = models.BigIntegerField()
+    name = models.CharField(max_length=100)
+    cause = models.CharField(max_length=20, choices=CAUSE_CHOICES)
+    birth_tick = models.IntegerField(null=True, blank=True)
+    # Tick of death; for starvation, the tick the settler was archived.
+    died_tick = models.IntegerField(null=True, blank=True)
+    experience = models.IntegerField(default=0)
+    buried_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["settlement", "id"], name="grave_settlement_id")]
+
+    @property
+    def lifespan(self):
+        if self.birth_tick is None or self.died_tick is None:
+            return None
+        return self.died_tick - self.birth_tick
+
+    def __str__(self):
+        return f"{self.name} ({self.get_cause_display()})"
+
+
 class ResourceNode(models.Model):
-    RESOURCE_TYPE_CHOICES = (
-        ('food', 'Food'),
-        ('wood', 'Wood'),
-        ('stone', 'Stone'),
-        ('magic', 'Magic'),
-    )
+    RESOURCE_TYPE_CHOICES = RESOURCE_TYPE_CHOICES
     name = models.CharField(max_length=100)
     resource_type = models.CharField(max_length=10, choices=RESOURCE_TYPE_CHOICES)
     quantity = models.IntegerField(default=100)
     max_quantity = models.IntegerField(default=100)
     regen_rate = models.IntegerField(default=5)  # Amount regenerated per tick
+    # Tick at which `quantity` was last materialized; regeneration since then is computed on read.
+    last_harvest_tick = models.IntegerField(null=True, blank=True)
     lore = models.TextField(blank=True)
     map_tile = models.ForeignKey('MapTile', on_delete=models.CASCADE, related_name='resource_nodes')
     # Track the single villager gathering from this node.
@@ -180,13 +373,32 @@ class ResourceNode(models.Model):
     def __str__(self):
         return f"{self.name} ({self.resource_type}) at Tile ({self.map_tile.coordinate_x}, {self.map_tile.coordinate_y})"
 
-    def process_gathering_tick(self):
+    def quantity_at(self, tick_count):
+        """
+        Closed-form regeneration: min(max_quantity, stored + regen_rate * elapsed ticks).
+        Nodes that were never harvested are full and have no stamp.
+        """
+        if self.last_harvest_tick is None or tick_count <= self.last_harvest_tick:
+            return self.quantity
+        elapsed = tick_count - self.last_harvest_tick
+        return min(self.max_quantity, self.quantity + self.regen_rate * elapsed)
+
+    def materialize(self, tick_count):
+        """
+        Folds pending regeneration into `quantity` and restamps the node. Does not save.
+        """
+        self.quantity = self.quantity_at(tick_count)
+        self.last_harvest_tick = tick_count
+        return self.quantity
+
+    def process_gathering_tick(self, tick_count):
         if not self.gatherer:
             return
         from core.config import GATHER_RATES, RESOURCE_CAP
         rate = GATHER_RATES.get(self.resource_type, 1)
+        self.materialize(tick_count)
         self.quantity -= rate
-        self.save(update_fields=["quantity"])
+        self.save(update_fields=["quantity", "last_harvest_tick"])
         settlement = self.map_tile.settlement
         current_amount = getattr(settlement, self.resource_type, 0)
         new_amount = min(current_amount + rate, RESOURCE_CAP)
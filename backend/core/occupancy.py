@@ -0,0 +1,117 @@
+# core/occupancy.py
+# Per-settlement occupancy grids, cached in Django's default cache. Workers only share
+# grids when that cache is shared (Redis, Memcached, database); with the per-process
+# LocMemCache each worker keeps its own copy, which can miss placements made by other
+# workers. The unique (settlement, x, y) constraint on Building still rejects those, and
+# the stale grid is dropped, so a shared cache only saves the retry.
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.config import GRID_SIZE
+from core.models import MapTile
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+GRID_CACHE_TIMEOUT = getattr(settings, 'GRID_CACHE_TIMEOUT', 3600)
+
+# Terrain is stored as one byte per tile; 0 means there is no tile at that position.
+TERRAIN_CODES = {terrain: code for code, (terrain, _) in enumerate(MapTile.TERRAIN_CHOICES, start=1)}
+TERRAIN_NAMES = {code: terrain for terrain, code in TERRAIN_CODES.items()}
+
+
+def _cache_key(settlement_id):
+    return f"coa:grid:{settlement_id}"
+
+
+class SettlementGrid:
+    """
+    Per-settlement terrain and occupancy bitmap. Terrain is a bytearray indexed by
+    x * GRID_SIZE + y and occupancy a bitmask over the same indices, so every placement
+    check is O(1).
+    """
+    __slots__ = ("terrain", "occupied")
+
+    def __init__(self, terrain=None, occupied=0):
+        self.terrain = terrain if terrain is not None else bytearray(GRID_SIZE * GRID_SIZE)
+        self.occupied = occupied
+
+    @staticmethod
+    def in_bounds(x, y):
+        return 0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE
+
+    def terrain_at(self, x, y):
+        return TERRAIN_NAMES.get(self.terrain[x * GRID_SIZE + y])
+
+    def is_occupied(self, x, y):
+        return bool(self.occupied >> (x * GRID_SIZE + y) & 1)
+
+    def occupy(self, x, y):
+        self.occupied |= 1 << (x * GRID_SIZE + y)
+
+    def placement_error(self, building_type, x, y):
+        """
+        Returns (message, status) if `building_type` cannot be placed at (x, y), else None.
+        """
+        if not isinstance(x, int) or not isinstance(y, int) or not self.in_bounds(x, y):
+            return "Tile coordinates must be between 0 and 9.", 400
+        if self.is_occupied(x, y):
+            return "Tile is already occupied.", 400
+        terrain = self.terrain_at(x, y)
+        if terrain is None:
+            return "Map tile not found.", 404
+        if terrain == "lake":
+            return "Cannot build on lake tile.", 400
+        # Enforce terrain restrictions:
+        if building_type == "quarry" and terrain != "mountain":
+            return "Quarries can only be built on mountain tiles.", 400
+        if building_type == "lumber_mill" and terrain != "forest":
+            return "Lumber Mills can only be built on forest tiles.", 400
+        return None
+
+    def dumps(self):
+        return (bytes(self.terrain), self.occupied)
+
+    @classmethod
+    def loads(cls, data):
+        terrain, occupied = data
+        return cls(bytearray(terrain), occupied)
+
+
+def build_grid(settlement):
+    """
+    Rebuilds the grid from two queries: tile terrain and building coordinates.
+    """
+    grid = SettlementGrid()
+    for x, y, terrain in settlement.map_tiles.values_list("coordinate_x", "coordinate_y", "terrain_type"):
+        if grid.in_bounds(x, y):
+            grid.terrain[x * GRID_SIZE + y] = TERRAIN_CODES.get(terrain, 0)
+    for x, y in settlement.buildings.exclude(coordinate_x=None).values_list("coordinate_x", "coordinate_y"):
+        if grid.in_bounds(x, y):
+            grid.occupy(x, y)
+    return grid
+
+
+def get_grid(settlement):
+    data = cache.get(_cache_key(settlement.id))
+    if data is not None:
+        return SettlementGrid.loads(data)
+    grid = build_grid(settlement)
+    store_grid(settlement.id, grid)
+    return grid
+
+
+def store_grid(settlement_id, grid):
+    """
+    Caches the grid once the current transaction commits (right away outside one), so a
+    rolled-back placement never leaves phantom occupancy behind.
+    """
+    data = grid.dumps()
+    transaction.on_commit(lambda: cache.set(_cache_key(settlement_id), data, GRID_CACHE_TIMEOUT))
+
+
+def invalidate_grid(settlement_id):
+    cache.delete(_cache_key(settlement_id))
@@ -1,6 +1,8 @@
 # core/population.py
+import heapq
 import random
 from django.conf import settings
+from django.db.models import Count, Q
 from core.models import Settler
 
 # --- Configurable Constants ---
@@ -149,10 +151,8 @@ def process_villager_recruitment(settlement):
     if popularity < RECRUITMENT_THRESHOLD:
         return None
 
-    houses = settlement.buildings.filter(building_type='house', is_constructed=True)
-    capacity = houses.count() * HOUSE_CAPACITY
-    housed = settlement.settlers.filter(housing_assigned__isnull=False).count()
-    if housed >= capacity:
+    vacancies = house_vacancy_heap(settlement)
+    if not vacancies:
         return None
 
     net_food = get_net_food_rate(settlement)
@@ -169,14 +169,7 @@ def process_villager_recruitment(settlement):
         from core.models import Settler
         from core.config import VILLAGER_NAMES
         new_name = random.choice(VILLAGER_NAMES)
-        candidate_house = None
-        candidate_count = None
-        for house in houses:
-            count = house.housed_settlers.count()
-            if count < HOUSE_CAPACITY:
-                if candidate_house is None or count < candidate_count:
-                    candidate_house = house
-                    candidate_count = count
+        candidate_house = vacancies[0][2]
         new_settler = Settler.objects.create(
             settlement=settlement,
             name=new_name,
@@ -187,29 +180,80 @@ def process_villager_recruitment(settlement):
             experience=0,
             housing_assigned=candidate_house
         )
+        mark_housing_dirty(settlement.id)
         return new_settler
     return None
 
+def house_vacancy_heap(settlement):
+    """
+    Loads occupancy of every constructed house in one aggregate query and returns a
+    min-heap of (occupants, house_id, house) for houses with a free slot.
+    Dead settlers do not occupy a slot.
+    """
+    houses = settlement.buildings.filter(building_type='house', is_constructed=True).annotate(
+        occupants=Count('housed_settlers', filter=~Q(housed_settlers__status='dead'))
+    )
+    heap = [(house.occupants, house.id, house) for house in houses if house.occupants < HOUSE_CAPACITY]
+    heapq.heapify(heap)
+    return heap
+
 def reassign_homeless_settlers(settlement):
     """
-    Finds settlers without housing and assigns them to houses using the fewest-occupants rule.
-    Logs an event when a settler is reassigned.
+    Finds living settlers without housing and assigns them to houses using the
+    fewest-occupants rule, popping the least occupied house from a vacancy heap.
+    Writes all assignments with one bulk_update and logs one event per move.
+    Returns the list of rehoused settlers.
     """
-    houses = list(settlement.buildings.filter(building_type='house', is_constructed=True))
-    if not houses:
-        return
-    homeless = settlement.settlers.filter(housing_assigned__isnull=True)
+    heap = house_vacancy_heap(settlement)
+    if not heap:
+        return []
+    homeless = settlement.settlers.filter(housing_assigned__isnull=True).exclude(status='dead')
+    moved = []
     for settler in homeless:
-        candidate = None
-        candidate_count = None
-        for house in houses:
-            count = house.housed_settlers.count()
-            if count < HOUSE_CAPACITY:
-                if candidate is None or count < candidate_count:
-                    candidate = house
-                    candidate_count = count
-        if candidate:
-            settler.housing_assigned = candidate
-            settler.save()
-            from core.event_logger import log_event
-            log_event(settlement, "villager_assigned", f"{settler.name} moved into House")
+        if not heap:
+            break
+        count, house_id, house = heapq.heappop(heap)
+        settler.housing_assigned = house
+        moved.append(settler)
+        if count + 1 < HOUSE_CAPACITY:
+            heapq.heappush(heap, (count + 1, house_id, house))
+    if moved:
+        Settler.objects.bulk_update(moved, ['housing_assigned'])
+        from core.event_logger import log_events
+        log_events(settlement, "villager_assigned", [f"{settler.name} moved into House" for settler in moved])
+    return moved
+
+
+# --- Housing Dirty Set ---
+# Settlements whose housing may need rebalancing (house finished, settler died or was
+# recruited). Lives in the scheduler process; the scheduler marks every settlement dirty
+# on startup so nothing is missed across restarts.
+_dirty_housing = set()
+
+def mark_housing_dirty(settlement_id):
+    _dirty_housing.add(settlement_id)
+
+def process_dirty_housing(realm_id=None, settlement_ids=None):
+    """
+    Runs the housing allocator for every dirty settlement (of one realm if `realm_id` is
+    given, and among `settlement_ids` if given) and removes them from the set. Returns the
+    number of settlements visited.
+    """
+    from core.models import Settlement
+    if not _dirty_housing:
+        return 0
+    if settlement_ids is not None:
+        settlement_ids = sorted(_dirty_housing.intersection(settlement_ids))
+    else:
+        settlement_ids = list(_dirty_housing)
+    if realm_id is not None:
+        # Other realms' settlements stay marked for their own tick; ids of settlements
+        # that no longer exist are dropped here too.
+        other_realms = set(
+            Settlement.objects.filter(id__in=settlement_ids).exclude(realm_id=realm_id).values_list("id", flat=True)
+        )
+        settlement_ids = [sid for sid in settlement_ids if sid not in other_realms]
+    _dirty_housing.difference_update(settlement_ids)
+    for settlement in Settlement.objects.ticking().filter(id__in=settlement_ids).order_by("id"):
+        reassign_homeless_settlers(settlement)
+    return len(settlement_ids)
@@ -0,0 +1,81 @@
+# core/purge.py
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from core.models import Settlement, EventLog, Grave, PendingAction, ResourceDelta, Settler, ResourceNode, MapTile, Building
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+PURGE_BATCH_SIZE = getattr(settings, 'PURGE_BATCH_SIZE', 1000)
+PURGE_BATCH_PAUSE = getattr(settings, 'PURGE_BATCH_PAUSE', 0.05)
+PURGE_INTERVAL_SECONDS = getattr(settings, 'PURGE_INTERVAL_SECONDS', 60)
+
+
+def _delete_in_batches(model, where, params, batch_size):
+    """
+    Deletes rows matching `where` in ascending id ranges of at most `batch_size` rows,
+    one short transaction per range. Returns the number of rows deleted.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    deleted = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT MAX(id) FROM (SELECT id FROM {table} WHERE {where} ORDER BY id LIMIT %s) AS batch",
+                params + [batch_size],
+            )
+            upper = cursor.fetchone()[0]
+            if upper is None:
+                return deleted
+            cursor.execute(f"DELETE FROM {table} WHERE {where} AND id <= %s", params + [upper])
+            deleted += cursor.rowcount
+        if PURGE_BATCH_PAUSE:
+            time.sleep(PURGE_BATCH_PAUSE)
+
+
+def purge_settlement(settlement_id, batch_size=PURGE_BATCH_SIZE):
+    """
+    Removes a soft-deleted settlement and all its children with raw bulk DELETEs.
+    Children go first, and references between them (node gatherers, settler homes and
+    workplaces) are broken before their targets are deleted, so no batch waits on the ORM
+    cascade collector.
+    """
+    tile_table = connection.ops.quote_name(MapTile._meta.db_table)
+    node_table = connection.ops.quote_name(ResourceNode._meta.db_table)
+    by_settlement = "settlement_id = %s"
+    by_tile = f"map_tile_id IN (SELECT id FROM {tile_table} WHERE settlement_id = %s)"
+    params = [settlement_id]
+    counts = {}
+    counts["events"] = _delete_in_batches(EventLog, by_settlement, params, batch_size)
+    counts["pending_actions"] = _delete_in_batches(PendingAction, by_settlement, params, batch_size)
+    counts["resource_deltas"] = _delete_in_batches(ResourceDelta, by_settlement, params, batch_size)
+    counts["graves"] = _delete_in_batches(Grave, by_settlement, params, batch_size)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"UPDATE {node_table} SET gatherer_id = NULL WHERE {by_tile}", params)
+    counts["settlers"] = _delete_in_batches(Settler, by_settlement, params, batch_size)
+    counts["resource_nodes"] = _delete_in_batches(ResourceNode, by_tile, params, batch_size)
+    counts["map_tiles"] = _delete_in_batches(MapTile, by_settlement, params, batch_size)
+    counts["buildings"] = _delete_in_batches(Building, by_settlement, params, batch_size)
+    settlement_table = connection.ops.quote_name(Settlement._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {settlement_table} WHERE id = %s AND deleted_at IS NOT NULL", params)
+    logger.info(f"Purged settlement {settlement_id}: {counts}")
+    return counts
+
+
+def purge_deleted_settlements(batch_size=PURGE_BATCH_SIZE):
+    """
+    Background job: purges every soft-deleted settlement. Returns the number purged.
+    """
+    purged = 0
+    for settlement_id in Settlement.objects.deleted().order_by("deleted_at").values_list("id", flat=True):
+        try:
+            purge_settlement(settlement_id, batch_size)
+            purged += 1
+        except Exception as e:
+            logger.exception("Error purging settlement %s: %s", settlement_id, str(e))
+    return purged
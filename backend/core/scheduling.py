@@ -0,0 +1,110 @@
+# core/scheduling.py
+# Construction completion and death by old age are known the moment a building is placed
+# or a settler is born: the season calendar is fixed, so the construction rate can be
+# projected forward. Each event is stored as an indexed due tick on its row
+# (Building.completion_tick, Settler.death_tick) and the tick only fetches rows that are due.
+import logging
+
+from django.db.models import F
+
+from core.config import (
+    SEASONS,
+    SEASON_CHANGE_TICKS,
+    SEASON_MODIFIERS,
+    MAX_VILLAGER_AGE,
+)
+
+logger = logging.getLogger(__name__)
+
+CONSTRUCTION_BASE_INCREMENT = 10
+
+
+def season_at(tick, ref_tick, ref_season):
+    """
+    Returns the season in effect at `tick`, given that `ref_season` is in effect at `ref_tick`.
+    """
+    try:
+        ref_index = SEASONS.index(ref_season)
+    except ValueError:
+        ref_index = 0
+    offset = tick // SEASON_CHANGE_TICKS - ref_tick // SEASON_CHANGE_TICKS
+    return SEASONS[(ref_index + offset) % len(SEASONS)]
+
+
+def construction_increment(season):
+    multiplier = SEASON_MODIFIERS.get(season, {}).get('construction_speed_multiplier', 1.0)
+    return int(CONSTRUCTION_BASE_INCREMENT * multiplier)
+
+
+# Upper bound on how far ahead a completion is projected: any full year of ticks adds
+# YEAR_INCREMENT progress, so 100 is reached within ceil(100 / YEAR_INCREMENT) years
+# (never if every season has a zero construction rate).
+YEAR_INCREMENT = SEASON_CHANGE_TICKS * sum(construction_increment(season) for season in SEASONS)
+MAX_PROJECTION_TICKS = SEASON_CHANGE_TICKS * len(SEASONS) * -(-100 // YEAR_INCREMENT) if YEAR_INCREMENT else 0
+
+
+def project_construction(progress, from_tick, ref_tick, ref_season, until_tick=None):
+    """
+    Advances construction progress tick by tick starting after `from_tick`.
+    With `until_tick`, returns the progress reached at that tick (capped at 100).
+    Without it, returns the tick at which progress reaches 100, or None if it never does.
+    """
+    tick = from_tick
+    limit = until_tick if until_tick is not None else from_tick + MAX_PROJECTION_TICKS
+    while progress < 100 and tick < limit:
+        tick += 1
+        progress += construction_increment(season_at(tick, ref_tick, ref_season))
+    if until_tick is not None:
+        return min(progress, 100)
+    return tick if progress >= 100 else None
+
+
+def schedule_building(building, tick_count, current_season):
+    """
+    Stamps a newly placed (or re-baselined) building with its start and completion ticks.
+    Does not save.
+    """
+    building.construction_started_tick = tick_count
+    building.completion_tick = project_construction(
+        building.construction_progress, tick_count, tick_count, current_season
+    )
+    return building
+
+
+def schedule_new_settlers(tick_count, realm_id=None, settlement_ids=None):
+    """
+    Settlers are created without a birth tick; stamp birth and death ticks in one UPDATE
+    (limited to `settlement_ids` if given).
+    """
+    from core.models import Settler, ticking_settlement_q
+    # Pooled settlements are excluded so their settlers only start aging once claimed;
+    # dormant ones get their ticks stamped by their catch-up.
+    settlers = Settler.objects.filter(ticking_settlement_q(realm_id=realm_id), birth_tick__isnull=True)
+    if settlement_ids is not None:
+        settlers = settlers.filter(settlement_id__in=settlement_ids)
+    return settlers.exclude(status="dead").update(
+        birth_tick=tick_count, death_tick=tick_count + MAX_VILLAGER_AGE
+    )
+
+
+def rebuild_schedule(tick_count, current_season, realm_id=None):
+    """
+    Run once when the scheduler starts: re-baselines every unfinished building (of
+    `realm_id`, if given) at its current progress (so config changes to SEASON_MODIFIERS
+    take effect) and backfills death ticks for settlers that predate scheduling.
+    """
+    from core.models import Building, Settler
+    realm = {"settlement__realm_id": realm_id} if realm_id is not None else {}
+    buildings = list(Building.objects.filter(is_constructed=False, **realm))
+    for building in buildings:
+        if building.construction_started_tick is not None:
+            building.construction_progress = building.current_progress(tick_count, current_season)
+        schedule_building(building, tick_count, current_season)
+    Building.objects.bulk_update(
+        buildings, ["construction_progress", "construction_started_tick", "completion_tick"]
+    )
+    schedule_new_settlers(tick_count, realm_id)
+    backfilled = Settler.objects.filter(
+        death_tick__isnull=True, birth_tick__isnull=False, **realm
+    ).update(death_tick=F("birth_tick") + MAX_VILLAGER_AGE)
+    logger.info(f"Rebuilt schedule: {len(buildings)} buildings, {backfilled} settlers backfilled")
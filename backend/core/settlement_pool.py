@@ -0,0 +1,95 @@
+# core/settlement_pool.py
+import logging
+import random
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.config import STARTING_RESOURCES, STARTING_VILLAGERS, VILLAGER_NAMES
+from core.map_generation import generate_map_for_settlement
+from core.metrics import register_metric
+from core.models import DEFAULT_REALM_ID, Settlement, Settler
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+SETTLEMENT_POOL_SIZE = getattr(settings, 'SETTLEMENT_POOL_SIZE', 20)
+SETTLEMENT_POOL_INTERVAL = getattr(settings, 'SETTLEMENT_POOL_INTERVAL', 10)
+POOLED_SETTLEMENT_NAME = "Unclaimed"
+
+
+def materialize_settlement(owner_id, name, realm_id=DEFAULT_REALM_ID):
+    """
+    Creates a settlement with its starting villagers and generated map.
+    `owner_id` is None for pooled settlements.
+    """
+    with transaction.atomic():
+        settlement = Settlement.objects.create(
+            name=name,
+            owner_id=owner_id,
+            realm_id=realm_id,
+            last_active_at=timezone.now() if owner_id else None,
+            food=STARTING_RESOURCES["food"],
+            wood=STARTING_RESOURCES["wood"],
+            stone=STARTING_RESOURCES["stone"],
+            magic=STARTING_RESOURCES.get("magic", 0),
+        )
+        Settler.objects.bulk_create([
+            Settler(
+                settlement=settlement,
+                name=random.choice(VILLAGER_NAMES),
+                status="idle",
+                mood="content",
+                hunger=0,
+                birth_tick=None,
+                experience=0,
+            )
+            for _ in range(STARTING_VILLAGERS)
+        ])
+        generate_map_for_settlement(settlement)
+    return settlement
+
+
+def pool_depth():
+    return Settlement.objects.pooled().count()
+
+
+def refill_pool(target=SETTLEMENT_POOL_SIZE):
+    """
+    Tops the pool up to `target` settlements. Returns the number created.
+    """
+    missing = max(target - pool_depth(), 0)
+    for _ in range(missing):
+        materialize_settlement(None, POOLED_SETTLEMENT_NAME)
+    if missing:
+        logger.info(f"Settlement pool refilled with {missing} settlements")
+    return missing
+
+
+def claim_settlement(owner_id, name, realm_id=DEFAULT_REALM_ID):
+    """
+    Hands a pre-generated settlement to `owner_id` in `realm_id` with a single UPDATE.
+    Pooled settlements carry no tick stamps yet, so one pool serves every realm.
+    Concurrent claims skip rows locked by each other. Falls back to generating one
+    synchronously when the pool is empty. Returns (settlement_id, from_pool).
+    """
+    with transaction.atomic():
+        settlement_id = (
+            Settlement.objects.pooled()
+            .select_for_update(skip_locked=True)
+            .order_by("id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if settlement_id is not None:
+            Settlement.objects.filter(id=settlement_id).update(
+                owner_id=owner_id, name=name, realm_id=realm_id, created_at=timezone.now(),
+                last_updated=timezone.now(), last_active_at=timezone.now(),
+            )
+            return settlement_id, True
+    logger.warning("Settlement pool is empty, generating settlement synchronously")
+    return materialize_settlement(owner_id, name, realm_id).id, False
+
+
+register_metric("settlement_pool", lambda: {"depth": pool_depth(), "target": SETTLEMENT_POOL_SIZE})
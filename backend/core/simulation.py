@@ -0,0 +1,488 @@
+# core/simulation.py
+# DB-free simulation core. A settlement and everything in it is held in compact __slots__
+# records and advanced one tick at a time with the same rules as the tick phases in
+# runapscheduler: construction, housing, production, feeding, lifecycle (aging,
+# happiness, recruitment) and gathering. Settlements never interact, so each one can be
+# simulated on its own.
+import heapq
+import random
+
+from core.config import (
+    SEASONS,
+    SEASON_CHANGE_TICKS,
+    SEASON_MODIFIERS,
+    PRODUCTION_RATES,
+    PRODUCTION_TICK,
+    VILLAGER_CONSUMPTION_RATE,
+    FEEDING_TICK,
+    GATHER_RATES,
+    RESOURCE_CAP,
+    WAREHOUSE_BONUS,
+    MAX_VILLAGER_AGE,
+    EXPERIENCE_GAIN_PER_TICK,
+    VILLAGER_NAMES,
+)
+from core.population import (
+    MAX_HUNGER_FOR_MOOD,
+    POP_WEIGHT_MOOD,
+    POP_WEIGHT_FOOD,
+    POP_WEIGHT_HOUSING,
+    FOOD_BASELINE,
+    HOUSE_CAPACITY,
+    FOOD_NET_FACTOR,
+    RECRUITMENT_THRESHOLD,
+    HAPPY_DURATION_FACTOR,
+    HAPPINESS_BUILDING_TYPES,
+    DEFAULT_HAPPINESS_BUILDING_BONUS,
+)
+
+STARVATION_HUNGER = 50
+RESOURCES = ("food", "wood", "stone", "magic")
+
+
+class SettlerRec:
+    __slots__ = (
+        "id", "name", "status", "mood", "hunger", "assigned_building_id", "housing_id",
+        "node_id", "birth_tick", "death_tick", "experience", "dirty",
+    )
+
+    def __init__(self, id, name, status="idle", mood="content", hunger=0, assigned_building_id=None,
+                 housing_id=None, node_id=None, birth_tick=None, death_tick=None, experience=0):
+        self.id = id
+        self.name = name
+        self.status = status
+        self.mood = mood
+        self.hunger = hunger
+        self.assigned_building_id = assigned_building_id
+        self.housing_id = housing_id
+        self.node_id = node_id
+        self.birth_tick = birth_tick
+        self.death_tick = death_tick
+        self.experience = experience
+        self.dirty = False
+
+    @property
+    def alive(self):
+        return self.status != "dead"
+
+
+class BuildingRec:
+    __slots__ = (
+        "id", "building_type", "is_constructed", "construction_progress",
+        "construction_started_tick", "completion_tick", "x", "y", "dirty",
+    )
+
+    def __init__(self, id, building_type, is_constructed=False, construction_progress=0,
+                 construction_started_tick=None, completion_tick=None, x=None, y=None):
+        self.id = id
+        self.building_type = building_type
+        self.is_constructed = is_constructed
+        self.construction_progress = construction_progress
+        self.construction_started_tick = construction_started_tick
+        self.completion_tick = completion_tick
+        self.x = x
+        self.y = y
+        self.dirty = False
+
+
+class NodeRec:
+    __slots__ = (
+        "id", "name", "resource_type", "quantity", "max_quantity", "regen_rate",
+        "last_harvest_tick", "gatherer_id", "dirty",
+    )
+
+    def __init__(self, id, name, resource_type, quantity, max_quantity, regen_rate,
+                 last_harvest_tick=None, gatherer_id=None):
+        self.id = id
+        self.name = name
+        self.resource_type = resource_type
+        self.quantity = quantity
+        self.max_quantity = max_quantity
+        self.regen_rate = regen_rate
+        self.last_harvest_tick = last_harvest_tick
+        self.gatherer_id = gatherer_id
+        self.dirty = False
+
+    def quantity_at(self, tick_count):
+        # Same closed form as ResourceNode.quantity_at.
+        if self.last_harvest_tick is None or tick_count <= self.last_harvest_tick:
+            return self.quantity
+        elapsed = tick_count - self.last_harvest_tick
+        return min(self.max_quantity, self.quantity + self.regen_rate * elapsed)
+
+
+class SettlementRec:
+    __slots__ = (
+        "id", "name", "food", "wood", "stone", "magic", "happy_duration", "happiness_boost",
+        "settlers", "buildings", "nodes", "housing_dirty", "deleted_node_ids", "dirty", "ledger_mark",
+    )
+
+    def __init__(self, id, name, food=0, wood=0, stone=0, magic=0, happy_duration=0, happiness_boost=1.0):
+        self.id = id
+        self.name = name
+        self.food = food
+        self.wood = wood
+        self.stone = stone
+        self.magic = magic
+        self.happy_duration = happy_duration
+        self.happiness_boost = happiness_boost
+        self.settlers = {}
+        self.buildings = {}
+        self.nodes = {}
+        self.housing_dirty = True
+        self.deleted_node_ids = []
+        self.dirty = False
+        # Highest resource ledger delta included in the balances (core.ledger), if any.
+        self.ledger_mark = None
+
+    def living(self):
+        return [s for s in self.settlers.values() if s.alive]
+
+
+class TickContext:
+    """
+    Per-tick inputs shared by every settlement: tick, season, modifiers and the RNG used
+    for recruitment. `next_temp_id` hands out negative ids for settlers created in memory.
+    """
+    __slots__ = ("tick_count", "season", "production", "consumption", "rng", "_temp_id")
+
+    def __init__(self, tick_count, season, rng=None):
+        self.tick_count = tick_count
+        self.season = season
+        modifiers = SEASON_MODIFIERS.get(season, {})
+        self.production = modifiers.get("production", 1.0)
+        self.consumption = modifiers.get("consumption", 1.0)
+        self.rng = rng or random.Random()
+        self._temp_id = 0
+
+    def next_temp_id(self):
+        self._temp_id -= 1
+        return self._temp_id
+
+    def advance(self):
+        """
+        Moves to the next tick, rotating the season like GameState does.
+        """
+        self.tick_count += 1
+        if self.tick_count % SEASON_CHANGE_TICKS == 0:
+            try:
+                index = SEASONS.index(self.season)
+            except ValueError:
+                index = 0
+            self.season = SEASONS[(index + 1) % len(SEASONS)]
+        modifiers = SEASON_MODIFIERS.get(self.season, {})
+        self.production = modifiers.get("production", 1.0)
+        self.consumption = modifiers.get("consumption", 1.0)
+        return self.season
+
+
+# --- Derived Quantities ---
+
+def effective_cap(state):
+    warehouses = sum(1 for b in state.buildings.values() if b.is_constructed and b.building_type == "warehouse")
+    return RESOURCE_CAP + warehouses * WAREHOUSE_BONUS
+
+def worker_counts(state):
+    counts = {}
+    for settler in state.settlers.values():
+        if settler.alive and settler.assigned_building_id is not None:
+            counts[settler.assigned_building_id] = counts.get(settler.assigned_building_id, 0) + 1
+    return counts
+
+def net_rates(state, prod_modifier=1.0, cons_modifier=1.0):
+    """
+    Pure equivalent of Settlement.calculate_net_resource_rates.
+    """
+    totals = {}
+    counts = worker_counts(state)
+    for building in state.buildings.values():
+        workers = counts.get(building.id, 0)
+        if building.is_constructed and workers and building.building_type in PRODUCTION_RATES:
+            for resource, rate in PRODUCTION_RATES[building.building_type].items():
+                totals[resource] = totals.get(resource, 0) + rate * prod_modifier * workers / PRODUCTION_TICK
+    villagers = sum(1 for s in state.settlers.values() if s.status in ("idle", "working"))
+    totals["food"] = totals.get("food", 0) - villagers * (VILLAGER_CONSUMPTION_RATE / FEEDING_TICK * cons_modifier)
+    for node in state.nodes.values():
+        if node.gatherer_id is not None:
+            totals[node.resource_type] = totals.get(node.resource_type, 0) + GATHER_RATES.get(node.resource_type, 1)
+    return totals
+
+def house_vacancies(state):
+    occupancy = {b.id: 0 for b in state.buildings.values() if b.building_type == "house" and b.is_constructed}
+    for settler in state.settlers.values():
+        if settler.alive and settler.housing_id in occupancy:
+            occupancy[settler.housing_id] += 1
+    heap = [(count, house_id) for house_id, count in occupancy.items() if count < HOUSE_CAPACITY]
+    heapq.heapify(heap)
+    return heap, len(occupancy)
+
+def popularity_index(state):
+    """
+    Pure equivalent of core.population.calculate_popularity_index.
+    """
+    settlers = list(state.settlers.values())
+    if settlers:
+        total = 0.0
+        for s in settlers:
+            mood = max(0, 1.0 - (s.hunger / MAX_HUNGER_FOR_MOOD))
+            total += mood * 0.8 if s.mood == "sick" else mood
+        avg_mood = total / len(settlers)
+    else:
+        avg_mood = 1.0
+    effective_food = state.food + net_rates(state).get("food", 0) * FOOD_NET_FACTOR
+    food_surplus = max(effective_food - FOOD_BASELINE, 0) / FOOD_BASELINE
+    houses = sum(1 for b in state.buildings.values() if b.building_type == "house" and b.is_constructed)
+    capacity = houses * HOUSE_CAPACITY
+    if capacity == 0:
+        housing_factor = 0
+    else:
+        ratio = sum(1 for s in settlers if s.housing_id is not None) / capacity
+        housing_factor = 1.0 if ratio <= 1 else 1.0 / ratio
+    bonus = sum(
+        1 for b in state.buildings.values() if b.building_type in HAPPINESS_BUILDING_TYPES and b.is_constructed
+    ) * DEFAULT_HAPPINESS_BUILDING_BONUS
+    duration_bonus = state.happy_duration * HAPPY_DURATION_FACTOR
+    popularity = (
+        avg_mood * POP_WEIGHT_MOOD + food_surplus * POP_WEIGHT_FOOD
+        + housing_factor * POP_WEIGHT_HOUSING + bonus + duration_bonus
+    )
+    return max(0, min(popularity, 1))
+
+
+# --- Phases ---
+
+def _event(events, state, event_type, description):
+    if events is not None:
+        events.append((state.id, event_type, description))
+
+def run_construction(state, ctx, events):
+    for building in state.buildings.values():
+        if not building.is_constructed and building.completion_tick is not None and building.completion_tick <= ctx.tick_count:
+            building.is_constructed = True
+            building.construction_progress = 100
+            building.dirty = True
+            state.dirty = True
+            label = building.building_type.replace("_", " ").title()
+            _event(events, state, "building_finished", f"{label} finished construction.")
+            if building.building_type == "house":
+                state.housing_dirty = True
+
+def run_housing(state, ctx, events):
+    if not state.housing_dirty:
+        return
+    state.housing_dirty = False
+    heap, _ = house_vacancies(state)
+    if not heap:
+        return
+    for settler in sorted(state.settlers.values(), key=lambda s: s.id):
+        if not heap:
+            break
+        if settler.alive and settler.housing_id is None:
+            count, house_id = heapq.heappop(heap)
+            settler.housing_id = house_id
+            settler.dirty = True
+            _event(events, state, "villager_assigned", f"{settler.name} moved into House")
+            if count + 1 < HOUSE_CAPACITY:
+                heapq.heappush(heap, (count + 1, house_id))
+
+def run_production(state, ctx, events):
+    counts = worker_counts(state)
+    cap = effective_cap(state)
+    for building in state.buildings.values():
+        workers = counts.get(building.id, 0)
+        if not building.is_constructed or not workers or building.building_type not in PRODUCTION_RATES:
+            continue
+        for resource, rate in PRODUCTION_RATES[building.building_type].items():
+            production = int((rate * ctx.production * workers) / PRODUCTION_TICK)
+            setattr(state, resource, min(getattr(state, resource) + production, cap))
+            state.dirty = True
+
+def run_feeding(state, ctx, events):
+    consumption = int(VILLAGER_CONSUMPTION_RATE * ctx.consumption / FEEDING_TICK)
+    for settler in sorted(state.settlers.values(), key=lambda s: s.id):
+        if not settler.alive:
+            continue
+        if state.food >= consumption:
+            state.food -= consumption
+            settler.hunger = 0
+            settler.mood = "content"
+        else:
+            settler.hunger += consumption
+            settler.mood = "hungry"
+            if settler.hunger >= STARVATION_HUNGER:
+                settler.status = "dead"
+                settler.mood = "sick"
+                state.housing_dirty = True
+                _event(events, state, "villager_dead",
+                       f"Villager {settler.name} died of starvation (hunger {settler.hunger}).")
+        settler.dirty = True
+    state.dirty = True
+
+def run_aging(state, ctx, events):
+    for settler in state.settlers.values():
+        if not settler.alive:
+            continue
+        if settler.assigned_building_id is not None:
+            settler.experience += EXPERIENCE_GAIN_PER_TICK
+            settler.dirty = True
+        if settler.birth_tick is None:
+            settler.birth_tick = ctx.tick_count
+            settler.death_tick = ctx.tick_count + MAX_VILLAGER_AGE
+            settler.dirty = True
+        if settler.death_tick is not None and settler.death_tick <= ctx.tick_count:
+            settler.status = "dead"
+            settler.mood = "sick"
+            settler.dirty = True
+            state.housing_dirty = True
+            _event(events, state, "villager_dead",
+                   f"Villager {settler.name} died of old age (age {ctx.tick_count - settler.birth_tick}).")
+
+def run_lifecycle(state, ctx, events):
+    run_aging(state, ctx, events)
+
+    # Happiness, as in apply_happiness_effects.
+    popularity = popularity_index(state)
+    state.happy_duration = state.happy_duration + 1 if popularity >= 0.7 else 0
+    if popularity >= 0.8:
+        state.happiness_boost = 1.1
+    elif popularity < 0.4:
+        state.happiness_boost = 0.9
+    else:
+        state.happiness_boost = 1.0
+    state.dirty = True
+
+    # Recruitment, as in process_villager_recruitment.
+    popularity = popularity_index(state)
+    if popularity < RECRUITMENT_THRESHOLD:
+        return
+    heap, _ = house_vacancies(state)
+    if not heap:
+        return
+    effective_food = state.food + net_rates(state).get("food", 0) * FOOD_NET_FACTOR
+    if effective_food <= 100:
+        return
+    probability = max(0, min(popularity - RECRUITMENT_THRESHOLD + state.happy_duration * HAPPY_DURATION_FACTOR, 1))
+    if ctx.rng.random() < probability:
+        settler = SettlerRec(ctx.next_temp_id(), ctx.rng.choice(VILLAGER_NAMES), housing_id=heap[0][1])
+        settler.dirty = True
+        state.settlers[settler.id] = settler
+        state.housing_dirty = True
+        _event(events, state, "villager_recruited",
+               f"New settler {settler.name} recruited (popularity: {popularity}).")
+
+def run_gathering(state, ctx, events):
+    for node in list(state.nodes.values()):
+        if node.gatherer_id is None:
+            continue
+        rate = GATHER_RATES.get(node.resource_type, 1)
+        node.quantity = max(node.quantity_at(ctx.tick_count) - rate, 0)
+        node.last_harvest_tick = ctx.tick_count
+        node.dirty = True
+        setattr(state, node.resource_type, min(getattr(state, node.resource_type) + rate, RESOURCE_CAP))
+        state.dirty = True
+        if node.quantity == 0:
+            _event(events, state, "resource_depleted", f"{node.name} has been depleted.")
+            gatherer = state.settlers.get(node.gatherer_id)
+            if gatherer is not None:
+                gatherer.node_id = None
+                gatherer.status = "idle"
+                gatherer.dirty = True
+            del state.nodes[node.id]
+            state.deleted_node_ids.append(node.id)
+
+
+def simulate_tick(state, ctx, events=None):
+    """
+    Advances one settlement by one tick (ctx.tick_count is the tick being processed).
+    Events are appended to `events` as (settlement_id, event_type, description).
+    """
+    run_construction(state, ctx, events)
+    run_housing(state, ctx, events)
+    if ctx.tick_count % PRODUCTION_TICK == 0:
+        run_production(state, ctx, events)
+        run_feeding(state, ctx, events)
+        run_lifecycle(state, ctx, events)
+        run_gathering(state, ctx, events)
+
+
+# --- Multi-Tick Catch-Up ---
+
+def _signature(state):
+    """
+    Everything a tick can change except the quantities that grow linearly in a steady
+    state (happy_duration, experience, node harvest ticks).
+    """
+    return (
+        state.food, state.wood, state.stone, state.magic, state.happiness_boost,
+        tuple(sorted((s.id, s.status, s.mood, s.hunger, s.housing_id, s.node_id) for s in state.settlers.values())),
+        tuple(sorted((n.id, n.quantity, n.gatherer_id) for n in state.nodes.values())),
+        tuple(sorted(b.id for b in state.buildings.values() if b.is_constructed)),
+    )
+
+def _can_recruit(state):
+    if popularity_index(state) < RECRUITMENT_THRESHOLD:
+        return False
+    heap, _ = house_vacancies(state)
+    if not heap:
+        return False
+    return state.food + net_rates(state).get("food", 0) * FOOD_NET_FACTOR > 100
+
+def _next_scheduled_tick(state, after_tick):
+    ticks = [
+        b.completion_tick for b in state.buildings.values()
+        if not b.is_constructed and b.completion_tick is not None and b.completion_tick > after_tick
+    ]
+    for s in state.settlers.values():
+        if s.alive:
+            if s.death_tick is None:
+                return after_tick + 1
+            ticks.append(s.death_tick)
+    return min(ticks) if ticks else None
+
+def catch_up(state, ctx, to_tick, events=None):
+    """
+    Advances `state` from ctx.tick_count to `to_tick`. Ticks are simulated one by one
+    until a full season cycle leaves the settlement unchanged (apart from linearly growing
+    counters) with nothing scheduled and no chance of recruitment; whole cycles are then
+    skipped in closed form up to the next scheduled event. Returns the number of ticks
+    actually simulated.
+    """
+    period = SEASON_CHANGE_TICKS * len(SEASONS)
+    simulated = 0
+    marker = None
+    while ctx.tick_count < to_tick:
+        if ctx.tick_count % period == 0:
+            signature = _signature(state)
+            linear = {
+                "happy_duration": state.happy_duration,
+                "experience": {s.id: s.experience for s in state.settlers.values()},
+            }
+            if marker is not None and marker[0] == signature and not _can_recruit(state):
+                happy_delta = state.happy_duration - marker[1]["happy_duration"]
+                if happy_delta == period // PRODUCTION_TICK or state.happy_duration == marker[1]["happy_duration"] == 0:
+                    limit = to_tick
+                    scheduled = _next_scheduled_tick(state, ctx.tick_count)
+                    if scheduled is not None:
+                        limit = min(limit, scheduled - 1)
+                    cycles = (limit - ctx.tick_count) // period
+                    if cycles > 0:
+                        jump = cycles * period
+                        state.happy_duration += happy_delta * cycles
+                        for settler in state.settlers.values():
+                            gained = settler.experience - marker[1]["experience"].get(settler.id, settler.experience)
+                            if gained:
+                                settler.experience += gained * cycles
+                                settler.dirty = True
+                        for node in state.nodes.values():
+                            if node.gatherer_id is not None and node.last_harvest_tick is not None:
+                                node.last_harvest_tick += jump
+                                node.dirty = True
+                        state.dirty = True
+                        # Whole cycles: the season is unchanged.
+                        ctx.tick_count += jump
+                        continue
+            marker = (signature, linear)
+        ctx.advance()
+        simulate_tick(state, ctx, events)
+        simulated += 1
+    return simulated
@@ -0,0 +1,234 @@
+# core/single_flight.py
+# Request coalescing for read views. Right after a tick every open client polls the same
+# endpoints at once; identical concurrent requests (same path and query, same user, same
+# tick of the settlement's realm) wait for one in-flight computation and share its
+# response bytes. Within a process
+# this uses an in-flight table (threads under WSGI, futures under ASGI). With
+# SINGLE_FLIGHT_SHARED, processes also coordinate through a lock and a short-lived result
+# in the cache backend.
+import asyncio
+import logging
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import HttpResponse
+
+from core.game_clock import DEFAULT_REALM_ID, get_clock, aget_clock, realm_from_request
+from core.metrics import register_metric
+from core.models import Settlement
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+SINGLE_FLIGHT_ENABLED = getattr(settings, 'SINGLE_FLIGHT_ENABLED', True)
+# Coordinate across worker processes through the cache (needs a shared cache such as Redis).
+SINGLE_FLIGHT_SHARED = getattr(settings, 'SINGLE_FLIGHT_SHARED', False)
+# Longest a follower waits for the leader before computing the response itself.
+SINGLE_FLIGHT_TIMEOUT = getattr(settings, 'SINGLE_FLIGHT_TIMEOUT', 5.0)
+SINGLE_FLIGHT_RESULT_TTL = getattr(settings, 'SINGLE_FLIGHT_RESULT_TTL', 2)
+SINGLE_FLIGHT_POLL_INTERVAL = getattr(settings, 'SINGLE_FLIGHT_POLL_INTERVAL', 0.02)
+
+_inflight = {}
+_ainflight = {}
+_lock = threading.Lock()
+_stats = {"leaders": 0, "followers": 0, "shared_hits": 0, "timeouts": 0}
+
+
+def _count(name):
+    _stats[name] += 1
+
+
+def _settlement_realm(kwargs):
+    # Settlement views are keyed on the settlement's own realm, so shared results roll over
+    # with that realm's ticks whatever the client passes as ?realm=.
+    return Settlement.objects.filter(id=kwargs["id"]).values_list("realm_id", flat=True)
+
+
+def _flight_realm(request, kwargs):
+    if "id" in kwargs:
+        return _settlement_realm(kwargs).first() or DEFAULT_REALM_ID
+    return realm_from_request(request) or DEFAULT_REALM_ID
+
+
+async def _aflight_realm(request, kwargs):
+    if "id" in kwargs:
+        return await _settlement_realm(kwargs).afirst() or DEFAULT_REALM_ID
+    return realm_from_request(request) or DEFAULT_REALM_ID
+
+
+def _flight_key(request, tick_count):
+    user_id = getattr(getattr(request, "user", None), "id", None)
+    return f"coa:sf:{tick_count}:{user_id}:{request.get_full_path()}"
+
+
+def _pack(response):
+    return (response.status_code, response.content, response.get("Content-Type"))
+
+
+def _unpack(result):
+    status, content, content_type = result
+    # Every waiter gets its own response object; middleware mutates headers.
+    return HttpResponse(content, status=status, content_type=content_type)
+
+
+class _Flight:
+    __slots__ = ("event", "result")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+# --- Cross-process coordination ---
+
+def _compute_shared(key, compute):
+    if not SINGLE_FLIGHT_SHARED:
+        return compute()
+    result_key, lock_key = f"{key}:result", f"{key}:lock"
+    result = cache.get(result_key)
+    if result is not None:
+        _count("shared_hits")
+        return _unpack(result)
+    if not cache.add(lock_key, 1, int(SINGLE_FLIGHT_TIMEOUT) + 1):
+        deadline = time.monotonic() + SINGLE_FLIGHT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+            result = cache.get(result_key)
+            if result is not None:
+                _count("shared_hits")
+                return _unpack(result)
+            if not cache.get(lock_key):
+                break
+        return compute()
+    try:
+        response = compute()
+        if response.status_code == 200:
+            cache.set(result_key, _pack(response), SINGLE_FLIGHT_RESULT_TTL)
+        return response
+    finally:
+        cache.delete(lock_key)
+
+
+async def _acompute_shared(key, compute):
+    if not SINGLE_FLIGHT_SHARED:
+        return await compute()
+    result_key, lock_key = f"{key}:result", f"{key}:lock"
+    result = await cache.aget(result_key)
+    if result is not None:
+        _count("shared_hits")
+        return _unpack(result)
+    if not await cache.aadd(lock_key, 1, int(SINGLE_FLIGHT_TIMEOUT) + 1):
+        deadline = time.monotonic() + SINGLE_FLIGHT_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+            result = await cache.aget(result_key)
+            if result is not None:
+                _count("shared_hits")
+                return _unpack(result)
+            if not await cache.aget(lock_key):
+                break
+        return await compute()
+    try:
+        response = await compute()
+        if response.status_code == 200:
+            await cache.aset(result_key, _pack(response), SINGLE_FLIGHT_RESULT_TTL)
+        return response
+    finally:
+        await cache.adelete(lock_key)
+
+
+# --- In-process coalescing ---
+
+def _run_sync(key, compute):
+    with _lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+    if not leader:
+        _count("followers")
+        if flight.event.wait(SINGLE_FLIGHT_TIMEOUT) and flight.result is not None:
+            return _unpack(flight.result)
+        _count("timeouts")
+        return compute()
+    _count("leaders")
+    try:
+        response = _compute_shared(key, compute)
+        flight.result = _pack(response)
+        return response
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        flight.event.set()
+
+
+async def _run_async(key, compute):
+    future = _ainflight.get(key)
+    if future is not None:
+        _count("followers")
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), SINGLE_FLIGHT_TIMEOUT)
+        except asyncio.TimeoutError:
+            result = None
+        if result is not None:
+            return _unpack(result)
+        _count("timeouts")
+        return await compute()
+    _count("leaders")
+    future = _ainflight[key] = asyncio.get_running_loop().create_future()
+    result = None
+    try:
+        response = await _acompute_shared(key, compute)
+        result = _pack(response)
+        return response
+    finally:
+        # On failure followers get None and compute the response themselves.
+        _ainflight.pop(key, None)
+        future.set_result(result)
+
+
+def single_flight(view_func):
+    """
+    Coalesces identical concurrent requests to a read view. Apply it below the auth
+    decorator so the requesting user is part of the key. Works on sync and async views.
+    """
+    if not SINGLE_FLIGHT_ENABLED:
+        return view_func
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _wrapped_async(request, *args, **kwargs):
+            if request.method != "GET":
+                return await view_func(request, *args, **kwargs)
+            try:
+                clock = await aget_clock(await _aflight_realm(request, kwargs))
+            except ObjectDoesNotExist:
+                return await view_func(request, *args, **kwargs)
+            return await _run_async(
+                _flight_key(request, clock.tick_count), lambda: view_func(request, *args, **kwargs)
+            )
+        return _wrapped_async
+
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        if request.method != "GET":
+            return view_func(request, *args, **kwargs)
+        try:
+            clock = get_clock(_flight_realm(request, kwargs))
+        except ObjectDoesNotExist:
+            return view_func(request, *args, **kwargs)
+        key = _flight_key(request, clock.tick_count)
+        return _run_sync(key, lambda: view_func(request, *args, **kwargs))
+    return _wrapped
+
+
+def single_flight_stats():
+    return dict(_stats, in_flight=len(_inflight) + len(_ainflight))
+
+
+register_metric("single_flight", single_flight_stats)
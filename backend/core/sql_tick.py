@@ -0,0 +1,234 @@
+# core/sql_tick.py
+# Set-based tick phases (runapscheduler --engine sql). Construction, production, feeding
+# and aging run as a handful of statements per realm inside Postgres instead of a
+# load-modify-save loop per row, with the same rules as the pure simulation core:
+#   - production sums each settlement's per-building output (truncated per building, as
+#     the Python engines do) and clamps once at the warehouse-adjusted cap;
+#   - feeding ranks living settlers by id and feeds the first floor(food / consumption),
+#     which is what the sequential loop does;
+#   - events are inserted by the same statements that change the rows.
+# Happiness, recruitment (RNG), housing and gathering stay on the ORM path. Statements
+# use UPDATE ... FROM, FILTER and data-modifying CTEs, so this module needs PostgreSQL.
+# `manage.py sqltickcheck` validates it against core.simulation on generated worlds.
+import logging
+
+from django.db import connection
+
+from core.config import (
+    PRODUCTION_RATES,
+    PRODUCTION_TICK,
+    RESOURCE_CAP,
+    WAREHOUSE_BONUS,
+    VILLAGER_CONSUMPTION_RATE,
+    FEEDING_TICK,
+    EXPERIENCE_GAIN_PER_TICK,
+    SEASON_MODIFIERS,
+)
+from core.models import Building, EventLog, Settlement, Settler
+from core.scheduling import schedule_new_settlers
+from core.simulation import RESOURCES, STARVATION_HUNGER
+
+logger = logging.getLogger(__name__)
+
+
+def _tables():
+    quote = connection.ops.quote_name
+    return {
+        "settlement": quote(Settlement._meta.db_table),
+        "settler": quote(Settler._meta.db_table),
+        "building": quote(Building._meta.db_table),
+        "event": quote(EventLog._meta.db_table),
+    }
+
+
+# Ticking settlements of one realm, as in Settlement.objects.ticking().
+_TICKING = """
+    SELECT id FROM {settlement}
+    WHERE owner_id IS NOT NULL AND deleted_at IS NULL AND simulated_tick IS NULL AND realm_id = %s
+"""
+
+
+def _ticking(realm_id, settlement_ids):
+    """
+    The {ticking} subquery and its parameters, limited to `settlement_ids` (one chunk of
+    a chunked tick) if given.
+    """
+    if settlement_ids is None:
+        return _TICKING, [realm_id]
+    return _TICKING + " AND id = ANY(%s)", [realm_id, list(settlement_ids)]
+
+
+def _execute(sql, params, ticking=_TICKING):
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(ticking=ticking.format(**_tables()), **_tables()), params)
+        return cursor.fetchall() if cursor.description else cursor.rowcount
+
+
+def supported():
+    return connection.vendor == "postgresql"
+
+
+def complete_construction(tick_count, realm_id, settlement_ids=None):
+    """
+    Finishes every building whose completion tick has arrived and logs its
+    building_finished event. Returns the ids of settlements that gained a house.
+    """
+    ticking, ticking_params = _ticking(realm_id, settlement_ids)
+    labels = " ".join(
+        f"WHEN '{value}' THEN '{label}'" for value, label in Building.BUILDING_TYPES
+    )
+    rows = _execute(
+        f"""
+        WITH finished AS (
+            UPDATE {{building}} b SET construction_progress = 100, is_constructed = TRUE
+            WHERE b.settlement_id IN ({{ticking}}) AND NOT b.is_constructed AND b.completion_tick <= %s
+            RETURNING b.settlement_id, b.building_type
+        ), logged AS (
+            INSERT INTO {{event}} (settlement_id, event_type, description, timestamp)
+            SELECT settlement_id, 'building_finished',
+                   (CASE building_type {labels} ELSE building_type END) || ' finished construction.', NOW()
+            FROM finished
+        )
+        SELECT settlement_id, COUNT(*), COUNT(*) FILTER (WHERE building_type = 'house')
+        FROM finished GROUP BY settlement_id
+        """,
+        [*ticking_params, tick_count],
+        ticking,
+    )
+    finished = sum(row[1] for row in rows)
+    if finished:
+        logger.info(f"{finished} buildings finished construction")
+    return [settlement_id for settlement_id, _, houses in rows if houses]
+
+
+def produce(current_season, realm_id, settlement_ids=None):
+    """
+    Adds every constructed, staffed production building's output to its settlement.
+    Returns the number of settlements updated.
+    """
+    prod_modifier = float(SEASON_MODIFIERS.get(current_season, {}).get("production", 1.0))
+    rates = [(building_type, resource, rate)
+             for building_type, outputs in PRODUCTION_RATES.items()
+             for resource, rate in outputs.items()]
+    if not rates:
+        return 0
+    values = ", ".join(["(%s, %s, %s::double precision)"] * len(rates))
+    sums = ", ".join(f"SUM(amount) FILTER (WHERE resource = '{r}') AS {r}" for r in RESOURCES)
+    assignments = ", ".join(
+        f"{r} = CASE WHEN p.{r} IS NULL THEN s.{r} ELSE LEAST(s.{r} + p.{r}, p.cap) END" for r in RESOURCES
+    )
+    ticking, ticking_params = _ticking(realm_id, settlement_ids)
+    params = [value for rate in rates for value in rate]
+    params += [*ticking_params, prod_modifier, float(PRODUCTION_TICK), RESOURCE_CAP, WAREHOUSE_BONUS]
+    return _execute(
+        f"""
+        WITH rates (building_type, resource, rate) AS (VALUES {values}),
+        ticking AS ({{ticking}}),
+        workers AS (
+            SELECT assigned_building_id AS building_id, COUNT(*) AS n FROM {{settler}}
+            WHERE status <> 'dead' AND assigned_building_id IS NOT NULL
+            GROUP BY assigned_building_id
+        ),
+        produced AS (
+            SELECT b.settlement_id, r.resource, TRUNC(r.rate * %s * w.n / %s)::integer AS amount
+            FROM {{building}} b
+            JOIN ticking t ON t.id = b.settlement_id
+            JOIN workers w ON w.building_id = b.id
+            JOIN rates r ON r.building_type = b.building_type
+            WHERE b.is_constructed
+        ),
+        totals AS (
+            SELECT p.settlement_id, {sums},
+                   %s + %s * (SELECT COUNT(*) FROM {{building}} wh
+                              WHERE wh.settlement_id = p.settlement_id
+                                AND wh.building_type = 'warehouse' AND wh.is_constructed) AS cap
+            FROM produced p GROUP BY p.settlement_id
+        )
+        UPDATE {{settlement}} s SET {assignments}, last_updated = NOW()
+        FROM totals p WHERE s.id = p.settlement_id
+        """,
+        params,
+        ticking,
+    )
+
+
+def feed(current_season, realm_id, settlement_ids=None):
+    """
+    Feeds living settlers in id order while each settlement's food lasts; the rest go
+    hungry and starve at STARVATION_HUNGER. Returns the ids of settlements with deaths.
+    """
+    cons_modifier = SEASON_MODIFIERS.get(current_season, {}).get("consumption", 1.0)
+    consumption = int(VILLAGER_CONSUMPTION_RATE * cons_modifier / FEEDING_TICK)
+    ticking, ticking_params = _ticking(realm_id, settlement_ids)
+    rows = _execute(
+        """
+        WITH ranked AS (
+            SELECT s.id, s.settlement_id, t.food,
+                   ROW_NUMBER() OVER (PARTITION BY s.settlement_id ORDER BY s.id) AS position
+            FROM {settler} s JOIN {settlement} t ON t.id = s.settlement_id
+            WHERE s.status <> 'dead' AND s.settlement_id IN ({ticking})
+        ),
+        plan AS (
+            SELECT id, settlement_id, food >= position * %s AS fed FROM ranked
+        ),
+        fed_settlers AS (
+            UPDATE {settler} s SET
+                hunger = CASE WHEN p.fed THEN 0 ELSE s.hunger + %s END,
+                mood = CASE WHEN p.fed THEN 'content' WHEN s.hunger + %s >= %s THEN 'sick' ELSE 'hungry' END,
+                status = CASE WHEN NOT p.fed AND s.hunger + %s >= %s THEN 'dead' ELSE s.status END
+            FROM plan p WHERE s.id = p.id
+            RETURNING s.settlement_id, s.name, s.hunger, s.status = 'dead' AS starved
+        ),
+        eaten AS (
+            UPDATE {settlement} t SET food = t.food - %s * x.n, last_updated = NOW()
+            FROM (SELECT settlement_id, COUNT(*) AS n FROM plan WHERE fed GROUP BY settlement_id) x
+            WHERE t.id = x.settlement_id
+        ),
+        logged AS (
+            INSERT INTO {event} (settlement_id, event_type, description, timestamp)
+            SELECT settlement_id, 'villager_dead',
+                   'Villager ' || name || ' died of starvation (hunger ' || hunger || ').', NOW()
+            FROM fed_settlers WHERE starved
+        )
+        SELECT DISTINCT settlement_id FROM fed_settlers WHERE starved
+        """,
+        [*ticking_params, consumption, consumption, consumption, STARVATION_HUNGER,
+         consumption, STARVATION_HUNGER, consumption],
+        ticking,
+    )
+    return [row[0] for row in rows]
+
+
+def age(tick_count, realm_id, settlement_ids=None):
+    """
+    Experience for working settlers, birth/death ticks for new ones and deaths of old
+    age. Returns the ids of settlements with deaths.
+    """
+    ticking, ticking_params = _ticking(realm_id, settlement_ids)
+    _execute(
+        """
+        UPDATE {settler} SET experience = experience + %s
+        WHERE status <> 'dead' AND assigned_building_id IS NOT NULL AND settlement_id IN ({ticking})
+        """,
+        [EXPERIENCE_GAIN_PER_TICK, *ticking_params],
+        ticking,
+    )
+    schedule_new_settlers(tick_count, realm_id, settlement_ids)
+    rows = _execute(
+        """
+        WITH died AS (
+            UPDATE {settler} SET status = 'dead', mood = 'sick'
+            WHERE status <> 'dead' AND death_tick <= %s AND settlement_id IN ({ticking})
+            RETURNING settlement_id, name, birth_tick
+        ), logged AS (
+            INSERT INTO {event} (settlement_id, event_type, description, timestamp)
+            SELECT settlement_id, 'villager_dead',
+                   'Villager ' || name || ' died of old age (age ' || (%s - birth_tick) || ').', NOW()
+            FROM died
+        )
+        SELECT DISTINCT settlement_id FROM died
+        """,
+        [tick_count, *ticking_params, tick_count],
+        ticking,
+    )
+    return [row[0] for row in rows]
@@ -1,3 +1,748 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.utils import OperationalError
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core import (actions, async_views, db, game_clock, ledger, memory_watch, population, purge, single_flight,
+                  tick_chunks, tick_queue, views, world_snapshot)
+from core.checks import check_replica_pin_cache
+from core.config import SEASON_CHANGE_TICKS, SEASONS
+from core.db_router import PrimaryReplicaRouter, ReplicaRoutingMiddleware, replica_read
+from core.decorators import CachedUser, authenticate_request
+from core.forecast import FORECAST_MAX_POINTS, forecast, forecast_scenarios
+from core.game_clock import ClockSnapshot, FileClockStore, season_modifiers
+from core.graveyard import bury
+from core.models import (Building, GameState, Grave, MapTile, PendingAction, ResourceDelta, ResourceNode, Settlement,
+                         Settler, TickBatch, TickCursor)
+from core.occupancy import get_grid
+from core.scheduling import MAX_PROJECTION_TICKS, project_construction
+from core.settlement_pool import claim_settlement, materialize_settlement, pool_depth, refill_pool
+from core.simulation import SettlementRec
+from core.single_flight import _aflight_realm, _flight_realm
+from core.tiering import catch_up_settlement, ensure_caught_up, sweep_dormant, update_tiers
+from core.token_cache import TokenCache, token_cache
+from core.world import World
+
+
+def make_realm(tick_count=0):
+    return GameState.objects.create(name=f"Test {GameState.objects.count()}", tick_count=tick_count,
+                                    current_season=SEASONS[0])
+
+
+def make_settlement(realm, name="Testburg", **fields):
+    owner = User.objects.create_user(username=f"{name}-{Settlement.objects.count()}")
+    return Settlement.objects.create(name=name, owner=owner, realm=realm, **fields)
+
+
+def make_clock(tick_count=0):
+    return ClockSnapshot(tick_count, SEASONS[0], season_modifiers(SEASONS[0]), 0.0)
+
+
+class GathererReassignmentTests(TestCase):
+    def setUp(self):
+        self.settlement = make_settlement(make_realm())
+        tile = MapTile.objects.create(settlement=self.settlement, coordinate_x=0, coordinate_y=0,
+                                      terrain_type="forest")
+        self.node = ResourceNode.objects.create(name="Old Oak", resource_type="wood", map_tile=tile)
+        self.mill = Building.objects.create(settlement=self.settlement, building_type="lumber_mill",
+                                            is_constructed=True, coordinate_x=1, coordinate_y=1)
+        self.settler = Settler.objects.create(settlement=self.settlement, name="Ada", status="gathering",
+                                              gathering_resource_node=self.node)
+        self.node.gatherer = self.settler
+        self.node.save()
+
+    def assert_released(self):
+        self.node.refresh_from_db()
+        self.settler.refresh_from_db()
+        self.assertIsNone(self.node.gatherer_id)
+        self.assertIsNone(self.settler.gathering_resource_node_id)
+        self.assertEqual(self.settler.status, "working")
+        self.assertEqual(self.settler.assigned_building_id, self.mill.id)
+
+    def test_assign_villager_releases_node(self):
+        actions.assign_villager(self.settlement, {"building_id": self.mill.id, "settler_id": self.settler.id},
+                                make_clock())
+        self.assert_released()
+
+    def test_batch_assign_villager_releases_node(self):
+        payload, _ = actions.apply_batch(self.settlement, [
+            {"type": "assign_villager", "building_id": self.mill.id, "settler_id": self.settler.id},
+        ], make_clock())
+        self.assertEqual(payload["applied"], 1)
+        self.assert_released()
+
+
+class GridCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.settlement = make_settlement(make_realm(), wood=500, stone=500)
+        MapTile.objects.create(settlement=self.settlement, coordinate_x=2, coordinate_y=3, terrain_type="grass")
+
+    def test_rolled_back_placement_is_not_cached(self):
+        class Abort(Exception):
+            pass
+
+        with self.assertRaises(Abort):
+            with transaction.atomic():
+                actions.place_building(self.settlement, {"building_type": "house", "tile_x": 2, "tile_y": 3},
+                                       make_clock())
+                raise Abort
+        self.assertFalse(get_grid(self.settlement).is_occupied(2, 3))
+
+    def test_committed_placement_is_cached(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            actions.place_building(self.settlement, {"building_type": "house", "tile_x": 2, "tile_y": 3},
+                                   make_clock())
+        Building.objects.filter(settlement=self.settlement).delete()
+        self.assertTrue(get_grid(self.settlement).is_occupied(2, 3))
+
+
+class ConstructionProjectionTests(TestCase):
+    def test_projection_bound_covers_the_slowest_start(self):
+        year = len(SEASONS) * SEASON_CHANGE_TICKS
+        for start in range(year):
+            completion = project_construction(0, start, 0, SEASONS[0])
+            self.assertIsNotNone(completion)
+            self.assertLessEqual(completion - start, MAX_PROJECTION_TICKS)
+
+
+class TickCursorTests(TestCase):
+    def setUp(self):
+        self.realm = make_realm(tick_count=1)
+        self.ids = [make_settlement(self.realm, name=f"Town {i}").id for i in range(5)]
+        tick_chunks.start_tick(self.realm.id, 1)
+
+    def test_resumes_after_last_committed_chunk(self):
+        seen = []
+
+        def failing(settlement_ids):
+            if self.ids[2] in settlement_ids:
+                raise RuntimeError("scheduler died")
+            seen.append(settlement_ids)
+
+        with self.assertRaises(RuntimeError):
+            tick_chunks.run_phase(self.realm.id, 1, "construction", failing, chunk_size=2)
+        cursor = TickCursor.objects.get(realm=self.realm)
+        self.assertEqual((cursor.phase, cursor.after_settlement_id), ("construction", self.ids[1]))
+
+        resumed = []
+        chunks = tick_chunks.run_phase(self.realm.id, 1, "construction", resumed.append, chunk_size=2)
+        self.assertEqual(chunks, 2)
+        self.assertEqual(seen + resumed, [self.ids[0:2], self.ids[2:4], self.ids[4:]])
+        self.assertEqual(TickCursor.objects.get(realm=self.realm).phase, "housing")
+
+    def test_finished_phase_is_skipped(self):
+        tick_chunks.run_phase(self.realm.id, 1, "construction", lambda ids: None)
+        rerun = []
+        self.assertEqual(tick_chunks.run_phase(self.realm.id, 1, "construction", rerun.append), 0)
+        self.assertEqual(rerun, [])
+
+
+class LedgerTests(TestCase):
+    def test_replay_clamps_gains_to_their_cap(self):
+        balance = ledger.replay({"wood": 90, "food": 10}, [("wood", 20, 100), ("food", -30, None)])
+        self.assertEqual(balance, {"wood": 100, "food": -20})
+
+    def test_replay_does_not_clamp_spending(self):
+        balance = ledger.replay({"wood": 150}, [("wood", -20, 100), ("wood", 5, 200)])
+        self.assertEqual(balance, {"wood": 135})
+
+    @mock.patch("core.ledger.RESOURCE_LEDGER_MODE", True)
+    def test_fold_writes_balances_and_drops_deltas(self):
+        settlement = make_settlement(make_realm(), wood=95, stone=10)
+        ledger.record([
+            ledger.delta(settlement.id, "wood", 10, "production", cap=100),
+            ledger.delta(settlement.id, "stone", -4, "build"),
+            ledger.delta(settlement.id, "food", 0, "feeding"),
+        ])
+        self.assertEqual(ledger.balances([settlement.id])[settlement.id]["wood"], 100)
+        self.assertEqual(ledger.fold(), 2)
+        settlement.refresh_from_db()
+        self.assertEqual((settlement.wood, settlement.stone), (100, 6))
+        self.assertFalse(ResourceDelta.objects.exists())
+
+
+class TickQueueTests(TestCase):
+    def setUp(self):
+        self.realm = make_realm(tick_count=1)
+        self.ids = [make_settlement(self.realm, name=f"Town {i}").id for i in range(3)]
+        tick_queue.enqueue_tick(1, SEASONS[0], realm_id=self.realm.id, batch_size=10)
+
+    def expire(self, worker):
+        batch = tick_queue.claim_batch(worker, lease_seconds=30)
+        self.assertEqual(batch.status, "running")
+        return tick_queue.requeue_expired(now=timezone.now() + timedelta(seconds=60))
+
+    def test_expired_lease_is_requeued_then_failed(self):
+        for attempt in range(1, tick_queue.TICK_BATCH_MAX_ATTEMPTS):
+            self.assertEqual(self.expire(f"worker-{attempt}"), (1, 0))
+            batch = TickBatch.objects.get()
+            self.assertEqual((batch.status, batch.attempts, batch.worker), ("pending", attempt, ""))
+        self.assertEqual(self.expire("worker-last"), (0, 1))
+        self.assertEqual(TickBatch.objects.get().status, "failed")
+        self.assertIsNone(tick_queue.claim_batch("worker-idle"))
+
+    def test_live_lease_is_kept(self):
+        tick_queue.claim_batch("worker-1", lease_seconds=30)
+        self.assertEqual(tick_queue.requeue_expired(), (0, 0))
+        self.assertEqual(TickBatch.objects.get().status, "running")
+
+    def test_lost_lease_writes_nothing(self):
+        batch = tick_queue.claim_batch("worker-1", lease_seconds=30)
+        tick_queue.requeue_expired(now=timezone.now() + timedelta(seconds=60))
+        tick_queue.claim_batch("worker-2", lease_seconds=30)
+        self.assertIsNone(tick_queue.run_batch(batch, "worker-1"))
+        self.assertEqual(TickBatch.objects.get().worker, "worker-2")
+
+    def test_distributed_engine_needs_command_queue(self):
+        with mock.patch("core.management.commands.runapscheduler.COMMAND_QUEUE_MODE", False):
+            with self.assertRaisesMessage(CommandError, "COMMAND_QUEUE_MODE"):
+                call_command("runapscheduler", engine="distributed", realm=[str(self.realm.id)])
+
+    def test_failed_batches_are_parked(self):
+        TickBatch.objects.update(status="failed")
+        self.assertEqual(tick_queue.park_failed(1, realm_id=self.realm.id), 3)
+        self.assertEqual(set(Settlement.objects.values_list("simulated_tick", flat=True)), {0})
+
+
+class GraveyardTests(TestCase):
+    def test_bury_archives_dead_and_releases_nodes(self):
+        settlement = make_settlement(make_realm())
+        tile = MapTile.objects.create(settlement=settlement, coordinate_x=0, coordinate_y=0, terrain_type="forest")
+        node = ResourceNode.objects.create(name="Old Oak", resource_type="wood", map_tile=tile)
+        dead = Settler.objects.create(settlement=settlement, name="Bram", status="dead", hunger=100,
+                                      gathering_resource_node=node)
+        node.gatherer = dead
+        node.save()
+        living = Settler.objects.create(settlement=settlement, name="Ada", status="idle")
+
+        self.assertEqual(bury(7, batch_size=1), [dead.id])
+        grave = Grave.objects.get()
+        self.assertEqual((grave.settler_id, grave.cause, grave.died_tick), (dead.id, "starvation", 7))
+        node.refresh_from_db()
+        self.assertIsNone(node.gatherer_id)
+        self.assertEqual(list(Settler.objects.values_list("id", flat=True)), [living.id])
+
+
+class WorldSnapshotTests(TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.unlink, self.path)
+
+    def test_round_trip(self):
+        record = SettlementRec(4, "Testburg", food=50, wood=20, stone=3, magic=1, happy_duration=2,
+                               happiness_boost=1.5)
+        world_snapshot.write_snapshot(12, SEASONS[1], {4: record}, path=self.path)
+        tick_count, season, states = world_snapshot.read_snapshot(self.path)
+        self.assertEqual((tick_count, season, list(states)), (12, SEASONS[1], [4]))
+        loaded = states[4]
+        self.assertEqual(
+            (loaded.name, loaded.food, loaded.wood, loaded.stone, loaded.magic, loaded.happy_duration,
+             loaded.happiness_boost),
+            ("Testburg", 50, 20, 3, 1, 2, 1.5),
+        )
+
+    def test_corrupt_snapshot_is_ignored(self):
+        world_snapshot.write_snapshot(12, SEASONS[1], {4: SettlementRec(4, "Testburg")}, path=self.path)
+        with open(self.path, "r+b") as fh:
+            fh.seek(-1, os.SEEK_END)
+            last = fh.read(1)
+            fh.seek(-1, os.SEEK_END)
+            fh.write(bytes([last[0] ^ 0xFF]))
+        with self.assertLogs("core.world_snapshot", "WARNING"):
+            self.assertIsNone(world_snapshot.read_snapshot(self.path))
+
+
+class SingleFlightRealmTests(TestCase):
+    def test_settlement_views_follow_the_settlement_realm(self):
+        realm = make_realm()
+        settlement = make_settlement(realm)
+        request = RequestFactory().get(f"/api/settlement/{settlement.id}/")
+        self.assertEqual(_flight_realm(request, {"id": settlement.id}), realm.id)
+        self.assertEqual(async_to_sync(_aflight_realm)(request, {"id": settlement.id}), realm.id)
+
+    def test_other_views_use_the_requested_realm(self):
+        request = RequestFactory().get("/api/game_state/", {"realm": "7"})
+        self.assertEqual(_flight_realm(request, {}), 7)
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_concurrent_requests_share_one_compute(self):
+        release, calls, responses = threading.Event(), [], []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return HttpResponse(b"state", content_type="application/json")
+
+        def request():
+            responses.append(single_flight._run_sync("coa:sf:test", compute))
+
+        followers = single_flight._stats["followers"]
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while single_flight._stats["followers"] < followers + 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([response.content for response in responses], [b"state"] * 4)
+        self.assertEqual(len({id(response) for response in responses}), 4)
+
+    @mock.patch("core.single_flight.SINGLE_FLIGHT_SHARED", True)
+    def test_other_workers_reuse_the_shared_result(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return HttpResponse(b"state", content_type="application/json")
+
+        first = single_flight._compute_shared("coa:sf:shared", compute)
+        second = single_flight._compute_shared("coa:sf:shared", compute)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Content-Type"], "application/json")
+
+
+class SchedulerMemoryTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = FileClockStore(os.path.join(directory.name, "clock.json"))
+        patcher = mock.patch("core.memory_watch.get_store", return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_samples_are_stored_apart_from_realm_clocks(self):
+        realm = make_realm()
+        self.store.write({"tick_count": 3}, realm.id)
+        memory_watch.publish({"rss_mb": 12.5}, [realm.id])
+        self.assertEqual(self.store.read(realm.id), {"tick_count": 3})
+        self.assertEqual(memory_watch.scheduler_memory_stats()[realm.id], {"rss_mb": 12.5})
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "The SQL tick phases need PostgreSQL.")
+class SqlTickTests(TestCase):
+    def test_sql_phases_match_the_simulation_core(self):
+        # sqltickcheck raises CommandError listing the mismatches when the engines diverge.
+        out = StringIO()
+        call_command("sqltickcheck", settlements=8, ticks=60, seed=1, stdout=out)
+        self.assertIn("match the simulation core", out.getvalue())
+
+
+class DuplicateBuildingMigrationTests(TransactionTestCase):
+    before = [("core", "0022_alter_pendingaction_action_type")]
+    after = [("core", "0023_building_unique_building_tile_and_more")]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicates_are_removed_and_refunded(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        GameState = apps.get_model("core", "GameState")
+        SettlementModel = apps.get_model("core", "Settlement")
+        BuildingModel = apps.get_model("core", "Building")
+        SettlerModel = apps.get_model("core", "Settler")
+        GameState.objects.get_or_create(pk=1)
+        owner = apps.get_model("auth", "User").objects.create(username="Testburg")
+        settlement = SettlementModel.objects.create(name="Testburg", owner=owner, wood=0, stone=0)
+        kept = BuildingModel.objects.create(settlement=settlement, building_type="house", coordinate_x=1, coordinate_y=1)
+        extra = BuildingModel.objects.create(settlement=settlement, building_type="farmhouse",
+                                             coordinate_x=1, coordinate_y=1)
+        worker = SettlerModel.objects.create(settlement=settlement, name="Ada", status="working",
+                                             assigned_building=extra)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        apps = executor.loader.project_state(self.after).apps
+        self.assertEqual(list(apps.get_model("core", "Building").objects.values_list("id", flat=True)), [kept.id])
+        settlement = apps.get_model("core", "Settlement").objects.get(id=settlement.id)
+        self.assertEqual((settlement.wood, settlement.stone), (30, 10))
+        worker = apps.get_model("core", "Settler").objects.get(id=worker.id)
+        self.assertEqual((worker.status, worker.assigned_building_id), ("idle", None))
+
+
+class ForecastTests(TestCase):
+    def test_long_forecasts_are_sampled_sparsely(self):
+        result = forecast(SettlementRec(1, "Testburg", food=50), 0, SEASONS[0], FORECAST_MAX_POINTS * 10)
+        self.assertLessEqual(len(result["trajectory"]), FORECAST_MAX_POINTS + 1)
+        self.assertEqual(result["trajectory"][-1]["tick"], FORECAST_MAX_POINTS * 10)
+
+    def test_scenarios_run_in_the_process_pool(self):
+        with self.assertNoLogs("core.forecast", "ERROR"):
+            scenarios, _ = forecast_scenarios(SettlementRec(1, "Testburg", food=50), 0, SEASONS[0], 10, range(2))
+        self.assertEqual([scenario["seed"] for scenario in scenarios], [0, 1])
+
+
+class TokenCacheTests(TestCase):
+    def test_entries_expire_with_the_token(self):
+        tokens = TokenCache(max_ttl=300)
+        tokens.put("expired", 1, {"exp": time.time() - 1})
+        tokens.put("valid", 1, {"exp": time.time() + 60})
+        self.assertIsNone(tokens.get("expired"))
+        self.assertEqual(tokens.get("valid")[0], 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        tokens = TokenCache(maxsize=2)
+        tokens.put("a", 1, {})
+        tokens.put("b", 2, {})
+        tokens.get("a")
+        tokens.put("c", 3, {})
+        self.assertIsNone(tokens.get("b"))
+        self.assertEqual((tokens.get("a")[0], tokens.get("c")[0]), (1, 3))
+
+    def test_cached_token_skips_the_user_lookup(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        user = User.objects.create_user(username="Ada")
+        header = f"Bearer {RefreshToken.for_user(user).access_token}"
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=header)
+        self.assertEqual(authenticate_request(request), user)
+        with self.assertNumQueries(0):
+            cached = authenticate_request(RequestFactory().get("/", HTTP_AUTHORIZATION=header))
+        self.assertIsInstance(cached, CachedUser)
+        self.assertEqual(cached.id, user.id)
+
+
+class GameClockTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = FileClockStore(os.path.join(directory.name, "clock.json"))
+        patcher = mock.patch("core.game_clock.get_store", return_value=store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        game_clock._local.clear()
+        self.addCleanup(game_clock._local.clear)
+        self.realm = make_realm(tick_count=3)
+
+    def test_published_clock_is_served_without_the_db(self):
+        game_clock.publish(7, SEASONS[1], self.realm.id)
+        with self.assertNumQueries(0):
+            clock = game_clock.get_clock(self.realm.id)
+        self.assertEqual((clock.tick_count, clock.current_season), (7, SEASONS[1]))
+
+    def test_stale_clock_falls_back_to_the_db(self):
+        game_clock.get_store().write({"tick_count": 7, "current_season": SEASONS[1], "modifiers": {},
+                                      "published_at": time.time() - game_clock.GAME_CLOCK_MAX_STALENESS - 1},
+                                     self.realm.id)
+        self.assertEqual(game_clock.get_clock(self.realm.id).tick_count, 3)
+
+
+class HousingAllocatorTests(TestCase):
+    def setUp(self):
+        population._dirty_housing.clear()
+        self.addCleanup(population._dirty_housing.clear)
+
+    def build_house(self, settlement, x):
+        return Building.objects.create(settlement=settlement, building_type="house", is_constructed=True,
+                                       construction_progress=100, coordinate_x=x, coordinate_y=0)
+
+    def test_homeless_settlers_fill_the_emptiest_house(self):
+        settlement = make_settlement(make_realm())
+        crowded, empty = self.build_house(settlement, 0), self.build_house(settlement, 1)
+        for i in range(3):
+            Settler.objects.create(settlement=settlement, name=f"Housed {i}", housing_assigned=crowded)
+        homeless = [Settler.objects.create(settlement=settlement, name=f"Homeless {i}") for i in range(3)]
+        population.mark_housing_dirty(settlement.id)
+        self.assertEqual(population.process_dirty_housing(), 1)
+        for settler in homeless:
+            settler.refresh_from_db()
+            self.assertEqual(settler.housing_assigned_id, empty.id)
+        self.assertEqual(population._dirty_housing, set())
+
+    def test_other_realms_stay_dirty(self):
+        here, there = make_settlement(make_realm()), make_settlement(make_realm())
+        population.mark_housing_dirty(here.id)
+        population.mark_housing_dirty(there.id)
+        self.assertEqual(population.process_dirty_housing(realm_id=here.realm_id), 1)
+        self.assertEqual(population._dirty_housing, {there.id})
+
+
+class ResourceRegenerationTests(TestCase):
+    def test_quantity_regenerates_in_closed_form(self):
+        node = ResourceNode(quantity=40, max_quantity=100, regen_rate=5, last_harvest_tick=10)
+        self.assertEqual(node.quantity_at(10), 40)
+        self.assertEqual(node.quantity_at(14), 60)
+        self.assertEqual(node.quantity_at(1000), 100)
+
+    def test_unharvested_nodes_stay_full(self):
+        self.assertEqual(ResourceNode(quantity=100, max_quantity=100).quantity_at(50), 100)
+
+    def test_materialize_folds_regeneration_and_restamps(self):
+        node = ResourceNode(quantity=40, max_quantity=100, regen_rate=5, last_harvest_tick=10)
+        self.assertEqual(node.materialize(12), 50)
+        self.assertEqual((node.quantity, node.last_harvest_tick), (50, 12))
+        self.assertEqual(node.quantity_at(13), 55)
+
+
+@mock.patch("core.actions.COMMAND_QUEUE_MODE", True)
+class CommandQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.settlement = make_settlement(make_realm(), wood=500, stone=500)
+        MapTile.objects.create(settlement=self.settlement, coordinate_x=2, coordinate_y=3, terrain_type="grass")
+        self.placement = {"building_type": "house", "tile_x": 2, "tile_y": 3}
+
+    def test_actions_are_applied_at_the_tick_boundary(self):
+        payload, status = actions.submit_action(self.settlement, "place_building", self.placement, make_clock())
+        self.assertEqual((status, payload["status"]), (202, "pending"))
+        self.assertFalse(Building.objects.exists())
+
+        self.assertEqual(actions.drain_action_queue(make_clock(1), self.settlement.realm_id), 1)
+        action = PendingAction.objects.get(id=payload["action_id"])
+        self.assertEqual((action.status, action.applied_tick), ("applied", 1))
+        self.assertTrue(Building.objects.filter(settlement=self.settlement, coordinate_x=2, coordinate_y=3).exists())
+
+    def test_conflicting_action_fails_without_undoing_the_first(self):
+        first, _ = actions.submit_action(self.settlement, "place_building", self.placement, make_clock())
+        second, _ = actions.submit_action(self.settlement, "place_building", self.placement, make_clock())
+        actions.drain_action_queue(make_clock(1))
+        self.assertEqual(PendingAction.objects.get(id=first["action_id"]).status, "applied")
+        self.assertEqual(PendingAction.objects.get(id=second["action_id"]).status, "failed")
+        self.assertEqual(Building.objects.count(), 1)
+
+
+def auth_header(user):
+    return {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+
+class SettlementPoolTests(TestCase):
+    def test_claim_hands_out_a_pooled_settlement(self):
+        owner = User.objects.create_user(username="Ada")
+        self.assertEqual(refill_pool(2), 2)
+        pooled = set(Settlement.objects.pooled().values_list("id", flat=True))
+        settlement_id, from_pool = claim_settlement(owner.id, "Adaburg")
+        self.assertTrue(from_pool)
+        self.assertIn(settlement_id, pooled)
+        self.assertEqual(pool_depth(), 1)
+        settlement = Settlement.objects.get(id=settlement_id)
+        self.assertEqual((settlement.owner_id, settlement.name), (owner.id, "Adaburg"))
+
+    def test_empty_pool_generates_a_settlement(self):
+        owner = User.objects.create_user(username="Ada")
+        settlement_id, from_pool = claim_settlement(owner.id, "Adaburg")
+        self.assertFalse(from_pool)
+        self.assertEqual(Settlement.objects.get(id=settlement_id).owner_id, owner.id)
+
+    def test_create_settlement_with_a_cached_token(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        refill_pool(2)
+        header = auth_header(User.objects.create_user(username="Ada"))
+        for name in ("First", "Second"):
+            response = self.client.post("/api/settlement/create/", {"name": name}, content_type="application/json",
+                                        **header)
+            self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(pool_depth(), 0)
+
+
+class MetricsAccessTests(TestCase):
+    def test_metrics_need_a_staff_token(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 401)
+        player = User.objects.create_user(username="Ada")
+        self.assertEqual(self.client.get("/api/metrics/", **auth_header(player)).status_code, 403)
+        staff = User.objects.create_user(username="Root", is_staff=True)
+        response = self.client.get("/api/metrics/", **auth_header(staff))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("settlement_pool", response.json())
+
+
+@mock.patch("core.purge.PURGE_BATCH_PAUSE", 0)
+class PurgeTests(TestCase):
+    def test_deleted_settlement_is_purged_in_batches(self):
+        owner = User.objects.create_user(username="Ada")
+        doomed = materialize_settlement(owner.id, "Doomed")
+        kept = materialize_settlement(owner.id, "Kept")
+        mill = Building.objects.create(settlement=doomed, building_type="lumber_mill", coordinate_x=0, coordinate_y=0)
+        doomed.settlers.update(assigned_building=mill, status="working")
+        ResourceNode.objects.create(name="Old Oak", resource_type="wood", map_tile=doomed.map_tiles.first(),
+                                    gatherer=doomed.settlers.first())
+        kept_counts = (kept.settlers.count(), kept.map_tiles.count())
+
+        response = self.client.delete(f"/api/settlement/{doomed.id}/delete/", **auth_header(owner))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Settlement.objects.active().filter(id=doomed.id).exists())
+
+        self.assertEqual(purge.purge_deleted_settlements(batch_size=3), 1)
+        self.assertFalse(Settlement.objects.filter(id=doomed.id).exists())
+        self.assertFalse(Settler.objects.filter(settlement_id=doomed.id).exists())
+        self.assertFalse(MapTile.objects.filter(settlement_id=doomed.id).exists())
+        self.assertFalse(ResourceNode.objects.filter(map_tile__settlement_id=doomed.id).exists())
+        self.assertFalse(Building.objects.filter(settlement_id=doomed.id).exists())
+        self.assertEqual((kept.settlers.count(), kept.map_tiles.count()), kept_counts)
+
+
+@mock.patch("core.db.time.sleep")
+class ReconnectTests(TestCase):
+    def fake_connections(self, failures):
+        fake = mock.MagicMock()
+        fake.ensure_connection.side_effect = [OperationalError("server closed the connection")] * failures + [None]
+        return mock.patch("core.db.connections", {"default": fake}), fake
+
+    def test_reconnects_with_backoff(self, sleep):
+        patcher, fake = self.fake_connections(2)
+        with patcher:
+            db.ensure_healthy_connection()
+        self.assertEqual(fake.close.call_count, 2)
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [db.DB_RECONNECT_BACKOFF, db.DB_RECONNECT_BACKOFF * 2])
+
+    def test_gives_up_after_the_last_attempt(self, sleep):
+        patcher, fake = self.fake_connections(db.DB_RECONNECT_ATTEMPTS)
+        with patcher, self.assertRaises(OperationalError):
+            db.ensure_healthy_connection()
+        self.assertEqual(fake.close.call_count, db.DB_RECONNECT_ATTEMPTS)
+
+
+@mock.patch("core.db_router.DATABASE_REPLICAS", ["replica"])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.routed = []
+        self.middleware = ReplicaRoutingMiddleware(self.respond)
+        self.read_view = replica_read(lambda request: None)
+
+    def respond(self, request):
+        # Django calls process_view from inside the middleware chain, before the view.
+        self.middleware.process_view(request, self.view, (), {})
+        self.routed.append(PrimaryReplicaRouter().db_for_read(Settlement))
+        return HttpResponse()
+
+    def send(self, method, view, token="Bearer a"):
+        self.view = view
+        self.middleware(getattr(RequestFactory(), method)("/", HTTP_AUTHORIZATION=token))
+        return self.routed[-1]
+
+    def test_safe_reads_go_to_a_replica(self):
+        self.assertEqual(self.send("get", self.read_view), "replica")
+        self.assertEqual(self.send("get", lambda request: None), "default")
+        self.assertEqual(PrimaryReplicaRouter().db_for_read(Settlement), "default")
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        self.send("post", lambda request: None)
+        self.assertEqual(self.send("get", self.read_view), "default")
+        self.assertEqual(self.send("get", self.read_view, token="Bearer b"), "replica")
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_check_rejects_a_process_local_pin_cache(self):
+        self.assertEqual([error.id for error in check_replica_pin_cache(None)], ["core.E001"])
+
+
+class WorldTests(TestCase):
+    def setUp(self):
+        self.realm = make_realm()
+        self.first = make_settlement(self.realm, name="First", food=100)
+        self.second = make_settlement(self.realm, name="Second", food=100)
+        self.world = World(self.realm, checkpoint_ticks=3, snapshot_path=None)
+        self.world.load()
+
+    def test_ticks_are_written_back_at_checkpoints(self):
+        for tick in range(1, 4):
+            self.world.ctx.advance()
+            self.world.advance()
+            self.realm.refresh_from_db()
+            self.assertEqual(self.realm.tick_count, 0 if tick < 3 else 3)
+        self.assertEqual(self.world.ticks_since_checkpoint, 0)
+
+    def test_flush_writes_only_the_given_settlements(self):
+        for state, food in ((self.world.settlements[self.first.id], 60), (self.world.settlements[self.second.id], 70)):
+            state.food = food
+            state.dirty = True
+        self.world.events = [(self.first.id, "test", "first"), (self.second.id, "test", "second")]
+        self.world.flush([self.first.id])
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.food, self.second.food), (60, 100))
+        self.assertEqual(self.world.events, [(self.second.id, "test", "second")])
+
+    def test_memory_engine_needs_command_queue(self):
+        with mock.patch("core.management.commands.runapscheduler.COMMAND_QUEUE_MODE", False):
+            with self.assertRaisesMessage(CommandError, "COMMAND_QUEUE_MODE"):
+                call_command("runapscheduler", engine="memory", realm=[str(self.realm.id)])
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        owner = User.objects.create_user(username="Ada")
+        self.settlement = materialize_settlement(owner.id, "Adaburg")
+        Building.objects.create(settlement=self.settlement, building_type="house", is_constructed=True,
+                                construction_progress=100, coordinate_x=0, coordinate_y=0)
+        self.header = auth_header(owner)
+
+    def assert_same_response(self, name, *args):
+        request = RequestFactory().get("/", **self.header)
+        expected = getattr(views, name)(request, *args)
+        actual = async_to_sync(getattr(async_views, name))(RequestFactory().get("/", **self.header), *args)
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(json.loads(actual.content), json.loads(expected.content))
+
+    def test_async_views_match_the_sync_views(self):
+        self.assert_same_response("game_state_view")
+        self.assert_same_response("settlers_view")
+        self.assert_same_response("settlement_detail_view", self.settlement.id)
+        self.assert_same_response("settlement_map_view", self.settlement.id)
+        self.assert_same_response("settlement_events_view", self.settlement.id)
+
+
+class TieringTests(TestCase):
+    def setUp(self):
+        self.realm = make_realm(tick_count=40)
+        self.settlement = make_settlement(self.realm, food=100)
+        Settler.objects.create(settlement=self.settlement, name="Ada")
+
+    def test_idle_settlements_go_dormant_and_wake_on_activity(self):
+        self.assertEqual(update_tiers(40, SEASONS[0], realm_id=self.realm.id), (1, 0))
+        self.settlement.refresh_from_db()
+        self.assertEqual(self.settlement.simulated_tick, 40)
+        Settlement.objects.filter(id=self.settlement.id).update(last_active_at=timezone.now())
+        self.assertEqual(update_tiers(60, SEASONS[0], realm_id=self.realm.id), (0, 1))
+        self.settlement.refresh_from_db()
+        self.assertIsNone(self.settlement.simulated_tick)
+        self.assertLess(self.settlement.food, 100)
+
+    def test_owner_access_catches_up_without_waking(self):
+        Settlement.objects.filter(id=self.settlement.id).update(simulated_tick=10)
+        self.settlement.refresh_from_db()
+        self.assertTrue(ensure_caught_up(self.settlement, make_clock(40)))
+        self.assertEqual(self.settlement.simulated_tick, 40)
+        self.assertLess(self.settlement.food, 100)
+        self.assertFalse(ensure_caught_up(self.settlement, make_clock(40)))
+
+    def test_sweep_catches_up_the_stalest_first(self):
+        stale = make_settlement(self.realm, name="Stale", simulated_tick=5)
+        Settlement.objects.filter(id=self.settlement.id).update(simulated_tick=20)
+        self.assertEqual(sweep_dormant(40, SEASONS[0], limit=1, realm_id=self.realm.id), 1)
+        stale.refresh_from_db()
+        self.settlement.refresh_from_db()
+        self.assertEqual((stale.simulated_tick, self.settlement.simulated_tick), (40, 20))
+        self.assertIsNone(catch_up_settlement(make_settlement(self.realm, name="Awake").id, 40, 40, SEASONS[0]))
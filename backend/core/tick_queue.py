@@ -0,0 +1,235 @@
+# core/tick_queue.py
+# Distributed tick mode (runapscheduler --engine distributed). The coordinator splits the
+# ticking settlements into TickBatch rows for the next tick; any number of
+# `manage.py runtickworker` processes, on any host, claim batches with
+# SELECT ... FOR UPDATE SKIP LOCKED and advance them through the pure simulation core.
+# Settlements never share a batch, so workers never write the same rows. GameState only
+# moves to the new tick once every batch for it is finished.
+#
+# A claim is a lease: a worker that dies or stalls past TICK_BATCH_LEASE_SECONDS loses its
+# batch, which goes back to pending (or to failed after TICK_BATCH_MAX_ATTEMPTS). A batch's
+# writes and its "done" mark commit in one transaction, so a batch is applied at most once.
+# The settlements of a failed batch are made dormant at the tick before it, so tiering
+# catches them up (core.tiering) instead of them missing the tick.
+#
+# Workers write back whole settlements, so player actions must go through the command
+# queue (COMMAND_QUEUE_MODE), which the coordinator drains between ticks.
+import logging
+import os
+import random
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from core.metrics import register_metric
+from core.models import DEFAULT_REALM_ID, Settlement, TickBatch
+from core.scheduling import season_at
+from core.simulation import TickContext, simulate_tick
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+TICK_BATCH_SIZE = getattr(settings, 'TICK_BATCH_SIZE', 50)
+TICK_BATCH_LEASE_SECONDS = getattr(settings, 'TICK_BATCH_LEASE_SECONDS', 30)
+TICK_BATCH_MAX_ATTEMPTS = getattr(settings, 'TICK_BATCH_MAX_ATTEMPTS', 3)
+# Finished batches are kept this many ticks for inspection before they are deleted.
+TICK_BATCH_RETENTION_TICKS = getattr(settings, 'TICK_BATCH_RETENTION_TICKS', 100)
+
+UNFINISHED = ("pending", "running")
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_tick(tick_count, current_season, realm_id=DEFAULT_REALM_ID, batch_size=TICK_BATCH_SIZE):
+    """
+    Writes the batches that advance every ticking settlement of the realm to `tick_count`
+    (whose season is `current_season`). Settlements are batched in id order.
+    Returns the number of batches.
+    """
+    settlement_ids = list(
+        Settlement.objects.ticking().filter(realm_id=realm_id).order_by("id").values_list("id", flat=True)
+    )
+    batch_size = max(1, batch_size)
+    batches = [
+        TickBatch(realm_id=realm_id, tick=tick_count, season=current_season,
+                  settlement_ids=settlement_ids[i:i + batch_size])
+        for i in range(0, len(settlement_ids), batch_size)
+    ]
+    TickBatch.objects.bulk_create(batches)
+    return len(batches)
+
+
+def claim_batch(worker_id, lease_seconds=TICK_BATCH_LEASE_SECONDS):
+    """
+    Claims the oldest pending batch, skipping rows other workers are claiming right now.
+    Returns the TickBatch or None if there is nothing to do.
+    """
+    with transaction.atomic():
+        batch = (
+            TickBatch.objects.select_for_update(skip_locked=True)
+            .filter(status="pending").order_by("tick", "id").first()
+        )
+        if batch is None:
+            return None
+        batch.status = "running"
+        batch.worker = worker_id
+        batch.attempts += 1
+        batch.lease_expires_at = timezone.now() + timedelta(seconds=lease_seconds)
+        batch.save(update_fields=["status", "worker", "attempts", "lease_expires_at"])
+    return batch
+
+
+def run_batch(batch, worker_id, rng=None):
+    """
+    Advances the batch's settlements by one tick and marks it done, in one transaction.
+    The batch row is locked first and must still be leased to `worker_id`; otherwise the
+    lease expired and the batch was handed out again, and nothing is written.
+    Returns the number of settlements simulated, or None if the lease was lost.
+    """
+    from core.world import load_settlements, persist_states
+    with transaction.atomic():
+        owned = (
+            TickBatch.objects.select_for_update()
+            .filter(id=batch.id, status="running", worker=worker_id).exists()
+        )
+        if not owned:
+            logger.warning(f"Lost the lease on {batch}; skipping it")
+            return None
+        # Lock the settlement rows in id order, as tick chunks and ledger folds do, so batch
+        # actions and folds wait for the write-back instead of being overwritten by it.
+        # Settlements that went dormant or were deleted since enqueueing are not loaded.
+        settlement_ids = list(
+            Settlement.objects.select_for_update().filter(id__in=batch.settlement_ids).order_by("id")
+            .values_list("id", flat=True)
+        )
+        states = load_settlements(settlement_ids)
+        previous = batch.tick - 1
+        ctx = TickContext(previous, season_at(previous, batch.tick, batch.season), rng or random.Random())
+        ctx.advance()
+        events = []
+        for settlement_id in sorted(states):
+            simulate_tick(states[settlement_id], ctx, events)
+        persist_states(states, events)
+        TickBatch.objects.filter(id=batch.id).update(status="done", finished_at=timezone.now(), error="")
+    return len(states)
+
+
+def fail_batch(batch, worker_id, error):
+    """
+    Records a worker-side failure: the batch is retried until TICK_BATCH_MAX_ATTEMPTS.
+    """
+    status = "failed" if batch.attempts >= TICK_BATCH_MAX_ATTEMPTS else "pending"
+    TickBatch.objects.filter(id=batch.id, status="running", worker=worker_id).update(
+        status=status, worker="", lease_expires_at=None, error=str(error)[:2000]
+    )
+    return status
+
+
+def work_once(worker_id):
+    """
+    Claims and runs one batch. Returns False when the queue was empty.
+    """
+    batch = claim_batch(worker_id)
+    if batch is None:
+        return False
+    try:
+        simulated = run_batch(batch, worker_id)
+        if simulated is not None:
+            logger.debug(f"{worker_id} advanced {simulated} settlements to tick {batch.tick}")
+    except Exception as e:
+        logger.exception("Error running %s: %s", batch, str(e))
+        status = fail_batch(batch, worker_id, e)
+        if status == "failed":
+            logger.error(f"{batch} failed after {batch.attempts} attempts")
+    return True
+
+
+def requeue_expired(now=None):
+    """
+    Hands batches whose lease ran out back to the queue. Rows a live worker is still
+    writing are locked by its transaction and skipped. Returns (requeued, failed).
+    """
+    now = now or timezone.now()
+    requeued = failed = 0
+    with transaction.atomic():
+        expired = (
+            TickBatch.objects.select_for_update(skip_locked=True)
+            .filter(status="running", lease_expires_at__lt=now)
+        )
+        for batch in expired:
+            if batch.attempts >= TICK_BATCH_MAX_ATTEMPTS:
+                batch.status = "failed"
+                failed += 1
+            else:
+                batch.status = "pending"
+                requeued += 1
+            batch.error = f"Lease held by {batch.worker} expired"
+            batch.worker = ""
+            batch.lease_expires_at = None
+            batch.save(update_fields=["status", "error", "worker", "lease_expires_at"])
+    if requeued or failed:
+        logger.warning(f"Requeued {requeued} expired tick batches, {failed} failed for good")
+    return requeued, failed
+
+
+def park_failed(tick_count, realm_id=DEFAULT_REALM_ID):
+    """
+    Makes the still-ticking settlements of the realm's failed batches for `tick_count`
+    dormant at tick_count - 1, the last tick they were simulated to. Call in the
+    transaction that advances GameState. Returns the number of settlements parked.
+    """
+    settlement_ids = [
+        settlement_id
+        for ids in TickBatch.objects.filter(realm_id=realm_id, tick=tick_count, status="failed")
+        .values_list("settlement_ids", flat=True)
+        for settlement_id in ids
+    ]
+    if not settlement_ids:
+        return 0
+    return Settlement.objects.ticking().filter(realm_id=realm_id, id__in=settlement_ids).update(
+        simulated_tick=tick_count - 1
+    )
+
+
+def tick_progress(tick_count, realm_id=DEFAULT_REALM_ID):
+    """
+    Batch counts by status for the realm's `tick_count`.
+    """
+    counts = {status: 0 for status, _ in TickBatch.STATUS_CHOICES}
+    rows = TickBatch.objects.filter(realm_id=realm_id, tick=tick_count).values("status").annotate(n=Count("id"))
+    for row in rows:
+        counts[row["status"]] = row["n"]
+    return counts
+
+
+def tick_finished(tick_count, realm_id=DEFAULT_REALM_ID):
+    return not TickBatch.objects.filter(realm_id=realm_id, tick=tick_count, status__in=UNFINISHED).exists()
+
+
+def prune_batches(tick_count, realm_id=DEFAULT_REALM_ID, keep_ticks=TICK_BATCH_RETENTION_TICKS):
+    return TickBatch.objects.filter(
+        realm_id=realm_id, tick__lt=tick_count - keep_ticks, status__in=["done", "failed"]
+    ).delete()[0]
+
+
+def queue_stats():
+    stats = {}
+    latest_ticks = TickBatch.objects.values("realm_id").annotate(tick=Max("tick"))
+    for row in latest_ticks:
+        realm_id, latest = row["realm_id"], row["tick"]
+        batches = TickBatch.objects.filter(realm_id=realm_id, tick=latest)
+        realm_stats = tick_progress(latest, realm_id)
+        realm_stats["tick"] = latest
+        realm_stats["retries"] = batches.filter(attempts__gt=1).count()
+        realm_stats["workers"] = batches.exclude(worker="").values("worker").distinct().count()
+        stats[realm_id] = realm_stats
+    return stats
+
+
+register_metric("tick_queue", queue_stats)
@@ -0,0 +1,140 @@
+# core/tiering.py
+# Activity-based tiering. Settlements whose owner has not made a request for
+# SETTLEMENT_DORMANT_AFTER leave the per-tick set: Settlement.simulated_tick records the
+# tick their state was last simulated to and every tick phase skips them. When the owner
+# comes back (or the slow background sweep reaches them) they are caught up in one step
+# with core.simulation.catch_up, which skips steady-state season cycles in closed form.
+# Tick cost then scales with active players rather than registered settlements.
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.db_router import use_primary
+from core.models import Settlement
+from core.scheduling import season_at
+from core.simulation import TickContext, catch_up
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+SETTLEMENT_DORMANT_AFTER = getattr(settings, 'SETTLEMENT_DORMANT_AFTER', timedelta(days=2))
+# Owner requests refresh last_active_at at most this often (seconds).
+ACTIVITY_TOUCH_INTERVAL = getattr(settings, 'ACTIVITY_TOUCH_INTERVAL', 60)
+# Every this many ticks the scheduler catches up the stalest dormant settlements.
+DORMANT_SWEEP_TICKS = getattr(settings, 'DORMANT_SWEEP_TICKS', 720)
+DORMANT_SWEEP_BATCH = getattr(settings, 'DORMANT_SWEEP_BATCH', 20)
+# Only the most recent events of a catch-up are written to the event log.
+CATCH_UP_MAX_EVENTS = getattr(settings, 'CATCH_UP_MAX_EVENTS', 50)
+
+
+def _touch_key(settlement_id):
+    return f"coa:touch:{settlement_id}"
+
+
+def touch_settlement(settlement):
+    """
+    Records owner activity. Dormant settlements are always stamped so the scheduler wakes
+    them on its next tier update; ticking ones at most every ACTIVITY_TOUCH_INTERVAL.
+    """
+    if settlement.simulated_tick is None and not cache.add(_touch_key(settlement.id), 1, ACTIVITY_TOUCH_INTERVAL):
+        return
+    Settlement.objects.filter(id=settlement.id).update(last_active_at=timezone.now())
+
+
+async def atouch_settlement(settlement):
+    if settlement.simulated_tick is None and not await cache.aadd(_touch_key(settlement.id), 1, ACTIVITY_TOUCH_INTERVAL):
+        return
+    await Settlement.objects.filter(id=settlement.id).aupdate(last_active_at=timezone.now())
+
+
+def catch_up_settlement(settlement_id, to_tick, ref_tick, ref_season, wake=False):
+    """
+    Brings a dormant settlement's rows up to `to_tick` (season derived from the reference
+    clock). The settlement row is locked for the duration, so concurrent callers catch it
+    up once. With `wake` it rejoins the per-tick set. Returns the ticks simulated, or None
+    if the settlement is not dormant.
+    """
+    from core.world import load_settlements, persist_states
+    with transaction.atomic():
+        from_tick = (
+            Settlement.objects.dormant().select_for_update()
+            .filter(id=settlement_id).values_list("simulated_tick", flat=True).first()
+        )
+        if from_tick is None:
+            return None
+        simulated = 0
+        if from_tick < to_tick:
+            state = load_settlements([settlement_id], include_dormant=True)[settlement_id]
+            ctx = TickContext(from_tick, season_at(from_tick, ref_tick, ref_season), random.Random())
+            events = []
+            simulated = catch_up(state, ctx, to_tick, events)
+            persist_states({settlement_id: state}, events[-CATCH_UP_MAX_EVENTS:])
+            logger.info(
+                f"Caught up settlement {settlement_id} from tick {from_tick} to {to_tick} "
+                f"({simulated} ticks simulated)"
+            )
+        Settlement.objects.filter(id=settlement_id).update(
+            simulated_tick=None if wake else max(from_tick, to_tick)
+        )
+    return simulated
+
+
+def ensure_caught_up(settlement, clock):
+    """
+    Called on owner access: a dormant settlement is caught up to the current tick before
+    it is served (it stays dormant until the scheduler wakes it). Returns True if rows
+    changed, in which case `settlement` is refreshed and the rest of the request reads
+    from the primary.
+    """
+    touch_settlement(settlement)
+    if settlement.simulated_tick is None or settlement.simulated_tick >= clock.tick_count:
+        return False
+    # The catch-up locks and reads rows inside a transaction on the primary; none of its
+    # reads may go to a replica.
+    use_primary()
+    catch_up_settlement(settlement.id, clock.tick_count, clock.tick_count, clock.current_season)
+    settlement.refresh_from_db()
+    return True
+
+
+def update_tiers(tick_count, current_season, realm_id=None):
+    """
+    Run by the scheduler between ticks, when every ticking settlement's state (in
+    `realm_id`, if given) is at `tick_count`: idle settlements become dormant at that tick
+    and dormant settlements with recent owner activity are caught up and rejoin the
+    per-tick set. Returns (demoted, promoted).
+    """
+    cutoff = timezone.now() - SETTLEMENT_DORMANT_AFTER
+    ticking, dormant = Settlement.objects.ticking(), Settlement.objects.dormant()
+    if realm_id is not None:
+        ticking, dormant = ticking.filter(realm_id=realm_id), dormant.filter(realm_id=realm_id)
+    demoted = ticking.filter(
+        Q(last_active_at__lt=cutoff) | Q(last_active_at__isnull=True)
+    ).update(simulated_tick=tick_count)
+    promoted = 0
+    for settlement_id in dormant.filter(last_active_at__gte=cutoff).values_list("id", flat=True):
+        if catch_up_settlement(settlement_id, tick_count, tick_count, current_season, wake=True) is not None:
+            promoted += 1
+    if demoted or promoted:
+        logger.info(f"Tiering at tick {tick_count}: {demoted} settlements went dormant, {promoted} woke up")
+    return demoted, promoted
+
+
+def sweep_dormant(tick_count, current_season, limit=DORMANT_SWEEP_BATCH, realm_id=None):
+    """
+    Slow background catch-up of the stalest dormant settlements (they stay dormant), so
+    no settlement falls arbitrarily far behind. Returns the number caught up.
+    """
+    dormant = Settlement.objects.dormant().filter(simulated_tick__lt=tick_count)
+    if realm_id is not None:
+        dormant = dormant.filter(realm_id=realm_id)
+    settlement_ids = list(dormant.order_by("simulated_tick").values_list("id", flat=True)[:limit])
+    for settlement_id in settlement_ids:
+        catch_up_settlement(settlement_id, tick_count, tick_count, current_season)
+    return len(settlement_ids)
@@ -0,0 +1,81 @@
+# core/token_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+# --- Configurable Constants ---
+JWT_CACHE_SIZE = getattr(settings, 'JWT_CACHE_SIZE', 4096)
+JWT_CACHE_MAX_TTL = getattr(settings, 'JWT_CACHE_MAX_TTL', 300)
+
+
+def hash_token(raw_token):
+    """
+    Returns a hex digest for a raw token so the token itself is never kept in memory
+    or written to logs.
+    """
+    if isinstance(raw_token, str):
+        raw_token = raw_token.encode()
+    return hashlib.sha256(raw_token).hexdigest()
+
+
+class TokenCache:
+    """
+    Thread-safe LRU of validated access tokens.
+    Each entry holds (user_id, claims, expires_at). Entries expire at the token's own
+    `exp` claim, or after JWT_CACHE_MAX_TTL seconds, whichever comes first, so a
+    deactivated user is picked up again within a bounded time.
+    """
+
+    def __init__(self, maxsize=JWT_CACHE_SIZE, max_ttl=JWT_CACHE_MAX_TTL):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, user_id, claims):
+        expires_at = time.time() + self.max_ttl
+        exp = claims.get("exp")
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        with self._lock:
+            self._entries[key] = (user_id, claims, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[0] == user_id]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache()
@@ -7,20 +7,39 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.models import User
 from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 
 from core.config import (
-    BUILDING_COSTS,
-    GRID_SIZE,
     PRODUCTION_RATES,
     VILLAGER_CONSUMPTION_RATE,
-    SEASON_MODIFIERS,
     PRODUCTION_TICK,
     FEEDING_TICK,
 )
-from core.models import GameState, Settlement, Building, Settler, LoreEntry, MapTile
-from core.decorators import jwt_required
-from core.event_logger import log_event
+from core.models import (
+    DEFAULT_REALM_ID,
+    Building,
+    GameState,
+    Grave,
+    LoreEntry,
+    MapTile,
+    PendingAction,
+    Settlement,
+    Settler,
+    active_settlement_q,
+)
+from core.decorators import jwt_required, staff_required
+from core.db_router import replica_read
+from core.single_flight import single_flight
+from core.actions import ACTION_VALIDATORS, ActionError, BlueprintError, submit_action
+from core.game_clock import get_clock, realm_from_request
+from core.metrics import METRICS_PUBLIC, collect_metrics
+from core.settlement_pool import claim_settlement
+from core.occupancy import invalidate_grid
+from core.tiering import ensure_caught_up
 from core.population import calculate_popularity_index
+from core.forecast import FORECAST_MAX_TICKS, FORECAST_MAX_SCENARIOS, forecast_scenarios, sample_step
+from core.world import load_settlements
+from core.ledger import resolve, resolve_rows
 
 from core.api.serializers import MapTileSerializer, BuildingSerializer, SettlerSerializer, LoreEntrySerializer, BUILDING_DESCRIPTIONS
 
@@ -36,57 +55,101 @@ def get_settlement_or_error(request, settlement_id):
     Returns a tuple: (settlement, error_response) where error_response is None on success.
     """
     try:
-        settlement = Settlement.objects.get(id=settlement_id)
+        settlement = Settlement.objects.active().get(id=settlement_id)
         if settlement.owner_id != request.user.id:
             return None, JsonResponse({"error": "Not authorized."}, status=403)
+        # Dormant settlements are caught up to the current tick before they are served.
+        ensure_caught_up(settlement, get_clock(settlement.realm_id))
         return settlement, None
     except Settlement.DoesNotExist:
         return None, JsonResponse({"error": "Settlement not found."}, status=404)
 
 
+def _submit_action_view(request, action_type, error_label):
+    """
+    Shared body of the mutating endpoints: parses the payload, checks ownership and
+    hands the action to core.actions (applied now, or queued in COMMAND_QUEUE_MODE).
+    """
+    try:
+        data = json.loads(request.body)
+        ACTION_VALIDATORS[action_type](data)
+        settlement, error_response = get_settlement_or_error(request, data["settlement_id"])
+        if error_response:
+            return error_response
+        payload, status = submit_action(settlement, action_type, data, get_clock(settlement.realm_id))
+        return JsonResponse(payload, status=status)
+    except BlueprintError as e:
+        return JsonResponse({"error": e.message, "details": e.errors}, status=e.status)
+    except ActionError as e:
+        return JsonResponse({"error": e.message}, status=e.status)
+    except Exception as e:
+        logger.exception("%s: %s", error_label, str(e))
+        return JsonResponse({"error": str(e)}, status=500)
+
+
 # --- Game State & Global Endpoints ---
 
+@replica_read
 def game_state_view(request):
     logger.debug("Received request for game state")
+    realm_id = realm_from_request(request)
+    if realm_id is None:
+        return JsonResponse({"error": "realm must be an integer."}, status=400)
     try:
-        gs = GameState.objects.get(pk=1)
+        clock = get_clock(realm_id)
     except GameState.DoesNotExist:
-        logger.debug("GameState not found. Creating new GameState.")
-        gs = GameState.objects.create(tick_count=0, current_season="Spring")
-    data = {"tick_count": gs.tick_count, "current_season": gs.current_season}
+        return JsonResponse({"error": "Realm not found."}, status=404)
+    data = {"realm": realm_id, "tick_count": clock.tick_count, "current_season": clock.current_season}
     logger.debug(f"Returning game state: {data}")
     return JsonResponse(data)
 
+@replica_read
+def realms_view(request):
+    realms = list(GameState.objects.order_by("id").values("id", "name", "tick_interval"))
+    for realm in realms:
+        clock = get_clock(realm["id"])
+        realm["tick_count"] = clock.tick_count
+        realm["current_season"] = clock.current_season
+    return JsonResponse(realms, safe=False)
+
+@replica_read
 def settlements_view(request):
     logger.debug("Received request for settlements")
-    qs = Settlement.objects.all().values(
-        "id", "name", "food", "wood", "stone", "owner_id", "created_at"
+    qs = Settlement.objects.active().values(
+        "id", "name", "food", "wood", "stone", "owner_id", "realm_id", "created_at"
     )
-    data = list(qs)
+    data = resolve_rows(list(qs))
     logger.debug(f"Returning settlements: {data}")
     return JsonResponse(data, safe=False)
 
+@replica_read
 def buildings_view(request):
     buildings = Building.objects.all()
     serialized = BuildingSerializer(buildings, many=True).data
     return JsonResponse(serialized, safe=False, json_dumps_params={"indent": 2}, encoder=DjangoJSONEncoder)
 
+@replica_read
 def settlers_view(request):
     logger.debug("Received request for settlers")
     try:
-        qs = Settler.objects.select_related("assigned_building", "gathering_resource_node").all()
+        qs = Settler.objects.select_related("assigned_building", "gathering_resource_node").filter(active_settlement_q())
         serialized = SettlerSerializer(qs, many=True).data
-        gs = GameState.objects.get(pk=1)
+        realms = dict(Settlement.objects.active().values_list("id", "realm_id"))
         for settler in serialized:
-            settler["age"] = gs.tick_count - settler["birth_tick"] if settler["birth_tick"] is not None else "N/A"
+            tick_count = get_clock(realms.get(settler["settlement_id"], DEFAULT_REALM_ID)).tick_count
+            settler["age"] = tick_count - settler["birth_tick"] if settler["birth_tick"] is not None else "N/A"
         logger.debug(f"Returning serialized settlers: {serialized}")
         return JsonResponse(serialized, safe=False)
-    except GameState.DoesNotExist:
-        return JsonResponse({"error": "GameState not found."}, status=500)
     except Exception as e:
         logger.exception("Error in settlers_view: %s", e)
         return JsonResponse({"error": str(e)}, status=500)
 
+def _metrics(request):
+    return JsonResponse(collect_metrics())
+
+metrics_view = _metrics if METRICS_PUBLIC else staff_required(_metrics)
+
+@replica_read
 def lore_entries_view(request):
     logger.debug("Received request for lore entries")
     qs = LoreEntry.objects.all().values("id", "title", "description", "event_date")
@@ -125,7 +188,7 @@ def register(request):
 @jwt_required
 def current_user_view(request):
     logger.debug("Received current_user request")
-    data = {"id": request.user.id, "username": request.user.username, "email": request.user.email}
+    data = {"id": request.user.id, "username": request.user.username, "email": getattr(request.user, "email", "")}
     logger.debug(f"Returning authenticated user data: {data}")
     return JsonResponse(data)
 
@@ -142,51 +205,36 @@ def create_settlement(request):
     try:
         data = json.loads(request.body)
         name = data.get("name")
-        logger.debug(f"Settlement creation data: name={name}")
+        realm_id = data.get("realm", DEFAULT_REALM_ID)
+        logger.debug(f"Settlement creation data: name={name}, realm={realm_id}")
         if not name:
             logger.error("Settlement name is missing")
             return JsonResponse({"error": "Settlement name is required."}, status=400)
-        from core.config import STARTING_RESOURCES, STARTING_VILLAGERS, VILLAGER_NAMES
-        settlement = Settlement.objects.create(
-            name=name,
-            owner=request.user,
-            food=STARTING_RESOURCES["food"],
-            wood=STARTING_RESOURCES["wood"],
-            stone=STARTING_RESOURCES["stone"],
-            magic=STARTING_RESOURCES.get("magic", 0),
-        )
-        import random
-        for _ in range(STARTING_VILLAGERS):
-            villager_name = random.choice(VILLAGER_NAMES)
-            Settler.objects.create(
-                settlement=settlement,
-                name=villager_name,
-                status="idle",
-                mood="content",
-                hunger=0,
-                birth_tick=None,
-                experience=0,
-            )
-        from core.map_generation import generate_map_for_settlement
-        generate_map_for_settlement(settlement)
-        logger.info(f"Settlement '{name}' created successfully for user '{request.user.username}'")
-        return JsonResponse({"message": "Settlement created successfully.", "settlement_id": settlement.id}, status=201)
+        if not isinstance(realm_id, int) or not GameState.objects.filter(id=realm_id).exists():
+            return JsonResponse({"error": "Unknown realm."}, status=400)
+        settlement_id, from_pool = claim_settlement(request.user.id, name, realm_id)
+        logger.info(f"Settlement '{name}' created successfully for user {request.user.id} (from pool: {from_pool})")
+        return JsonResponse({"message": "Settlement created successfully.", "settlement_id": settlement_id}, status=201)
     except Exception as e:
         logger.exception("Error during settlement creation")
         return JsonResponse({"error": str(e)}, status=500)
 
+@replica_read
 @jwt_required
+@single_flight
 def settlement_map_view(request, id):
     logger.debug("Received settlement_map_view request for settlement id: %s", id)
     settlement, error_response = get_settlement_or_error(request, id)
     if error_response:
         return error_response
     tiles = settlement.map_tiles.all()
-    serialized_tiles = MapTileSerializer(tiles, many=True).data
+    serialized_tiles = MapTileSerializer(tiles, many=True, context={"clock": get_clock(settlement.realm_id)}).data
     logger.debug("Returning map tiles: %s", serialized_tiles)
     return JsonResponse(serialized_tiles, safe=False)
 
+@replica_read
 @jwt_required
+@single_flight
 def settlement_detail_view(request, id):
     logger.debug("Received settlement_detail_view request for id: %s", id)
     settlement, error_response = get_settlement_or_error(request, id)
@@ -198,13 +246,17 @@ def settlement_detail_view(request, id):
     ).first()
     if not settlement_data:
         return JsonResponse({"error": "Settlement not found."}, status=404)
+    resolve_rows([settlement_data])
+    resolve([settlement])
 
+    clock = get_clock(settlement.realm_id)
     buildings_qs = settlement.buildings.all().values(
         "id", "building_type", "construction_progress", "is_constructed", "coordinate_x", "coordinate_y"
     )
     buildings = list(buildings_qs)
     for b in buildings:
         building_obj = settlement.buildings.get(id=b["id"])
+        b["construction_progress"] = building_obj.current_progress(clock.tick_count, clock.current_season)
         if building_obj.building_type == "house":
             occupants = building_obj.housed_settlers.all()
             if occupants.exists():
@@ -216,13 +268,13 @@ def settlement_detail_view(request, id):
         else:
             workers = building_obj.assigned_settlers.all()
             b["assigned"] = workers.first().name if workers.exists() else ""
-    gs = GameState.objects.get(pk=1)
-    prod_modifier = SEASON_MODIFIERS.get(gs.current_season, {}).get("production", 1.0)
-    cons_modifier = SEASON_MODIFIERS.get(gs.current_season, {}).get("consumption", 1.0)
+    prod_modifier = clock.modifiers["production"]
+    cons_modifier = clock.modifiers["consumption"]
     net_rates = settlement.calculate_net_resource_rates(prod_modifier, cons_modifier)
     data = {
         "id": settlement_data["id"],
         "name": settlement_data["name"],
+        "realm": settlement.realm_id,
         "food": settlement_data["food"],
         "wood": settlement_data["wood"],
         "stone": settlement_data["stone"],
@@ -233,65 +285,61 @@ def settlement_detail_view(request, id):
         "net_wood_rate": round(net_rates.get("wood", 0), 1),
         "net_stone_rate": round(net_rates.get("stone", 0), 1),
         "net_magic_rate": 0,
-        "current_season": gs.current_season,
+        "current_season": clock.current_season,
         "popularity_index": round(calculate_popularity_index(settlement), 2),
     }
     return JsonResponse(data)
 
+@replica_read
+@jwt_required
+def settlement_forecast_view(request, id):
+    """
+    Projects the settlement forward in memory without touching the DB.
+    Query: ticks (default 100), scenarios (recruitment seeds, default 1), sample (tick step
+    between trajectory points, default 1; raised so a scenario has at most
+    FORECAST_MAX_POINTS points).
+    """
+    settlement, error_response = get_settlement_or_error(request, id)
+    if error_response:
+        return error_response
+    try:
+        ticks = int(request.GET.get("ticks", 100))
+        scenarios = int(request.GET.get("scenarios", 1))
+        sample_every = int(request.GET.get("sample", 1))
+    except ValueError:
+        return JsonResponse({"error": "ticks, scenarios and sample must be integers."}, status=400)
+    if not 1 <= ticks <= FORECAST_MAX_TICKS:
+        return JsonResponse({"error": f"ticks must be between 1 and {FORECAST_MAX_TICKS}."}, status=400)
+    if not 1 <= scenarios <= FORECAST_MAX_SCENARIOS:
+        return JsonResponse({"error": f"scenarios must be between 1 and {FORECAST_MAX_SCENARIOS}."}, status=400)
+    sample_every = sample_step(ticks, sample_every)
+    try:
+        state = load_settlements([settlement.id], include_dormant=True).get(settlement.id)
+        if state is None:
+            return JsonResponse({"error": "Settlement not found."}, status=404)
+        clock = get_clock(settlement.realm_id)
+        results, elapsed = forecast_scenarios(
+            state, clock.tick_count, clock.current_season, ticks, range(scenarios), sample_every
+        )
+        return JsonResponse({
+            "settlement_id": settlement.id,
+            "from_tick": clock.tick_count,
+            "ticks": ticks,
+            "sample": sample_every,
+            "scenarios": results,
+            "elapsed_ms": round(elapsed * 1000, 1),
+        })
+    except Exception as e:
+        logger.exception("Error forecasting settlement: %s", str(e))
+        return JsonResponse({"error": str(e)}, status=500)
+
 @csrf_exempt
 @jwt_required
 def place_building(request):
     logger.debug("Received place_building request")
     if request.method != "POST":
         return JsonResponse({"error": "Only POST method is allowed."}, status=405)
-    try:
-        data = json.loads(request.body)
-        settlement_id = data.get("settlement_id")
-        building_type = data.get("building_type")
-        tile_x = data.get("tile_x")
-        tile_y = data.get("tile_y")
-        if not settlement_id or not building_type or tile_x is None or tile_y is None:
-            return JsonResponse({"error": "Settlement ID, building type, and tile coordinates are required."}, status=400)
-        if building_type not in BUILDING_COSTS:
-            return JsonResponse({"error": "Invalid building type."}, status=400)
-        settlement, error_response = get_settlement_or_error(request, settlement_id)
-        if error_response:
-            return error_response
-        if not (0 <= tile_x < GRID_SIZE and 0 <= tile_y < GRID_SIZE):
-            return JsonResponse({"error": "Tile coordinates must be between 0 and 9."}, status=400)
-        if settlement.buildings.filter(coordinate_x=tile_x, coordinate_y=tile_y).exists():
-            return JsonResponse({"error": "Tile is already occupied."}, status=400)
-        tile = settlement.map_tiles.filter(coordinate_x=tile_x, coordinate_y=tile_y).first()
-        if not tile:
-            return JsonResponse({"error": "Map tile not found."}, status=404)
-        if tile.terrain_type == "lake":
-            return JsonResponse({"error": "Cannot build on lake tile."}, status=400)
-        
-        # Enforce terrain restrictions:
-        if building_type == "quarry" and tile.terrain_type != "mountain":
-            return JsonResponse({"error": "Quarries can only be built on mountain tiles."}, status=400)
-        if building_type == "lumber_mill" and tile.terrain_type != "forest":
-            return JsonResponse({"error": "Lumber Mills can only be built on forest tiles."}, status=400)
-        
-        cost = BUILDING_COSTS[building_type]
-        if settlement.wood < cost["wood"] or settlement.stone < cost["stone"]:
-            return JsonResponse({"error": "Insufficient resources."}, status=400)
-        settlement.wood -= cost["wood"]
-        settlement.stone -= cost["stone"]
-        settlement.save()
-        building = Building.objects.create(
-            settlement=settlement,
-            building_type=building_type,
-            construction_progress=0,
-            villagers_generated=0,
-            coordinate_x=tile_x,
-            coordinate_y=tile_y,
-        )
-        log_event(settlement, "building_placed", f"{building.building_type} construction started at ({tile_x}, {tile_y}).")
-        return JsonResponse({"message": "Building placed successfully.", "building_id": building.id}, status=201)
-    except Exception as e:
-        logger.exception("Error during building placement: %s", str(e))
-        return JsonResponse({"error": str(e)}, status=500)
+    return _submit_action_view(request, "place_building", "Error during building placement")
 
 @csrf_exempt
 @jwt_required
@@ -303,7 +351,9 @@ def delete_settlement(request, id):
         settlement, error_response = get_settlement_or_error(request, id)
         if error_response:
             return error_response
-        settlement.delete()
+        # Hide it right away; the scheduler's purge job removes the rows in the background.
+        Settlement.objects.filter(id=settlement.id).update(deleted_at=timezone.now())
+        invalidate_grid(settlement.id)
         return JsonResponse({"message": "Settlement deleted successfully."})
     except Exception as e:
         logger.exception("Error deleting settlement: %s", str(e))
@@ -315,81 +365,16 @@ def assign_villager(request):
     logger.debug("Received assign_villager request")
     if request.method != "POST":
         return JsonResponse({"error": "Only POST method is allowed."}, status=405)
-    try:
-        data = json.loads(request.body)
-        settlement_id = data.get("settlement_id")
-        building_id = data.get("building_id")
-        settler_id = data.get("settler_id", None)
-        if not settlement_id or not building_id:
-            return JsonResponse({"error": "Settlement ID and building ID are required."}, status=400)
-        settlement, error_response = get_settlement_or_error(request, settlement_id)
-        if error_response:
-            return error_response
-        try:
-            building = settlement.buildings.get(id=building_id)
-        except Building.DoesNotExist:
-            return JsonResponse({"error": "Building not found in the settlement."}, status=404)
-        if building.building_type not in ["lumber_mill", "quarry", "farmhouse"]:
-            return JsonResponse({"error": "Villagers can only be assigned to production buildings."}, status=400)
-        if settler_id:
-            try:
-                settler = settlement.settlers.get(id=settler_id)
-            except Settler.DoesNotExist:
-                return JsonResponse({"error": "Villager not found in the settlement."}, status=404)
-        else:
-            idle_settlers = settlement.settlers.filter(status="idle")
-            if not idle_settlers.exists():
-                return JsonResponse({"error": "No idle villagers available."}, status=400)
-            settler = idle_settlers.first()
-        settler.assigned_building = building
-        settler.status = "working"
-        settler.save()
-        log_event(settlement, "villager_assigned", f"Villager {settler.name} assigned to {building.building_type}.")
-        return JsonResponse({"message": "Villager assigned successfully.", "settler_id": settler.id}, status=200)
-    except Exception as e:
-        logger.exception("Error during villager assignment: %s", str(e))
-        return JsonResponse({"error": str(e)}, status=500)
+    return _submit_action_view(request, "assign_villager", "Error during villager assignment")
 
 @csrf_exempt
 @jwt_required
 def gather_resource(request):
     if request.method != "POST":
         return JsonResponse({"error": "Only POST method is allowed."}, status=405)
-    try:
-        data = json.loads(request.body)
-        settlement_id = data.get("settlement_id")
-        resource_node_id = data.get("resource_node_id")
-        if not settlement_id or not resource_node_id:
-            return JsonResponse({"error": "Settlement ID and resource node ID are required."}, status=400)
-        settlement, error_response = get_settlement_or_error(request, settlement_id)
-        if error_response:
-            return error_response
-        from core.models import ResourceNode
-        try:
-            node = ResourceNode.objects.get(id=resource_node_id, map_tile__settlement=settlement)
-        except ResourceNode.DoesNotExist:
-            return JsonResponse({"error": "Resource node not found in settlement."}, status=404)
-        if node.gatherer:
-            return JsonResponse({"error": "Resource node is already being gathered."}, status=400)
-        idle_settlers = settlement.settlers.filter(status="idle")
-        if not idle_settlers.exists():
-            return JsonResponse({"error": "No idle villagers available."}, status=400)
-        villager = idle_settlers.order_by('?').first()
-        node.gatherer = villager
-        node.save()
-        villager.gathering_resource_node = node
-        villager.status = "gathering"
-        villager.save()
-        log_event(settlement, "villager_assigned", f"{villager.name} started gathering from {node.name}.")
-        return JsonResponse({
-            "message": f"{villager.name} started gathering from {node.name}.",
-            "villager_id": villager.id,
-            "resource_node_id": node.id,
-        }, status=200)
-    except Exception as e:
-        logger.exception("Error during resource gathering: %s", str(e))
-        return JsonResponse({"error": str(e)}, status=500)
+    return _submit_action_view(request, "gather_resource", "Error during resource gathering")
 
+@replica_read
 @jwt_required
 def settlement_events_view(request, id):
     logger.debug("Received settlement_events_view for settlement id: %s", id)
@@ -404,76 +389,76 @@ def settlement_events_view(request, id):
         logger.exception("Error retrieving settlement events: %s", str(e))
         return JsonResponse({"error": str(e)}, status=500)
 
-@csrf_exempt
+@replica_read
 @jwt_required
-def toggle_assignment(request):
-    if request.method != "POST":
-        return JsonResponse({"error": "Only POST method is allowed."}, status=405)
+def settlement_graveyard_view(request, id):
+    logger.debug("Received settlement_graveyard_view for settlement id: %s", id)
     try:
-        data = json.loads(request.body)
-        settlement_id = data.get("settlement_id")
-        object_type = data.get("object_type")
-        object_id = data.get("object_id")
-        if not settlement_id or not object_type or not object_id:
-            return JsonResponse({"error": "Missing required parameters."}, status=400)
-        settlement, error_response = get_settlement_or_error(request, settlement_id)
+        settlement, error_response = get_settlement_or_error(request, id)
         if error_response:
             return error_response
-        idle_villagers = settlement.settlers.filter(status="idle", gathering_resource_node__isnull=True)
-        if object_type == "building":
-            try:
-                building = settlement.buildings.get(id=object_id)
-            except Building.DoesNotExist:
-                return JsonResponse({"error": "Building not found in settlement."}, status=404)
-            if building.building_type not in ["lumber_mill", "quarry", "farmhouse"]:
-                return JsonResponse({"error": "Villagers can only be assigned to production buildings."}, status=400)
-            assigned = building.assigned_settlers.all()
-            if assigned.exists():
-                for villager in assigned:
-                    villager.assigned_building = None
-                    villager.status = "idle"
-                    villager.save()
-                log_event(settlement, "villager_assigned", f"Cleared assignments from {building.get_building_type_display()} for all villagers.")
-                return JsonResponse({"message": "Assignment cleared."}, status=200)
-            else:
-                if not idle_villagers.exists():
-                    return JsonResponse({"error": "No idle villagers available."}, status=400)
-                villager = idle_villagers.order_by('?').first()
-                building.assigned_settlers.add(villager)
-                villager.assigned_building = building
-                villager.status = "working"
-                villager.save()
-                log_event(settlement, "villager_assigned", f"{villager.name} assigned to {building.get_building_type_display()}.")
-                return JsonResponse({"message": f"{villager.name} assigned to {building.get_building_type_display()}."}, status=200)
-        elif object_type == "resource_node":
-            from core.models import ResourceNode
-            try:
-                node = ResourceNode.objects.get(id=object_id, map_tile__settlement=settlement)
-            except ResourceNode.DoesNotExist:
-                return JsonResponse({"error": "Resource node not found in settlement."}, status=404)
-            if node.gatherer:
-                villager = node.gatherer
-                node.gatherer = None
-                node.save()
-                if villager:
-                    villager.gathering_resource_node = None
-                    villager.status = "idle"
-                    villager.save()
-                log_event(settlement, "villager_assigned", f"Cleared gathering assignment from {node.name}.")
-                return JsonResponse({"message": "Gathering assignment cleared."}, status=200)
+        graves = list(
+            Grave.objects.filter(settlement=settlement).order_by("-id")
+            .values("id", "name", "cause", "birth_tick", "died_tick", "experience", "buried_at")
+        )
+        for grave in graves:
+            if grave["birth_tick"] is not None and grave["died_tick"] is not None:
+                grave["lifespan"] = grave["died_tick"] - grave["birth_tick"]
             else:
-                if not idle_villagers.exists():
-                    return JsonResponse({"error": "No idle villagers available."}, status=400)
-                villager = idle_villagers.order_by('?').first()
-                node.gatherer = villager
-                node.save()
-                villager.gathering_resource_node = node
-                villager.status = "gathering"
-                villager.save()
-                log_event(settlement, "villager_assigned", f"{villager.name} started gathering from {node.name}.")
-                return JsonResponse({"message": f"{villager.name} started gathering from {node.name}."}, status=200)
-        else:
-            return JsonResponse({"error": "Invalid object type."}, status=400)
+                grave["lifespan"] = "N/A"
+        return JsonResponse(graves, safe=False)
     except Exception as e:
-        logger.exception("Error in toggle_assignment: %s", str(e))
+        logger.exception("Error retrieving settlement graveyard: %s", str(e))
         return JsonResponse({"error": str(e)}, status=500)
+
+@csrf_exempt
+@jwt_required
+def toggle_assignment(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method is allowed."}, status=405)
+    return _submit_action_view(request, "toggle_assignment", "Error in toggle_assignment")
+
+@csrf_exempt
+@jwt_required
+def place_blueprint(request):
+    """
+    Places a multi-building layout relative to an anchor tile, all-or-nothing.
+    Body: {"settlement_id": ..., "anchor_x": ..., "anchor_y": ...,
+           "layout": [{"building_type": "farmhouse", "dx": 0, "dy": 1}, ...]}
+    """
+    logger.debug("Received place_blueprint request")
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method is allowed."}, status=405)
+    return _submit_action_view(request, "place_blueprint", "Error during blueprint placement")
+
+@csrf_exempt
+@jwt_required
+def batch_actions_view(request):
+    """
+    Applies a list of actions for one settlement in a single transaction.
+    Body: {"settlement_id": ..., "actions": [{"type": "place_building", ...}, ...]}
+    """
+    logger.debug("Received batch_actions request")
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST method is allowed."}, status=405)
+    return _submit_action_view(request, "batch", "Error during batch actions")
+
+@jwt_required
+def action_status_view(request, id):
+    """
+    Reports the outcome of an action queued in COMMAND_QUEUE_MODE.
+    """
+    try:
+        action = PendingAction.objects.get(id=id)
+    except PendingAction.DoesNotExist:
+        return JsonResponse({"error": "Action not found."}, status=404)
+    _, error_response = get_settlement_or_error(request, action.settlement_id)
+    if error_response:
+        return error_response
+    return JsonResponse({
+        "id": action.id,
+        "action_type": action.action_type,
+        "status": action.status,
+        "result": action.result,
+        "applied_tick": action.applied_tick,
+    })
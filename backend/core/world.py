@@ -0,0 +1,391 @@
+# core/world.py
+# In-memory engine for runapscheduler (--engine memory). The scheduler is the only process
+# that advances the simulation, so it keeps every active settlement in core.simulation
+# records, ticks them without touching the DB and writes dirty rows back every
+# WORLD_CHECKPOINT_TICKS ticks. The DB stays the recovery source: after a crash the
+# world is reloaded from the last checkpoint.
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from core.models import (
+    Building,
+    EventLog,
+    PendingAction,
+    ResourceNode,
+    Settlement,
+    Settler,
+    active_settlement_q,
+)
+from core.graveyard import bury
+from core.ledger import apending_deltas, forget, pending_deltas, replay, settlements_with_pending
+from core.simulation import (
+    RESOURCES,
+    BuildingRec,
+    NodeRec,
+    SettlementRec,
+    SettlerRec,
+    TickContext,
+    simulate_tick,
+)
+from core.tiering import update_tiers
+from core.world_snapshot import WORLD_SNAPSHOT_PATH, read_snapshot, write_snapshot
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+WORLD_CHECKPOINT_TICKS = getattr(settings, 'WORLD_CHECKPOINT_TICKS', 12)
+
+SETTLEMENT_FIELDS = ["food", "wood", "stone", "magic", "happy_duration", "happiness_boost"]
+SETTLER_FIELDS = [
+    "status", "mood", "hunger", "housing_assigned_id", "gathering_resource_node_id",
+    "birth_tick", "death_tick", "experience",
+]
+BUILDING_FIELDS = ["is_constructed", "construction_progress"]
+NODE_FIELDS = ["quantity", "last_harvest_tick"]
+
+
+def load_settlements(settlement_ids=None, include_dormant=False, realm_id=None):
+    """
+    Loads ticking settlements (all of them, only `settlement_ids`, or only those in
+    `realm_id`) into records with four queries; `include_dormant` also loads dormant ones.
+    Returns {settlement_id: SettlementRec}.
+    """
+    qs = Settlement.objects.active() if include_dormant else Settlement.objects.ticking()
+    if settlement_ids is not None:
+        qs = qs.filter(id__in=settlement_ids)
+    if realm_id is not None:
+        qs = qs.filter(realm_id=realm_id)
+    states = {
+        row["id"]: SettlementRec(**row)
+        for row in qs.values("id", "name", *SETTLEMENT_FIELDS)
+    }
+    ids = list(states)
+    if not ids:
+        return states
+    for settlement_id, (mark, deltas) in pending_deltas(ids).items():
+        _apply_deltas(states[settlement_id], mark, deltas)
+    for row in Building.objects.filter(settlement_id__in=ids).values(
+        "id", "settlement_id", "building_type", "is_constructed", "construction_progress",
+        "construction_started_tick", "completion_tick", "coordinate_x", "coordinate_y",
+    ):
+        states[row["settlement_id"]].buildings[row["id"]] = BuildingRec(
+            row["id"], row["building_type"], row["is_constructed"], row["construction_progress"],
+            row["construction_started_tick"], row["completion_tick"], row["coordinate_x"], row["coordinate_y"],
+        )
+    for row in Settler.objects.filter(settlement_id__in=ids).values(
+        "id", "settlement_id", "name", "status", "mood", "hunger", "assigned_building_id",
+        "housing_assigned_id", "gathering_resource_node_id", "birth_tick", "death_tick", "experience",
+    ):
+        states[row["settlement_id"]].settlers[row["id"]] = SettlerRec(
+            row["id"], row["name"], row["status"], row["mood"], row["hunger"], row["assigned_building_id"],
+            row["housing_assigned_id"], row["gathering_resource_node_id"], row["birth_tick"],
+            row["death_tick"], row["experience"],
+        )
+    for row in ResourceNode.objects.filter(map_tile__settlement_id__in=ids).values(
+        "id", "map_tile__settlement_id", "name", "resource_type", "quantity", "max_quantity",
+        "regen_rate", "last_harvest_tick", "gatherer_id",
+    ):
+        states[row["map_tile__settlement_id"]].nodes[row["id"]] = NodeRec(
+            row["id"], row["name"], row["resource_type"], row["quantity"], row["max_quantity"],
+            row["regen_rate"], row["last_harvest_tick"], row["gatherer_id"],
+        )
+    return states
+
+
+def _apply_deltas(state, mark, deltas):
+    balance = replay({r: getattr(state, r) for r in RESOURCES}, deltas)
+    for resource in RESOURCES:
+        setattr(state, resource, balance[resource])
+    state.ledger_mark = mark
+
+
+def persist_states(states, events):
+    """
+    Writes the dirty parts of `states` ({settlement_id: SettlementRec}) and the buffered
+    (settlement_id, event_type, description) events with bulk statements, and clears the
+    dirty flags. Settlers created in memory are inserted and get their real ids.
+    Call inside a transaction. Returns row counts per kind.
+    """
+    settlements, settlers, new_settlers, buildings, nodes, deleted_nodes = [], [], [], [], [], []
+    ledger_marks = {}
+    for state in states.values():
+        if state.dirty:
+            settlements.append(Settlement(id=state.id, **{f: getattr(state, f) for f in SETTLEMENT_FIELDS}))
+            state.dirty = False
+            # The balances written include these ledger deltas.
+            ledger_marks[state.id] = state.ledger_mark
+            state.ledger_mark = None
+        for rec in state.settlers.values():
+            if not rec.dirty:
+                continue
+            row = Settler(
+                id=rec.id if rec.id > 0 else None,
+                settlement_id=state.id,
+                name=rec.name,
+                status=rec.status,
+                mood=rec.mood,
+                hunger=rec.hunger,
+                assigned_building_id=rec.assigned_building_id,
+                housing_assigned_id=rec.housing_id,
+                gathering_resource_node_id=rec.node_id,
+                birth_tick=rec.birth_tick,
+                death_tick=rec.death_tick,
+                experience=rec.experience,
+            )
+            (settlers if rec.id > 0 else new_settlers).append((state, rec, row))
+            rec.dirty = False
+        for rec in state.buildings.values():
+            if rec.dirty:
+                buildings.append(Building(id=rec.id, is_constructed=rec.is_constructed,
+                                          construction_progress=rec.construction_progress))
+                rec.dirty = False
+        for rec in state.nodes.values():
+            if rec.dirty:
+                nodes.append(ResourceNode(id=rec.id, quantity=rec.quantity, last_harvest_tick=rec.last_harvest_tick))
+                rec.dirty = False
+        deleted_nodes.extend(state.deleted_node_ids)
+        state.deleted_node_ids = []
+    event_rows = [
+        EventLog(settlement_id=settlement_id, event_type=event_type, description=description)
+        for settlement_id, event_type, description in events
+        if settlement_id in states
+    ]
+
+    Settlement.objects.bulk_update(settlements, SETTLEMENT_FIELDS)
+    forget(ledger_marks)
+    Settler.objects.bulk_update([row for _, _, row in settlers], SETTLER_FIELDS)
+    created = Settler.objects.bulk_create([row for _, _, row in new_settlers])
+    Building.objects.bulk_update(buildings, BUILDING_FIELDS)
+    ResourceNode.objects.bulk_update(nodes, NODE_FIELDS)
+    if deleted_nodes:
+        ResourceNode.objects.filter(id__in=deleted_nodes).delete()
+    EventLog.objects.bulk_create(event_rows)
+
+    # Settlers recruited in memory carry temporary negative ids until they are inserted.
+    for (state, rec, _), row in zip(new_settlers, created):
+        del state.settlers[rec.id]
+        rec.id = row.id
+        state.settlers[rec.id] = rec
+    return {
+        "settlements": len(settlements),
+        "settlers": len(settlers) + len(new_settlers),
+        "buildings": len(buildings),
+        "nodes": len(nodes) + len(deleted_nodes),
+        "events": len(event_rows),
+    }
+
+
+async def aload_settlement(settlement_id):
+    """
+    Async load_settlements for a single settlement (used by the async views to reuse the
+    simulation core's rate and popularity math). Returns a SettlementRec or None.
+    """
+    row = await Settlement.objects.active().filter(id=settlement_id).values("id", "name", *SETTLEMENT_FIELDS).afirst()
+    if row is None:
+        return None
+    state = SettlementRec(**row)
+    mark, deltas = await apending_deltas(settlement_id)
+    if deltas:
+        _apply_deltas(state, mark, deltas)
+    async for row in Building.objects.filter(settlement_id=settlement_id).values(
+        "id", "building_type", "is_constructed", "construction_progress",
+        "construction_started_tick", "completion_tick", "coordinate_x", "coordinate_y",
+    ):
+        state.buildings[row["id"]] = BuildingRec(
+            row["id"], row["building_type"], row["is_constructed"], row["construction_progress"],
+            row["construction_started_tick"], row["completion_tick"], row["coordinate_x"], row["coordinate_y"],
+        )
+    async for row in Settler.objects.filter(settlement_id=settlement_id).values(
+        "id", "name", "status", "mood", "hunger", "assigned_building_id", "housing_assigned_id",
+        "gathering_resource_node_id", "birth_tick", "death_tick", "experience",
+    ):
+        state.settlers[row["id"]] = SettlerRec(
+            row["id"], row["name"], row["status"], row["mood"], row["hunger"], row["assigned_building_id"],
+            row["housing_assigned_id"], row["gathering_resource_node_id"], row["birth_tick"],
+            row["death_tick"], row["experience"],
+        )
+    async for row in ResourceNode.objects.filter(map_tile__settlement_id=settlement_id).values(
+        "id", "name", "resource_type", "quantity", "max_quantity", "regen_rate", "last_harvest_tick", "gatherer_id",
+    ):
+        state.nodes[row["id"]] = NodeRec(
+            row["id"], row["name"], row["resource_type"], row["quantity"], row["max_quantity"],
+            row["regen_rate"], row["last_harvest_tick"], row["gatherer_id"],
+        )
+    return state
+
+class World:
+    """
+    Authoritative in-memory copy of every ticking settlement of one realm (`gs`).
+
+    Player actions reach the world through the PendingAction queue: before a tick that has
+    pending actions the world checkpoints, lets drain_action_queue apply them through the
+    ORM handlers, then reloads just the affected settlements.
+    """
+
+    def __init__(self, gs, checkpoint_ticks=WORLD_CHECKPOINT_TICKS, rng=None, snapshot_path=WORLD_SNAPSHOT_PATH):
+        self.gs = gs
+        self.checkpoint_ticks = max(1, checkpoint_ticks)
+        self.snapshot_path = snapshot_path
+        self.ctx = TickContext(gs.tick_count, gs.current_season, rng or random.Random())
+        self.settlements = {}
+        self.events = []
+        self.ticks_since_checkpoint = 0
+        self.checkpoint_requested = False
+
+    def load(self):
+        started = time.perf_counter()
+        self.settlements = load_settlements(realm_id=self.gs.id)
+        logger.info(
+            f"World loaded {len(self.settlements)} settlements in {time.perf_counter() - started:.3f}s"
+        )
+
+    def load_snapshot(self):
+        """
+        Warm start: adopts the on-disk snapshot if it was taken at the tick GameState holds,
+        then reconciles it with the ticking settlement ids (claims and deletions made while
+        the scheduler was down). Returns False if there is no usable snapshot.
+        """
+        if not self.snapshot_path:
+            return False
+        started = time.perf_counter()
+        snapshot = read_snapshot(self.snapshot_path)
+        if snapshot is None:
+            return False
+        tick_count, season, settlements = snapshot
+        if tick_count != self.gs.tick_count or season != self.gs.current_season:
+            logger.info(
+                f"World snapshot is at tick {tick_count}, GameState at {self.gs.tick_count}; loading from DB"
+            )
+            return False
+        ticking_ids = self._ticking_ids()
+        # Settlements with unfolded ledger deltas are reloaded so the deltas are included.
+        stale = settlements_with_pending(ticking_ids)
+        self.settlements = {
+            sid: state for sid, state in settlements.items() if sid in ticking_ids and sid not in stale
+        }
+        missing = ticking_ids - set(self.settlements)
+        if missing:
+            self.settlements.update(load_settlements(missing))
+        logger.info(
+            f"World warm-started from snapshot at tick {tick_count}: {len(self.settlements)} settlements "
+            f"({len(missing)} from DB) in {time.perf_counter() - started:.3f}s"
+        )
+        return True
+
+    def write_snapshot(self):
+        """
+        Only valid straight after a checkpoint, when memory and the DB agree.
+        """
+        if not self.snapshot_path:
+            return
+        try:
+            size = write_snapshot(self.ctx.tick_count, self.ctx.season, self.settlements, self.snapshot_path)
+            logger.debug(f"World snapshot written ({size} bytes)")
+        except Exception as e:
+            logger.exception("Error writing world snapshot: %s", str(e))
+
+    def _ticking_ids(self):
+        return set(Settlement.objects.ticking().filter(realm_id=self.gs.id).values_list("id", flat=True))
+
+    def flush(self, settlement_ids):
+        """
+        Writes just the given settlements, their buffered events and the game state, so ORM
+        handlers can act on current rows while the rest of the world stays write-behind.
+        The game state goes with them: after a crash, the settlements not flushed lose
+        their ticks since the last checkpoint, as usual, and none is simulated twice.
+        """
+        states = {sid: self.settlements[sid] for sid in settlement_ids if sid in self.settlements}
+        with transaction.atomic():
+            counts = persist_states(states, self.events)
+            self.gs.tick_count = self.ctx.tick_count
+            self.gs.current_season = self.ctx.season
+            self.gs.save()
+        self.events = [event for event in self.events if event[0] not in states]
+        logger.debug(f"World flushed {counts['settlements']} settlements, {counts['events']} events")
+
+    def reload(self, settlement_ids):
+        """
+        Replaces the given settlements with fresh copies from the DB (dropping any that are
+        no longer active). Only safe right after they were flushed or checkpointed.
+        """
+        settlement_ids = set(settlement_ids)
+        fresh = load_settlements(settlement_ids, realm_id=self.gs.id)
+        for settlement_id in settlement_ids:
+            self.settlements.pop(settlement_id, None)
+        self.settlements.update(fresh)
+
+    def _drop_buried(self, settler_ids):
+        # The graveyard deleted these settlers' rows and released their nodes.
+        settler_ids = set(settler_ids)
+        if not settler_ids:
+            return
+        for state in self.settlements.values():
+            for settler_id in settler_ids & state.settlers.keys():
+                del state.settlers[settler_id]
+            for node in state.nodes.values():
+                if node.gatherer_id in settler_ids:
+                    node.gatherer_id = None
+
+    def request_checkpoint(self):
+        # Safe to call from a signal handler; the checkpoint runs at the end of the next tick.
+        self.checkpoint_requested = True
+
+    def pending_action_settlements(self):
+        return set(
+            PendingAction.objects.filter(active_settlement_q(), settlement__realm_id=self.gs.id, status="pending")
+            .values_list("settlement_id", flat=True)
+            .distinct()
+        )
+
+    def advance(self):
+        """
+        Simulates the tick in self.ctx (already advanced by the caller) for every settlement.
+        """
+        for state in self.settlements.values():
+            simulate_tick(state, self.ctx, self.events)
+        self.ticks_since_checkpoint += 1
+        if self.checkpoint_requested or self.ticks_since_checkpoint >= self.checkpoint_ticks:
+            self.checkpoint(tiers=True)
+            self.write_snapshot()
+
+    def checkpoint(self, tiers=False):
+        """
+        Writes every dirty record, new settlers, depleted nodes, buffered events and the
+        game state in one transaction, then picks up newly claimed settlements and drops
+        deleted ones. With `tiers`, idle settlements go dormant and recently active
+        dormant ones are caught up and rejoin the world.
+        """
+        started = time.perf_counter()
+        active_ids = set(Settlement.objects.active().values_list("id", flat=True))
+        for settlement_id in set(self.settlements) - active_ids:
+            del self.settlements[settlement_id]
+
+        with transaction.atomic():
+            counts = persist_states(self.settlements, self.events)
+            self.gs.tick_count = self.ctx.tick_count
+            self.gs.current_season = self.ctx.season
+            self.gs.save()
+        self.events = []
+        self._drop_buried(bury(self.ctx.tick_count, self.gs.id))
+
+        demoted = promoted = 0
+        if tiers:
+            demoted, promoted = update_tiers(self.ctx.tick_count, self.ctx.season, self.gs.id)
+        ticking_ids = self._ticking_ids()
+        for settlement_id in set(self.settlements) - ticking_ids:
+            del self.settlements[settlement_id]
+        new_ids = ticking_ids - set(self.settlements)
+        if new_ids:
+            self.settlements.update(load_settlements(new_ids))
+        self.ticks_since_checkpoint = 0
+        self.checkpoint_requested = False
+        logger.info(
+            f"World checkpoint at tick {self.ctx.tick_count}: {counts['settlements']} settlements, "
+            f"{counts['settlers']} settlers, {counts['buildings']} buildings, {counts['nodes']} nodes, "
+            f"{counts['events']} events written; {len(new_ids)} loaded ({promoted} woken), "
+            f"{demoted} went dormant in {time.perf_counter() - started:.3f}s"
+        )
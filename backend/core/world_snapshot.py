@@ -0,0 +1,214 @@
+# core/world_snapshot.py
+# Versioned binary snapshot of the in-memory world, written after world checkpoints and
+# memory-mapped on scheduler start so the memory engine can skip the full DB load.
+#
+# Layout (little-endian):
+#   header    magic, version, tick, season, record counts, CRC32 of the body
+#   body      settlements | buildings | settlers | nodes   fixed-width packed records
+#             strings                                      u16 length + UTF-8, indexed by position
+# Every text field (names, types, statuses) is an index into the string table and NULL
+# integers are stored as NULL_INT.
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+
+from django.conf import settings
+
+from core.config import SEASONS
+from core.models import DEFAULT_REALM_ID
+from core.simulation import BuildingRec, NodeRec, SettlementRec, SettlerRec
+
+logger = logging.getLogger(__name__)
+
+# --- Configurable Constants ---
+WORLD_SNAPSHOT_PATH = getattr(
+    settings, 'WORLD_SNAPSHOT_PATH', os.path.join(tempfile.gettempdir(), 'coa_world.snapshot')
+)
+
+MAGIC = b"COAW"
+VERSION = 1
+NULL_INT = -2 ** 31
+
+HEADER = struct.Struct("<4sHiB5II")
+SETTLEMENT = struct.Struct("<iIiiiiid")
+BUILDING = struct.Struct("<iiI?iiiii")
+SETTLER = struct.Struct("<iiIIIiiiiiii")
+NODE = struct.Struct("<iiIIiiiii")
+STRING_LEN = struct.Struct("<H")
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _int(value):
+    return NULL_INT if value is None else value
+
+def _opt(value):
+    return None if value == NULL_INT else value
+
+
+class _StringTable:
+    def __init__(self):
+        self.index = {}
+        self.strings = []
+
+    def __call__(self, value):
+        position = self.index.get(value)
+        if position is None:
+            position = self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return position
+
+    def pack(self):
+        parts = []
+        for value in self.strings:
+            data = value.encode("utf-8")
+            parts.append(STRING_LEN.pack(len(data)))
+            parts.append(data)
+        return b"".join(parts)
+
+
+def dumps(tick_count, season, settlements):
+    """
+    Packs {settlement_id: SettlementRec} into snapshot bytes. Records must be clean (taken
+    right after a checkpoint), since dirty flags and temporary ids are not stored.
+    """
+    s = _StringTable()
+    settlement_rows, building_rows, settler_rows, node_rows = [], [], [], []
+    for state in settlements.values():
+        settlement_rows.append(SETTLEMENT.pack(
+            state.id, s(state.name), state.food, state.wood, state.stone, state.magic,
+            state.happy_duration, state.happiness_boost,
+        ))
+        for b in state.buildings.values():
+            building_rows.append(BUILDING.pack(
+                state.id, b.id, s(b.building_type), b.is_constructed, b.construction_progress,
+                _int(b.construction_started_tick), _int(b.completion_tick), _int(b.x), _int(b.y),
+            ))
+        for p in state.settlers.values():
+            settler_rows.append(SETTLER.pack(
+                state.id, p.id, s(p.name), s(p.status), s(p.mood), p.hunger, _int(p.assigned_building_id),
+                _int(p.housing_id), _int(p.node_id), _int(p.birth_tick), _int(p.death_tick), p.experience,
+            ))
+        for n in state.nodes.values():
+            node_rows.append(NODE.pack(
+                state.id, n.id, s(n.name), s(n.resource_type), n.quantity, n.max_quantity, n.regen_rate,
+                _int(n.last_harvest_tick), _int(n.gatherer_id),
+            ))
+    body = b"".join([
+        b"".join(settlement_rows), b"".join(building_rows), b"".join(settler_rows),
+        b"".join(node_rows), s.pack(),
+    ])
+    header = HEADER.pack(
+        MAGIC, VERSION, tick_count, SEASONS.index(season) if season in SEASONS else 0,
+        len(settlement_rows), len(building_rows), len(settler_rows), len(node_rows), len(s.strings),
+        zlib.crc32(body),
+    )
+    return header + body
+
+
+def loads(buffer):
+    """
+    Unpacks snapshot bytes (or an mmap) into (tick_count, season, {settlement_id: SettlementRec}).
+    Raises SnapshotError on a bad magic, version or checksum.
+    """
+    view = memoryview(buffer)
+    if len(view) < HEADER.size:
+        raise SnapshotError("Snapshot is truncated.")
+    magic, version, tick_count, season_index, n_settlements, n_buildings, n_settlers, n_nodes, n_strings, crc = (
+        HEADER.unpack_from(view, 0)
+    )
+    if magic != MAGIC:
+        raise SnapshotError("Not a world snapshot.")
+    if version != VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}.")
+    body = view[HEADER.size:]
+    if zlib.crc32(body) != crc:
+        raise SnapshotError("Snapshot checksum mismatch.")
+
+    offset = 0
+    sections = []
+    for record, count in ((SETTLEMENT, n_settlements), (BUILDING, n_buildings), (SETTLER, n_settlers), (NODE, n_nodes)):
+        end = offset + record.size * count
+        sections.append(record.iter_unpack(body[offset:end]))
+        offset = end
+    strings = []
+    for _ in range(n_strings):
+        (length,) = STRING_LEN.unpack_from(body, offset)
+        offset += STRING_LEN.size
+        strings.append(str(body[offset:offset + length], "utf-8"))
+        offset += length
+
+    settlement_rows, building_rows, settler_rows, node_rows = sections
+    states = {}
+    for sid, name, food, wood, stone, magic_amount, happy_duration, happiness_boost in settlement_rows:
+        states[sid] = SettlementRec(sid, strings[name], food, wood, stone, magic_amount, happy_duration, happiness_boost)
+    for sid, bid, building_type, constructed, progress, started, completion, x, y in building_rows:
+        states[sid].buildings[bid] = BuildingRec(
+            bid, strings[building_type], constructed, progress, _opt(started), _opt(completion), _opt(x), _opt(y)
+        )
+    for sid, pid, name, status, mood, hunger, assigned, housing, node, birth, death, experience in settler_rows:
+        states[sid].settlers[pid] = SettlerRec(
+            pid, strings[name], strings[status], strings[mood], hunger, _opt(assigned), _opt(housing),
+            _opt(node), _opt(birth), _opt(death), experience,
+        )
+    for sid, nid, name, resource_type, quantity, max_quantity, regen_rate, last_harvest, gatherer in node_rows:
+        states[sid].nodes[nid] = NodeRec(
+            nid, strings[name], strings[resource_type], quantity, max_quantity, regen_rate,
+            _opt(last_harvest), _opt(gatherer),
+        )
+    return tick_count, SEASONS[season_index % len(SEASONS)], states
+
+
+def realm_snapshot_path(realm_id, path=WORLD_SNAPSHOT_PATH):
+    """
+    The default realm uses `path` itself, other realms a file next to it.
+    """
+    if realm_id == DEFAULT_REALM_ID:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}_{realm_id}{ext}"
+
+
+def write_snapshot(tick_count, season, settlements, path=WORLD_SNAPSHOT_PATH):
+    """
+    Writes the snapshot atomically (temp file + rename). Returns the number of bytes written.
+    """
+    data = dumps(tick_count, season, settlements)
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".coa_world_")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return len(data)
+
+
+def read_snapshot(path=WORLD_SNAPSHOT_PATH):
+    """
+    Memory-maps and unpacks the snapshot at `path`. Returns None if there is none or it is
+    unreadable.
+    """
+    error = None
+    try:
+        with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            try:
+                return loads(mapped)
+            except Exception as e:
+                # The traceback's frames hold memoryviews of the map, which cannot be closed
+                # while they exist: keep only the message and let the exception go.
+                error = f"{type(e).__name__}: {e}"
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, BufferError) as e:
+        error = str(e)
+    logger.warning("Ignoring world snapshot %s: %s", path, error)
+    return None
@@ -33,8 +33,14 @@ export const deleteSettlement = async (id) => {
   return response.data;
 };
 
-export const fetchGameState = async () => {
-  const response = await axiosInstance.get("/game-state/");
+export const fetchGameState = async (realm) => {
+  const params = realm ? { realm } : {};
+  const response = await axiosInstance.get("/game-state/", { params });
+  return response.data;
+};
+
+export const fetchRealms = async () => {
+  const response = await axiosInstance.get("/realms/");
   return response.data;
 };
 
@@ -80,8 +86,9 @@ export const register = async (username, password, email) => {
   return response.data;
 };
 
-export const createSettlement = async (name) => {
-  const response = await axiosInstance.post("/settlement/create/", { name });
+export const createSettlement = async (name, realm) => {
+  const payload = realm ? { name, realm } : { name };
+  const response = await axiosInstance.post("/settlement/create/", payload);
   return response.data;
 };
 
@@ -115,5 +122,26 @@ export const toggleAssignment = async (payload) => {
   return response.data;
 };
 
+export const placeBlueprint = async (payload) => {
+  const response = await axiosInstance.post("/blueprint/place/", payload);
+  return response.data;
+};
+
+export const submitBatchActions = async (settlementId, actions) => {
+  const response = await axiosInstance.post("/actions/batch/", { settlement_id: settlementId, actions });
+  return response.data;
+};
+
+export const fetchActionStatus = async (actionId) => {
+  const response = await axiosInstance.get(`/action/${actionId}/`);
+  return response.data;
+};
+
+export const fetchForecast = async (settlementId, ticks = 100, scenarios = 1, sample = 1) => {
+  const response = await axiosInstance.get(`/settlement/${settlementId}/forecast/`, {
+    params: { ticks, scenarios, sample },
+  });
+  return response.data;
+};
 
 export default axiosInstance;
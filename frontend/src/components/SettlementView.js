@@ -70,14 +70,16 @@ const SettlementView = () => {
     }
   }, [id]);
 
+  // Each settlement ticks on its own realm's clock.
+  const realm = settlementData ? settlementData.realm : undefined;
   const loadGameState = useCallback(async () => {
     try {
-      const data = await fetchGameState();
+      const data = await fetchGameState(realm);
       setGameState(data);
     } catch (err) {
       console.error("Error fetching game state:", err);
     }
-  }, []);
+  }, [realm]);
 
   const loadMapTiles = useCallback(async () => {
     try {